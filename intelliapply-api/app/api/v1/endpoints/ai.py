@@ -1,41 +1,74 @@
 
 # app/api/v1/endpoints/ai.py
-import asyncio
-from fastapi import APIRouter, Depends, HTTPException
+from uuid import uuid4
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from app.core.security import get_current_user
-from app.core.config import is_ready, supabase
+from app.core.config import is_ready
+from app.repositories.jobs import jobs_repo
+from app.repositories.profiles import profiles_repo
+from app.core.cache import llm_cache
+from app.core.streaming import SSE_HEADERS, stream_cached
 from app.schemas.ai import AIRequest, OptimizedResumeRequest, ResumeFromTextRequest
-from app.services.ai_analysis import get_interview_prep, get_resume_suggestions, get_cover_letter
-from app.services.ai_crew import run_resume_crew
+from app.services.ai_analysis import get_interview_prep, get_resume_suggestions, get_cover_letter, stream_cover_letter
+from app.services.ai_crew import run_resume_crew_cached, crew_error
+from app.services import crew_tasks
 import logging
 
 router = APIRouter()
 log = logging.getLogger(__name__)
 
 # --- Helper ---
-def get_profile_context(profile_id: str, user_id: str):
+# Only the columns each endpoint actually reads are fetched (and cached).
+RESUME_CONTEXT_COLUMNS = "resume_context"
+CREW_PROFILE_COLUMNS = "full_name, email, phone, linkedin_url, portfolio_url, resume_context"
+
+async def get_profile_context(profile_id: str, user_id: str, columns: str = RESUME_CONTEXT_COLUMNS):
     if not is_ready():
         raise HTTPException(status_code=503, detail="DB client not configured.")
     try:
-        profile_res = supabase.table("profiles") \
-            .select("*") \
-            .eq("id", profile_id) \
-            .eq("user_id", user_id) \
-            .single().execute()
-            
-        profile = profile_res.data
-        if not profile:
-            raise HTTPException(status_code=404, detail="Profile not found or access denied.")
-        return profile
+        profile = await profiles_repo.get_cached(profile_id, columns=columns, user_id=user_id)
     except Exception as e:
         log.error(f"Failed to fetch profile {profile_id}: {e}")
         raise HTTPException(status_code=500, detail="Database error.")
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found or access denied.")
+    return profile
+
+async def enqueue_resume_crew(req: Request, user_id: str, job_description: str, resume_context: str, profile_data: dict):
+    """Queues the crew on arq (async mode); progress is then read from /crew-tasks/{task_id}."""
+    redis = getattr(req.app.state, "redis", None)
+    if not redis:
+        raise HTTPException(status_code=503, detail="Job queue (Redis) is not connected.")
+    task_id = uuid4().hex
+    # Recorded first, so the task is visible even if a worker picks it up immediately.
+    await crew_tasks.publish_stage(redis, task_id, user_id, crew_tasks.QUEUED)
+    try:
+        await redis.enqueue_job(
+            "generate_optimized_resume", user_id, job_description, resume_context, profile_data, _job_id=task_id
+        )
+    except Exception as e:
+        log.error(f"API: Failed to enqueue resume crew task {task_id}: {e}")
+        # Otherwise the task would show as queued until it expires.
+        try:
+            await crew_tasks.publish_stage(redis, task_id, user_id, crew_tasks.FAILED, error="Failed to queue the task.")
+        except Exception as publish_error:
+            log.error(f"API: Failed to mark crew task {task_id} as failed: {publish_error}")
+        raise HTTPException(status_code=503, detail="Failed to queue the task.")
+    log.info(f"API: Enqueued resume crew task {task_id}.")
+    return {"status": "queued", "task_id": task_id}
 
 @router.post("/interview-prep")
 async def generate_interview_prep_endpoint(request: AIRequest, user_id: str = Depends(get_current_user)):
     log.info(f"API: Received interview prep request for profile {request.profile_id}...")
-    profile = get_profile_context(request.profile_id, user_id)
-    prep_data = get_interview_prep(profile.get("resume_context"), request.job_description)
+    profile = await get_profile_context(request.profile_id, user_id)
+    resume_context = profile.get("resume_context")
+    prep_data = await llm_cache.get_or_compute(
+        "get_interview_prep",
+        {"resume_context": resume_context, "job_description": request.job_description},
+        lambda: get_interview_prep(resume_context, request.job_description),
+        bypass=request.bypass_cache,
+    )
     if not prep_data:
         raise HTTPException(status_code=500, detail="AI failed to generate prep data.")
     return prep_data
@@ -43,8 +76,14 @@ async def generate_interview_prep_endpoint(request: AIRequest, user_id: str = De
 @router.post("/tailor-resume")
 async def generate_resume_suggestions_endpoint(request: AIRequest, user_id: str = Depends(get_current_user)):
     log.info(f"API: Received resume tailoring request for profile {request.profile_id}...")
-    profile = get_profile_context(request.profile_id, user_id)
-    suggestions = get_resume_suggestions(profile.get("resume_context"), request.job_description)
+    profile = await get_profile_context(request.profile_id, user_id)
+    resume_context = profile.get("resume_context")
+    suggestions = await llm_cache.get_or_compute(
+        "get_resume_suggestions",
+        {"resume_context": resume_context, "job_description": request.job_description},
+        lambda: get_resume_suggestions(resume_context, request.job_description),
+        bypass=request.bypass_cache,
+    )
     if not suggestions:
         raise HTTPException(status_code=500, detail="AI failed to generate suggestions.")
     return suggestions
@@ -54,45 +93,80 @@ async def generate_cover_letter_endpoint(request: AIRequest, user_id: str = Depe
     log.info(f"API: Received cover letter request for profile {request.profile_id}...")
     if not request.company or not request.title:
         raise HTTPException(status_code=400, detail="Company and Title are required for cover letters.")
-    profile = get_profile_context(request.profile_id, user_id)
-    letter = get_cover_letter(profile.get("resume_context"), request.job_description, request.company, request.title)
+    profile = await get_profile_context(request.profile_id, user_id)
+    resume_context = profile.get("resume_context")
+    letter = await llm_cache.get_or_compute(
+        "get_cover_letter",
+        {
+            "resume_context": resume_context,
+            "job_description": request.job_description,
+            "company": request.company,
+            "title": request.title,
+        },
+        lambda: get_cover_letter(resume_context, request.job_description, request.company, request.title),
+        bypass=request.bypass_cache,
+    )
     if not letter:
         raise HTTPException(status_code=500, detail="AI failed to generate cover letter.")
     return letter
 
+@router.post("/generate-cover-letter/stream")
+async def stream_cover_letter_endpoint(request: AIRequest, user_id: str = Depends(get_current_user)):
+    """
+    Streaming /generate-cover-letter: server-sent `delta` events with the letter's text as it
+    is generated, then `done` with the same {"coverLetter": ...} result (and cache entry).
+    """
+    log.info(f"API: Received streaming cover letter request for profile {request.profile_id}...")
+    if not request.company or not request.title:
+        raise HTTPException(status_code=400, detail="Company and Title are required for cover letters.")
+    profile = await get_profile_context(request.profile_id, user_id)
+    resume_context = profile.get("resume_context")
+    return StreamingResponse(
+        stream_cached(
+            "get_cover_letter",
+            {
+                "resume_context": resume_context,
+                "job_description": request.job_description,
+                "company": request.company,
+                "title": request.title,
+            },
+            lambda: stream_cover_letter(resume_context, request.job_description, request.company, request.title),
+            finalize=lambda text: {"coverLetter": text.strip()},
+            to_text=lambda letter: letter.get("coverLetter", ""),
+            bypass=request.bypass_cache,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
 @router.post("/generate-optimized-resume")
-async def generate_optimized_resume(request: OptimizedResumeRequest, user_id: str = Depends(get_current_user)):
+async def generate_optimized_resume(request: OptimizedResumeRequest, req: Request, user_id: str = Depends(get_current_user)):
     log.info(f"API: Received resume optimization request for job {request.job_id} from user {user_id}")
     try:
-        profile_data = get_profile_context(request.profile_id, user_id)
+        profile_data = await get_profile_context(request.profile_id, user_id, columns=CREW_PROFILE_COLUMNS)
         resume_context = profile_data.get("resume_context")
 
-        job_res = supabase.table("jobs") \
-            .select("description") \
-            .eq("id", request.job_id) \
-            .eq("user_id", user_id) \
-            .single() \
-            .execute()
-        
-        if hasattr(job_res, 'error') and job_res.error:
-            raise Exception(str(job_res.error))
-        if not job_res.data or not job_res.data.get("description"):
+        job = await jobs_repo.get(request.job_id, columns="description", user_id=user_id)
+        if not job or not job.get("description"):
             raise HTTPException(status_code=404, detail="Job description not found for this job.")
         
-        job_description = job_res.data["description"]
+        job_description = job["description"]
         
+        if request.async_mode:
+            return await enqueue_resume_crew(req, user_id, job_description, resume_context, profile_data)
+
         log.info("Handing off to AI Crew...")
         
-        optimized_resume = await asyncio.to_thread(
-            run_resume_crew, 
+        optimized_resume = await run_resume_crew_cached(
             job_description=job_description, 
             resume_context=resume_context,
             profile_data=profile_data
         )
         log.info("AI Crew finished. Returning result.")
         
-        if optimized_resume.startswith("Error:"):
-            raise Exception(optimized_resume)
+        error = crew_error(optimized_resume)
+        if error:
+            raise Exception(error)
             
         return {"optimized_resume": optimized_resume}
         
@@ -104,10 +178,10 @@ async def generate_optimized_resume(request: OptimizedResumeRequest, user_id: st
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/generate-resume-from-text")
-async def generate_resume_from_text(request: ResumeFromTextRequest, user_id: str = Depends(get_current_user)):
+async def generate_resume_from_text(request: ResumeFromTextRequest, req: Request, user_id: str = Depends(get_current_user)):
     log.info(f"API: Received resume-from-text request for profile {request.profile_id} from user {user_id}")
     try:
-        profile_data = get_profile_context(request.profile_id, user_id)
+        profile_data = await get_profile_context(request.profile_id, user_id, columns=CREW_PROFILE_COLUMNS)
         
         resume_context = request.resume_context
         job_description = request.job_description
@@ -115,18 +189,21 @@ async def generate_resume_from_text(request: ResumeFromTextRequest, user_id: str
         if not resume_context or not job_description:
             raise HTTPException(status_code=400, detail="Resume context and job description are required.")
 
+        if request.async_mode:
+            return await enqueue_resume_crew(req, user_id, job_description, resume_context, profile_data)
+
         log.info("Handing off to AI Crew...")
         
-        optimized_resume = await asyncio.to_thread(
-            run_resume_crew, 
+        optimized_resume = await run_resume_crew_cached(
             job_description=job_description, 
             resume_context=resume_context,
             profile_data=profile_data
         )
         log.info("AI Crew finished. Returning result.")
         
-        if optimized_resume.startswith("Error:"):
-            raise Exception(optimized_resume)
+        error = crew_error(optimized_resume)
+        if error:
+            raise Exception(error)
             
         return {"optimized_resume": optimized_resume}
         
@@ -136,3 +213,34 @@ async def generate_resume_from_text(request: ResumeFromTextRequest, user_id: str
     except Exception as e:
         log.error(f"Failed to generate optimized resume from text: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/crew-tasks/{task_id}")
+async def get_crew_task(task_id: str, req: Request, user_id: str = Depends(get_current_user)):
+    """
+    Status of a queued resume crew: its current stage and, once complete, the
+    `optimized_resume` (same shape as the synchronous endpoints' response) or `error`.
+    """
+    redis = getattr(req.app.state, "redis", None)
+    if not redis:
+        raise HTTPException(status_code=503, detail="Job queue (Redis) is not connected.")
+    status = await crew_tasks.get_status(redis, task_id, user_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Crew task not found.")
+    return {"status": "ok", **status}
+
+@router.get("/crew-tasks/{task_id}/events")
+async def stream_crew_task_events(task_id: str, req: Request, user_id: str = Depends(get_current_user)):
+    """Server-sent events: one `stage` event per transition, ending with complete/failed."""
+    redis = getattr(req.app.state, "redis", None)
+    if not redis:
+        raise HTTPException(status_code=503, detail="Job queue (Redis) is not connected.")
+    if not await crew_tasks.get_status(redis, task_id, user_id):
+        raise HTTPException(status_code=404, detail="Crew task not found.")
+
+    last_event_id = req.headers.get("last-event-id", "")
+    start = int(last_event_id) + 1 if last_event_id.isdigit() else 0
+    return StreamingResponse(
+        crew_tasks.sse_events(redis, task_id, start),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
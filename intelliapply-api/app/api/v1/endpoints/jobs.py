@@ -5,12 +5,14 @@ from typing import List
 from datetime import datetime
 import logging
 
-from app.core.config import supabase
+from app.core.config import BULK_ANALYZE_CHUNK_SIZE
+from app.core.queue import enqueue_jobs_bulk
 from app.core.security import get_current_user
 from app.schemas.jobs import (
     ManualJobCreate, JobStatusUpdate, JobDetailsUpdate, JobDeleteRequest
 )
 from app.schemas.analysis import AnalyzeRequest, BulkAnalyzeRequest
+from app.repositories.jobs import jobs_repo
 
 router = APIRouter()
 log = logging.getLogger(__name__)
@@ -32,8 +34,8 @@ async def trigger_on_demand_analysis(
         raise HTTPException(status_code=503, detail="Job queue (Redis) is not connected.")
     
     # Verify ownership
-    job_res = supabase.table("jobs").select("id").eq("id", job_id).eq("user_id", user_id).single().execute()
-    if not job_res.data:
+    job = await jobs_repo.get(job_id, columns="id", user_id=user_id)
+    if not job:
         raise HTTPException(status_code=404, detail="Job not found or access denied.")
         
     log.info(f"API: Received on-demand analysis for job {job_id} using profile {request.profile_id} (User: {user_id})")
@@ -42,7 +44,8 @@ async def trigger_on_demand_analysis(
         "analyze_job_on_demand", 
         job_id, 
         request.profile_id, 
-        request.description
+        request.description,
+        bypass_cache=request.bypass_cache
     )
     return {"status": "ok", "message": "On-demand analysis enqueued."}
 
@@ -62,34 +65,21 @@ async def trigger_bulk_analysis(
     # Ideally get_profile_context helper if needed, but let's assume worker handles detailed checks 
     # or we do a quick check here. original code called get_profile_context.
 
-    # 1. Fetch eligible jobs
-    response = supabase.table("jobs") \
-        .select("id, description") \
-        .in_("id", request.job_ids) \
-        .eq("user_id", user_id) \
-        .not_.is_("description", "null") \
-        .is_("gemini_rating", "null") \
-        .execute()
-
-    if hasattr(response, 'error') and response.error:
-        raise Exception(str(response.error))
-
-    jobs_to_process = response.data
-    if not jobs_to_process:
+    # 1. Fetch eligible job IDs (descriptions stay in the DB; the worker fetches them in batches)
+    job_ids = await jobs_repo.list_unrated_ids(request.job_ids, user_id)
+    if not job_ids:
         return {"status": "ok", "message": "No new jobs with descriptions to analyze."}
 
-    enqueued_count = 0
-    for job in jobs_to_process:
-        await redis.enqueue_job(
-            "analyze_job_on_demand",
-            job['id'],
-            request.profile_id,
-            job['description']
-        )
-        enqueued_count += 1
-    
-    log.info(f"API: Enqueued {enqueued_count} analysis jobs.")
-    return {"status": "ok", "message": f"Enqueued {enqueued_count} jobs for analysis."}
+    # 2. Enqueue everything in one Redis round trip with ID-only payloads
+    if request.batch_mode:
+        chunks = [job_ids[i:i + BULK_ANALYZE_CHUNK_SIZE] for i in range(0, len(job_ids), BULK_ANALYZE_CHUNK_SIZE)]
+        await enqueue_jobs_bulk(redis, "analyze_jobs_batch", [(request.profile_id, chunk) for chunk in chunks])
+        log.info(f"API: Enqueued {len(job_ids)} jobs in {len(chunks)} batch analysis jobs.")
+    else:
+        await enqueue_jobs_bulk(redis, "analyze_job_on_demand", [(job_id, request.profile_id) for job_id in job_ids])
+        log.info(f"API: Enqueued {len(job_ids)} analysis jobs.")
+
+    return {"status": "ok", "message": f"Enqueued {len(job_ids)} jobs for analysis."}
 
 
 # --- CRUD / MUTATIONS ---
@@ -97,13 +87,7 @@ async def trigger_bulk_analysis(
 @router.post("/create-manual", status_code=status.HTTP_201_CREATED)
 async def create_manual_job(request: ManualJobCreate, user_id: str = Depends(get_current_user)):
     try:
-        dupe_check = supabase.table("jobs").select("id", count='exact') \
-            .eq("user_id", user_id) \
-            .ilike("title", request.title) \
-            .ilike("company", request.company) \
-            .execute()
-
-        if dupe_check.count > 0:
+        if await jobs_repo.count_matching(user_id, request.title, request.company) > 0:
             raise HTTPException(status_code=409, detail="This job already exists in your library.")
 
         job_to_save = {
@@ -118,16 +102,13 @@ async def create_manual_job(request: ManualJobCreate, user_id: str = Depends(get
             "is_tracked": False,
         }
         
-        insert_response = supabase.table("jobs").insert(job_to_save).execute()
-        
-        if hasattr(insert_response, 'error') and insert_response.error:
-            raise Exception(str(insert_response.error))
+        inserted = await jobs_repo.insert(job_to_save)
             
-        if not insert_response.data:
+        if not inserted:
             raise Exception("Failed to save job, no data returned.")
             
-        log.info(f"API: Manually created job {insert_response.data[0]['id']} for user {user_id}")
-        return insert_response.data[0]
+        log.info(f"API: Manually created job {inserted[0]['id']} for user {user_id}")
+        return inserted[0]
         
     except HTTPException as he:
         raise he
@@ -138,13 +119,7 @@ async def create_manual_job(request: ManualJobCreate, user_id: str = Depends(get
 @router.post("/{job_id}/update-status")
 async def update_job_status(job_id: int, request: JobStatusUpdate, user_id: str = Depends(get_current_user)):
     try:
-        response = supabase.table("jobs") \
-            .update({"status": request.status}) \
-            .eq("id", job_id) \
-            .eq("user_id", user_id) \
-            .execute()
-        if hasattr(response, 'error') and response.error:
-            raise Exception(str(response.error))
+        await jobs_repo.update(job_id, {"status": request.status}, user_id=user_id)
             
         return {"status": "ok", "message": "Job status updated."}
     except Exception as e:
@@ -158,13 +133,7 @@ async def update_job_details(job_id: int, request: JobDetailsUpdate, user_id: st
         if not update_data:
             raise HTTPException(status_code=400, detail="No data provided.")
             
-        response = supabase.table("jobs") \
-            .update(update_data) \
-            .eq("id", job_id) \
-            .eq("user_id", user_id) \
-            .execute()
-        if hasattr(response, 'error') and response.error:
-            raise Exception(str(response.error))
+        await jobs_repo.update(job_id, update_data, user_id=user_id)
 
         return {"status": "ok", "message": "Job details updated."}
     except Exception as e:
@@ -178,16 +147,9 @@ async def delete_jobs(request: JobDeleteRequest, user_id: str = Depends(get_curr
         if not job_ids:
             raise HTTPException(status_code=400, detail="No job IDs provided.")
 
-        response = supabase.table("jobs") \
-            .delete() \
-            .in_("id", job_ids) \
-            .eq("user_id", user_id) \
-            .execute()
+        deleted = await jobs_repo.delete(job_ids, user_id)
             
-        if hasattr(response, 'error') and response.error:
-            raise Exception(str(response.error))
-            
-        return {"status": "ok", "message": f"Deleted {len(response.data)} job(s)."}
+        return {"status": "ok", "message": f"Deleted {deleted} job(s)."}
     except Exception as e:
         log.error(f"Failed to delete jobs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -195,16 +157,9 @@ async def delete_jobs(request: JobDeleteRequest, user_id: str = Depends(get_curr
 @router.post("/delete-all-untracked")
 async def delete_all_untracked_jobs(user_id: str = Depends(get_current_user)):
     try:
-        response = supabase.table("jobs") \
-            .delete() \
-            .eq("user_id", user_id) \
-            .eq("is_tracked", False) \
-            .execute()
-            
-        if hasattr(response, 'error') and response.error:
-            raise Exception(str(response.error))
+        deleted = await jobs_repo.delete_untracked(user_id)
             
-        return {"status": "ok", "message": f"Deleted {len(response.data)} untracked job(s)."}
+        return {"status": "ok", "message": f"Deleted {deleted} untracked job(s)."}
     except Exception as e:
         log.error(f"Failed to delete untracked jobs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,25 @@
+# app/api/v1/endpoints/profiles.py
+from fastapi import APIRouter, Depends, HTTPException, Request
+from app.core.security import get_current_user
+from app.repositories.profiles import profiles_repo
+import logging
+
+router = APIRouter()
+log = logging.getLogger(__name__)
+
+@router.post("/{profile_id}/invalidate-cache")
+async def invalidate_profile_cache(profile_id: str, req: Request, user_id: str = Depends(get_current_user)):
+    """Called by the dashboard after a profile is saved or deleted."""
+    # A deleted profile has no row left to check; only someone else's existing profile is refused.
+    profile = await profiles_repo.get(profile_id, columns="user_id")
+    if profile and profile.get("user_id") != user_id:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+
+    log.info(f"API: Invalidating cached profile {profile_id} for user {user_id}")
+    redis = getattr(req.app.state, "redis", None)
+    try:
+        await profiles_repo.publish_invalidation(redis, profile_id)
+    except Exception as e:
+        # Other processes fall back to the cache TTL.
+        log.warning(f"Failed to publish profile invalidation: {e}")
+    return {"status": "invalidated", "profile_id": profile_id}
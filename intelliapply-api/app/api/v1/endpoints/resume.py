@@ -1,26 +1,51 @@
 
 # app/api/v1/endpoints/resume.py
-from fastapi import APIRouter, File, UploadFile, Body, HTTPException, Response
-from app.services.parser import parse_resume_to_json
+import asyncio
+import re
+from fastapi import APIRouter, File, UploadFile, Body, HTTPException, Request, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
+from app.services.parser import extract_text_with_inline_links, parse_resume_text_to_json
 from app.services.intelligence import analyze_gaps
-from app.services.generator import tailor_resume, write_cover_letter
-from app.services.renderer import render_resume_pdf, render_cover_letter_pdf
+from app.services.generator import tailor_resume, write_cover_letter, stream_cover_letter
+from app.services.renderer import render_resume, render_cover_letter_pdf
+from app.services.render_pool import run_render, RenderPoolSaturated
+from app.services.pdf_cache import pdf_cache
+from app.core.concurrency import run_blocking
 from app.schemas.resume import GapAnalysisRequest, GapAnalysisResponse, CoverLetterRequest, CoverLetterResponse
-from app.core.config import supabase
+from app.core.config import SUPABASE_URL
+from app.repositories.client import get_db
+from app.core.cache import llm_cache
+from app.core.streaming import SSE_HEADERS, stream_cached
 import logging
 
 router = APIRouter()
 log = logging.getLogger(__name__)
 
 @router.post("/ingest")
-async def ingest_resume(file: UploadFile = File(...)):
+async def ingest_resume(file: UploadFile = File(...), bypass_cache: bool = False):
     if file.content_type != "application/pdf":
         raise HTTPException(400, "Only PDFs allowed.")
 
     content = await file.read()
+    # Both stages are keyed by the PDF bytes' SHA-256 (the cache hashes bytes inputs).
+    cache_inputs = {"file": content}
+
+    async def extract_and_parse():
+        raw_text = await llm_cache.get_or_compute(
+            "extract_resume_text",
+            cache_inputs,
+            lambda: asyncio.to_thread(extract_text_with_inline_links, content),
+            bypass=bypass_cache,
+        )
+        return await parse_resume_text_to_json(raw_text)
 
     try:
-        parsed_data = parse_resume_to_json(content)
+        parsed_data = await llm_cache.get_or_compute(
+            "parse_resume_to_json",
+            cache_inputs,
+            extract_and_parse,
+            bypass=bypass_cache,
+        )
     except Exception as e:
         raise HTTPException(500, f"Parser failed: {e}")
 
@@ -28,9 +53,10 @@ async def ingest_resume(file: UploadFile = File(...)):
     try:
         path = f"resumes/{file.filename}"
         # Using upsert to avoid errors during testing re-uploads
-        if supabase:
-            supabase.storage.from_("raw_resumes").upload(path, content, {"upsert": "true"})
-            public_url = supabase.storage.from_("raw_resumes").get_public_url(path)
+        if SUPABASE_URL:
+            bucket = (await get_db()).storage.from_("raw_resumes")
+            await bucket.upload(path, content, {"upsert": "true"})
+            public_url = await bucket.get_public_url(path)
     except Exception as e:
         logging.error(f"Storage upload failed: {e}")
 
@@ -42,7 +68,14 @@ async def analyze_resume_gaps(request: GapAnalysisRequest = Body(...)):
         raise HTTPException(400, "Job description is too short.")
 
     try:
-        analysis = analyze_gaps(request.resume_data, request.job_description)
+        analysis = await llm_cache.get_or_compute(
+            "analyze_gaps",
+            {"resume_data": request.resume_data, "job_description": request.job_description},
+            lambda: analyze_gaps(request.resume_data, request.job_description),
+            bypass=request.bypass_cache,
+            # analyze_gaps returns a zero-score placeholder instead of raising on AI failure
+            should_cache=lambda result: result.job_title_detected != "Unknown",
+        )
         return analysis
     except Exception as e:
         logging.error(f"Gap Analysis Error: {e}")
@@ -52,23 +85,87 @@ async def analyze_resume_gaps(request: GapAnalysisRequest = Body(...)):
 async def generate_tailored_resume_endpoint(
     resume_data: dict = Body(...),
     job_description: str = Body(...),
-    gap_answers: dict = Body(default=None)
+    gap_answers: dict = Body(default=None),
+    bypass_cache: bool = Body(default=False)
 ):
     try:
-        tailored_json = tailor_resume(resume_data, job_description, gap_answers)
+        tailored_json = await llm_cache.get_or_compute(
+            "tailor_resume",
+            {"resume_data": resume_data, "job_description": job_description, "gap_answers": gap_answers},
+            lambda: tailor_resume(resume_data, job_description, gap_answers),
+            bypass=bypass_cache,
+        )
         return tailored_json
     except Exception as e:
         logging.error(f"Generation Error: {e}")
         raise HTTPException(500, f"Generation failed: {e}")
 
+def _render_busy() -> HTTPException:
+    return HTTPException(503, "PDF renderer is busy. Please retry shortly.", headers={"Retry-After": "2"})
+
+# Browsers may keep rendered PDFs but must revalidate (cheap: a 304 from the ETag alone).
+PDF_CACHE_CONTROL = "private, no-cache"
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+async def _cached_pdf_response(request: Request, key: str, render) -> Response:
+    """
+    Makes sure the PDF for `key` is in the disk cache (rendering it with `render()` ->
+    (pdf_bytes, headers) if not), then redirects (303) to GET /pdf/{key}. Browsers can't
+    revalidate POST responses, but they cache that GET and revalidate it with If-None-Match.
+    If the cache can't be written, the freshly rendered PDF is returned directly.
+    """
+    status = "hit"
+    if not await run_blocking(pdf_cache.touch, key):
+        status = "miss"
+        pdf_bytes, headers = await render()
+        if not await run_blocking(pdf_cache.put, key, pdf_bytes, headers):
+            return Response(content=pdf_bytes, media_type="application/pdf", headers={**headers, "X-PDF-Cache": "miss"})
+
+    location = request.url_for("get_cached_pdf", key=key).path
+    return RedirectResponse(location, status_code=303, headers={"X-PDF-Cache": status})
+
+_PDF_KEY = re.compile(r"[0-9a-f]{64}")
+
+@router.get("/pdf/{key}", name="get_cached_pdf")
+async def get_cached_pdf(request: Request, key: str):
+    """
+    Serves a rendered PDF by its content key (see /render-pdf). The key hashes every render
+    input, so the ETag is valid without reading the cache: a matching If-None-Match is a 304.
+    """
+    if not _PDF_KEY.fullmatch(key):
+        raise HTTPException(404, "PDF not found.")
+    etag = f'"{key}"'
+    cache_headers = {"ETag": etag, "Cache-Control": PDF_CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    cached = await run_blocking(pdf_cache.get, key)
+    if not cached:
+        raise HTTPException(404, "PDF not found or evicted; render it again.")
+    pdf_bytes, headers = cached
+    return Response(content=pdf_bytes, media_type="application/pdf", headers={**headers, **cache_headers})
+
 @router.post("/render-pdf")
-async def render_pdf_endpoint(resume_data: dict = Body(...)):
+async def render_pdf_endpoint(request: Request, resume_data: dict = Body(...)):
     """
     Converts Resume JSON -> PDF (Auto-switching between Standard and Compact).
     """
+    async def render():
+        result = await run_render(render_resume, resume_data)
+        return result.pdf_bytes, {"X-Render-Template": result.template, "X-Render-Path": result.path}
+
     try:
-        pdf_bytes = render_resume_pdf(resume_data)
-        return Response(content=pdf_bytes, media_type="application/pdf")
+        return await _cached_pdf_response(request, pdf_cache.make_key("resume", resume_data), render)
+    except RenderPoolSaturated:
+        raise _render_busy()
+    except asyncio.TimeoutError:
+        raise HTTPException(504, "PDF rendering timed out.")
     except Exception as e:
         logging.error(f"PDF Rendering Error: {e}")
         raise HTTPException(500, f"Failed to render PDF: {e}")
@@ -79,23 +176,58 @@ async def generate_cover_letter_endpoint_builder(request: CoverLetterRequest = B
         raise HTTPException(400, "Job description is too short.")
         
     try:
-        letter_text = write_cover_letter(request.resume_data, request.job_description)
+        letter_text = await llm_cache.get_or_compute(
+            "write_cover_letter",
+            {"resume_data": request.resume_data, "job_description": request.job_description},
+            lambda: write_cover_letter(request.resume_data, request.job_description),
+            bypass=request.bypass_cache,
+        )
         return {"cover_letter_text": letter_text}
     except Exception as e:
         logging.error(f"Cover Letter Error: {e}")
         raise HTTPException(500, "Failed to generate cover letter.")
 
+@router.post("/generate-cover-letter/stream")
+async def stream_cover_letter_endpoint_builder(request: CoverLetterRequest = Body(...)):
+    """
+    Streaming /generate-cover-letter: server-sent `delta` events with the letter's text as it
+    is generated, then `done` whose `result` is the full text (cached like the non-streaming one).
+    """
+    if not request.job_description or len(request.job_description) < 50:
+        raise HTTPException(400, "Job description is too short.")
+
+    return StreamingResponse(
+        stream_cached(
+            "write_cover_letter",
+            {"resume_data": request.resume_data, "job_description": request.job_description},
+            lambda: stream_cover_letter(request.resume_data, request.job_description),
+            finalize=str.strip,
+            to_text=str,
+            bypass=request.bypass_cache,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
 @router.post("/render-cover-letter-pdf")
 async def render_cover_letter_pdf_endpoint(
+    request: Request,
     resume_data: dict = Body(...),
     cover_letter_text: str = Body(...)
 ):
     """
     Converts Cover Letter Text + Resume Header -> PDF.
     """
+    async def render():
+        return await run_render(render_cover_letter_pdf, resume_data, cover_letter_text), {}
+
     try:
-        pdf_bytes = render_cover_letter_pdf(resume_data, cover_letter_text)
-        return Response(content=pdf_bytes, media_type="application/pdf")
+        key = pdf_cache.make_key("cover_letter", resume_data, cover_letter_text)
+        return await _cached_pdf_response(request, key, render)
+    except RenderPoolSaturated:
+        raise _render_busy()
+    except asyncio.TimeoutError:
+        raise HTTPException(504, "Cover Letter PDF rendering timed out.")
     except Exception as e:
         logging.error(f"Cover Letter PDF Error: {e}")
         raise HTTPException(500, f"Failed to render Cover Letter PDF: {e}")
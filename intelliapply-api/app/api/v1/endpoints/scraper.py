@@ -1,8 +1,10 @@
-
 # app/api/v1/endpoints/scraper.py
 from fastapi import APIRouter, Depends, HTTPException, Request
 from app.core.security import get_current_user
 from app.schemas.jobs import ScrapeRequest
+from app.services.scraper import SCRAPE_PROGRESS_PREFIX, SCRAPE_PROGRESS_TTL_SECONDS
+from uuid import uuid4
+import json
 import logging
 
 router = APIRouter()
@@ -20,10 +22,35 @@ async def trigger_scrape(
         
     log.info(f"API: Received scrape request for: '{request.search_term}' from User {user_id}")
     
+    # Recorded before enqueueing so progress polls can tell a queued job from an unknown id.
+    job_id = uuid4().hex
+    queued = {"user_id": user_id, "state": "queued", "found": 0, "saved": 0, "timings": {}}
+    await redis.set(SCRAPE_PROGRESS_PREFIX + job_id, json.dumps(queued), ex=SCRAPE_PROGRESS_TTL_SECONDS)
     await redis.enqueue_job(
         "scrape_and_save", 
         request.model_dump(), 
         user_id, 
-        request.search_id
+        request.search_id,
+        _job_id=job_id,
     )
-    return {"status": "ok", "message": "Scrape-and-save job enqueued."}
+    return {"status": "ok", "message": "Scrape-and-save job enqueued.", "job_id": job_id}
+
+@router.get("/jobs/{job_id}")
+async def get_scrape_progress(
+    job_id: str,
+    req: Request,
+    user_id: str = Depends(get_current_user)
+):
+    """
+    Returns the scrape pipeline's progress: jobs found/saved so far and per-site timings.
+    `state` is queued, running, complete or failed (with `error`); unknown or expired ids are 404.
+    """
+    redis = getattr(req.app.state, "redis", None)
+    if not redis:
+        raise HTTPException(status_code=503, detail="Job queue (Redis) is not connected.")
+
+    raw = await redis.get(SCRAPE_PROGRESS_PREFIX + job_id)
+    progress = json.loads(raw) if raw else {}
+    if progress.pop("user_id", None) != user_id:
+        raise HTTPException(status_code=404, detail="Scrape job not found.")
+    return {"status": "ok", **progress}
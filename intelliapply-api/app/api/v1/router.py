@@ -1,10 +1,12 @@
 
 # app/api/v1/router.py
 from fastapi import APIRouter
-from app.api.v1.endpoints import jobs, ai, resume
+from app.api.v1.endpoints import jobs, ai, resume, scraper, profiles
 
 api_router = APIRouter()
 
 api_router.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
 api_router.include_router(ai.router, prefix="/ai", tags=["AI"])
 api_router.include_router(resume.router, prefix="/resume", tags=["Resume Builder"])
+api_router.include_router(scraper.router, prefix="/scraper", tags=["Scraper"])
+api_router.include_router(profiles.router, prefix="/profiles", tags=["Profiles"])
\ No newline at end of file
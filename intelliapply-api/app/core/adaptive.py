@@ -0,0 +1,243 @@
+# app/core/adaptive.py
+"""
+Overload protection for Gemini calls, on top of the shared quota in app.core.rate_limit.
+
+`AdaptiveLimiter` replaces a fixed in-flight cap with an AIMD one: the limit halves when a
+call is rejected (429/5xx) or recent latency climbs well above its long-run average, and
+grows back by about one per round of successful calls, between LLM_MIN_IN_FLIGHT and
+LLM_MAX_IN_FLIGHT. Latency is compared per calling service and per estimated token, so a
+few large batch prompts don't read as a slowdown of the small ones.
+
+`CircuitBreaker` watches the same signals across calls. Once most recent calls are being
+rejected it opens: background calls (arq jobs) fail fast with `CircuitOpenError` so the
+jobs can be deferred instead of retrying into the outage, while interactive calls still
+go through. After the cooldown, one background call at a time probes the service.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from app.core.config import (
+    LLM_MAX_IN_FLIGHT, LLM_MIN_IN_FLIGHT, LLM_LATENCY_TOLERANCE,
+    LLM_BREAKER_FAILURE_RATE, LLM_BREAKER_WINDOW, LLM_BREAKER_COOLDOWN_SECONDS,
+)
+from app.core.metrics import LLM_CONCURRENCY_LIMIT, LLM_IN_FLIGHT, LLM_CIRCUIT_STATE
+from app.core.rate_limit import INTERACTIVE
+
+log = logging.getLogger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Smoothing for the short- and long-run latency averages, and the samples needed before
+# latency is trusted as an overload signal.
+_FAST_ALPHA = 0.3
+_SLOW_ALPHA = 0.02
+_MIN_LATENCY_SAMPLES = 20
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Gemini while the breaker is open (not retried)."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Gemini circuit breaker is open; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class _LatencyBaseline:
+    """Short- and long-run averages of one service's latency per estimated token."""
+
+    def __init__(self):
+        self.fast: Optional[float] = None
+        self.slow: Optional[float] = None
+        self.samples = 0
+
+    def add(self, value: float) -> None:
+        if self.fast is None:
+            self.fast = self.slow = value
+        else:
+            self.fast += _FAST_ALPHA * (value - self.fast)
+            self.slow += _SLOW_ALPHA * (value - self.slow)
+        self.samples += 1
+
+    def degraded(self, tolerance: float) -> bool:
+        return self.samples >= _MIN_LATENCY_SAMPLES and self.fast > self.slow * tolerance
+
+class AdaptiveLimiter:
+    """
+    Per-event-loop cap on in-flight calls whose limit follows additive-increase /
+    multiplicative-decrease. Waiters are served in FIFO order.
+    """
+
+    def __init__(self, max_limit: int = LLM_MAX_IN_FLIGHT, min_limit: int = LLM_MIN_IN_FLIGHT,
+                 decrease_ratio: float = 0.5, latency_tolerance: float = LLM_LATENCY_TOLERANCE):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.decrease_ratio = decrease_ratio
+        self.latency_tolerance = latency_tolerance
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._baselines: Dict[str, _LatencyBaseline] = {}
+        # Calls started before the last decrease don't trigger another one: a burst of
+        # rejections from the same overloaded moment halves the limit once, not N times.
+        self._last_decrease = float("-inf")
+        self._publish()
+
+    def _publish(self) -> None:
+        LLM_CONCURRENCY_LIMIT.set(self.limit)
+        LLM_IN_FLIGHT.set(self.in_flight)
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+        self._publish()
+
+    async def acquire(self) -> float:
+        """Waits for a slot; returns the monotonic time the call may start (pass it back on completion)."""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self._publish()
+            return time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # the slot was granted just as we were cancelled
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+        return time.monotonic()
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def on_success(self, latency: Optional[float], started_at: float,
+                   service: str = "unknown", tokens: int = 1) -> None:
+        """
+        Grows the limit by 1/limit per success (about +1 per full round), unless latency says
+        otherwise. `latency` is compared against `service`'s own baseline per estimated token;
+        `latency=None` (streamed calls, whose duration isn't comparable) only grows it.
+        """
+        if latency is not None:
+            baseline = self._baselines.setdefault(service, _LatencyBaseline())
+            baseline.add(latency / max(tokens, 1))
+            if baseline.degraded(self.latency_tolerance):
+                self._decrease(
+                    started_at,
+                    f"{service} latency {baseline.fast * 1000:.2f}s vs {baseline.slow * 1000:.2f}s baseline per 1k tokens",
+                )
+                return
+        if self.limit < self.max_limit:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+            self._wake()
+
+    def on_overload(self, started_at: float) -> None:
+        """Cuts the limit after a 429/5xx."""
+        self._decrease(started_at, "Gemini rejected a call")
+
+    def _decrease(self, started_at: float, reason: str) -> None:
+        if started_at < self._last_decrease:
+            return
+        previous = self.limit
+        self.limit = max(float(self.min_limit), self.limit * self.decrease_ratio)
+        self._last_decrease = time.monotonic()
+        self._publish()
+        if int(self.limit) < int(previous):
+            log.warning(f"Gemini concurrency limit {int(previous)} -> {int(self.limit)} ({reason}).")
+
+class CircuitBreaker:
+    """
+    Opens when at least `failure_rate` of the last `window` calls were overloaded.
+    Only background calls are ever rejected; interactive ones always go through.
+    """
+
+    def __init__(self, failure_rate: float = LLM_BREAKER_FAILURE_RATE, window: int = LLM_BREAKER_WINDOW,
+                 cooldown: float = LLM_BREAKER_COOLDOWN_SECONDS):
+        self.failure_rate = failure_rate
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self._results: Deque[bool] = deque(maxlen=max(1, window))
+        self._open_until = 0.0
+        self._next_probe_at = 0.0
+        LLM_CIRCUIT_STATE.set(_STATE_VALUES[CLOSED])
+
+    @property
+    def enabled(self) -> bool:
+        return 0 < self.failure_rate <= 1
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == OPEN and time.monotonic() < self._open_until
+
+    def retry_after(self) -> float:
+        """Seconds until background calls may be tried again."""
+        if self.state == CLOSED:
+            return 0.0
+        return max(0.0, max(self._open_until, self._next_probe_at) - time.monotonic())
+
+    def rejects(self, priority: str) -> bool:
+        """
+        Whether `allow(priority)` would refuse a call right now (without taking the half-open
+        probe). Unlike `is_open`, this is also true while half-open and the probe is taken.
+        """
+        return priority != INTERACTIVE and self.state != CLOSED and self.retry_after() > 0
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            log.warning(f"Gemini circuit breaker {self.state} -> {state}.")
+        self.state = state
+        LLM_CIRCUIT_STATE.set(_STATE_VALUES[state])
+
+    def allow(self, priority: str) -> bool:
+        if priority == INTERACTIVE or self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now < self._open_until:
+                return False
+            self._set_state(HALF_OPEN)
+        # Half-open: let one background probe through per cooldown slice.
+        if now < self._next_probe_at:
+            return False
+        self._next_probe_at = now + min(self.cooldown, 5.0)
+        return True
+
+    def record(self, ok: bool, retry_after: Optional[float] = None) -> None:
+        """Records a call's outcome; `ok=False` only for overload errors (429/5xx/timeouts)."""
+        if not self.enabled:
+            return
+        if self.state == HALF_OPEN:
+            if ok:
+                self._results.clear()
+                self._set_state(CLOSED)
+            else:
+                self._open(retry_after)
+            return
+        if self.state == OPEN:
+            return
+        self._results.append(ok)
+        if len(self._results) == self._results.maxlen:
+            failures = self._results.count(False)
+            if failures >= self.failure_rate * len(self._results):
+                self._open(retry_after)
+
+    def _open(self, retry_after: Optional[float]) -> None:
+        self._open_until = time.monotonic() + max(self.cooldown, retry_after or 0.0)
+        self._next_probe_at = 0.0
+        self._results.clear()
+        self._set_state(OPEN)
+
+gemini_breaker = CircuitBreaker()
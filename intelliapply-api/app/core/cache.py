@@ -0,0 +1,209 @@
+# app/core/cache.py
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from app.core.config import GEMINI_MODEL_NAME, CREW_LLM_MODEL_NAME, LLM_CACHE_MAX_ENTRIES
+
+log = logging.getLogger(__name__)
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+@dataclass(frozen=True)
+class CachePolicy:
+    ttl_seconds: int
+    # Bump when the function's prompt changes so stale responses are never served.
+    prompt_version: str = "1"
+    # The model whose output is cached (part of the key); the direct Gemini model by default.
+    model: str = GEMINI_MODEL_NAME
+
+CACHE_POLICIES: dict[str, CachePolicy] = {
+    "get_gemini_analysis": CachePolicy(ttl_seconds=7 * DAY),
+    "get_interview_prep": CachePolicy(ttl_seconds=DAY),
+    "get_resume_suggestions": CachePolicy(ttl_seconds=DAY),
+    # Version 2: plain text instead of JSON mode, the prompt its streaming variant also uses.
+    "get_cover_letter": CachePolicy(ttl_seconds=DAY, prompt_version="2"),
+    "tailor_resume": CachePolicy(ttl_seconds=DAY),
+    "write_cover_letter": CachePolicy(ttl_seconds=DAY),
+    "analyze_gaps": CachePolicy(ttl_seconds=DAY),
+    # Resume ingest is cached in two stages keyed by the PDF's hash: the extracted text
+    # (no prompt involved) and the parsed JSON, so a prompt bump only re-runs the LLM.
+    "extract_resume_text": CachePolicy(ttl_seconds=30 * DAY),
+    "parse_resume_to_json": CachePolicy(ttl_seconds=30 * DAY),
+    # The optimized-resume crew's analysis stages, keyed by the resume text / job description
+    # alone so other profiles and jobs reuse them (see app.services.ai_crew).
+    "crew_resume_analysis": CachePolicy(ttl_seconds=30 * DAY, model=CREW_LLM_MODEL_NAME),
+    "crew_job_analysis": CachePolicy(ttl_seconds=7 * DAY, model=CREW_LLM_MODEL_NAME),
+}
+DEFAULT_POLICY = CachePolicy(ttl_seconds=HOUR)
+
+KEY_PREFIX = "llm_cache:"
+LRU_KEY = "llm_cache:lru"
+STATS_KEY = "llm_cache:stats"
+# Last-access score the incremental prune (see LLMCache._prune_expired) continues from.
+PRUNE_CURSOR_KEY = "llm_cache:prune_cursor"
+PRUNE_BATCH = 500
+
+# One round trip per lookup: GET, then on a hit refresh the entry's LRU time, on a miss drop
+# it from the LRU set (it may have expired by TTL), and count the hit/miss.
+_GET_SCRIPT = """
+local raw = redis.call('GET', KEYS[1])
+if raw then
+    redis.call('ZADD', KEYS[2], 'XX', ARGV[1], KEYS[1])
+    redis.call('HINCRBY', KEYS[3], ARGV[2] .. ':hits', 1)
+else
+    redis.call('ZREM', KEYS[2], KEYS[1])
+    redis.call('HINCRBY', KEYS[3], ARGV[2] .. ':misses', 1)
+end
+return raw
+"""
+
+def _normalize(value: Any) -> Any:
+    """Canonicalizes inputs so trivially different requests share a cache entry."""
+    if isinstance(value, bytes):
+        return {"sha256": hashlib.sha256(value).hexdigest()}
+    if isinstance(value, str):
+        return value.replace("\r\n", "\n").strip()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if hasattr(value, "model_dump"):
+        return _normalize(value.model_dump())
+    return value
+
+def _to_jsonable(value: Any) -> Any:
+    return value.model_dump() if hasattr(value, "model_dump") else value
+
+class LLMCache:
+    """
+    Content-addressed cache for LLM responses, shared by the API and the worker through Redis.
+
+    Keys hash (function, model, prompt version, normalized inputs). Entries expire per the
+    function's TTL, and the cache is capped at LLM_CACHE_MAX_ENTRIES using a sorted set of
+    last-access times (least recently used entries are evicted first).
+    """
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.redis = None
+        self._get_script = None
+
+    def bind(self, redis) -> None:
+        """Attaches the process's Redis connection (the arq pool in both the API and the worker)."""
+        self.redis = redis
+        self._get_script = redis.register_script(_GET_SCRIPT)
+
+    @staticmethod
+    def make_key(func_name: str, inputs: dict) -> str:
+        policy = CACHE_POLICIES.get(func_name, DEFAULT_POLICY)
+        payload = json.dumps(
+            {"f": func_name, "m": policy.model, "v": policy.prompt_version, "i": _normalize(inputs)},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return KEY_PREFIX + func_name + ":" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, func_name: str, inputs: dict) -> Optional[Any]:
+        if not self.redis:
+            return None
+        key = self.make_key(func_name, inputs)
+        try:
+            raw = await self._get_script(keys=[key, LRU_KEY, STATS_KEY], args=[time.time(), func_name])
+            return json.loads(raw) if raw is not None else None
+        except Exception as e:
+            log.warning(f"LLM cache read failed for {func_name}: {e}")
+            return None
+
+    async def set(self, func_name: str, inputs: dict, value: Any) -> None:
+        if not self.redis:
+            return
+        key = self.make_key(func_name, inputs)
+        policy = CACHE_POLICIES.get(func_name, DEFAULT_POLICY)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(key, json.dumps(_to_jsonable(value)), ex=policy.ttl_seconds)
+            pipe.zadd(LRU_KEY, {key: time.time()})
+            pipe.zcard(LRU_KEY)
+            _, _, size = await pipe.execute()
+            if size > self.max_entries:
+                await self._evict(size - self.max_entries)
+        except Exception as e:
+            log.warning(f"LLM cache write failed for {func_name}: {e}")
+
+    async def _evict(self, count: int) -> None:
+        evicted = await self.redis.zpopmin(LRU_KEY, count)
+        keys = [k for k, _ in evicted]
+        if keys:
+            # Keys that already expired by TTL were only being tracked; don't count them.
+            deleted = await self.redis.delete(*keys)
+            if deleted:
+                await self.redis.hincrby(STATS_KEY, "evictions", deleted)
+                log.info(f"LLM cache evicted {deleted} least recently used entries.")
+
+    async def _prune_expired(self, batch: int = PRUNE_BATCH) -> None:
+        """
+        Drops up to `batch` LRU entries whose keys have expired by TTL (misses drop them one
+        at a time too). Each call checks the next `batch` members by last access, wrapping
+        around, so the whole set is covered over successive calls at a bounded cost per call.
+        """
+        cursor = await self.redis.get(PRUNE_CURSOR_KEY)
+        start = f"({float(cursor)}" if cursor is not None else "-inf"
+        members = await self.redis.zrangebyscore(LRU_KEY, start, "+inf", start=0, num=batch, withscores=True)
+        if not members:
+            await self.redis.delete(PRUNE_CURSOR_KEY)
+            return
+
+        pipe = self.redis.pipeline(transaction=False)
+        for member, _ in members:
+            pipe.exists(member)
+        expired = [member for (member, _), exists in zip(members, await pipe.execute()) if not exists]
+        if expired:
+            await self.redis.zrem(LRU_KEY, *expired)
+        if len(members) < batch:
+            await self.redis.delete(PRUNE_CURSOR_KEY)  # reached the end: start over next time
+        else:
+            await self.redis.set(PRUNE_CURSOR_KEY, members[-1][1])
+
+    async def get_or_compute(
+        self,
+        func_name: str,
+        inputs: dict,
+        compute: Callable[[], Awaitable[Any]],
+        bypass: bool = False,
+        should_cache: Callable[[Any], bool] = bool,
+    ) -> Any:
+        """
+        Returns the cached response for (func_name, inputs) or awaits `compute()` and stores it.
+        `bypass=True` skips the lookup but still refreshes the entry. Results rejected by
+        `should_cache` (by default: empty/None results) are not stored.
+        """
+        if not bypass:
+            cached = await self.get(func_name, inputs)
+            if cached is not None:
+                log.info(f"LLM cache hit: {func_name}")
+                return cached
+
+        result = await compute()
+        if should_cache(result):
+            await self.set(func_name, inputs, result)
+        return result
+
+    async def stats(self) -> dict:
+        """
+        Hit/miss/eviction counters per function, plus the entry count. The count includes
+        entries expired by TTL that no miss or prune pass has dropped yet.
+        """
+        if not self.redis:
+            return {}
+        await self._prune_expired()
+        raw = await self.redis.hgetall(STATS_KEY)
+        stats = {(k.decode() if isinstance(k, bytes) else k): int(v) for k, v in raw.items()}
+        stats["entries"] = await self.redis.zcard(LRU_KEY)
+        return stats
+
+llm_cache = LLMCache()
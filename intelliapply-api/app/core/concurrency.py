@@ -0,0 +1,31 @@
+# app/core/concurrency.py
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from app.core.config import BLOCKING_IO_THREADS
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Dedicated pool so blocking I/O never competes with asyncio's default executor
+# (which asyncio.to_thread and the CrewAI runs already use).
+_io_executor = ThreadPoolExecutor(
+    max_workers=BLOCKING_IO_THREADS,
+    thread_name_prefix="blocking-io",
+)
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Runs a synchronous callable on the blocking-I/O pool and awaits its result.
+    Use this for sync SDK calls (e.g. `query.execute`) inside `async def` code.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_executor, functools.partial(func, *args, **kwargs))
+
+def shutdown_blocking_pool() -> None:
+    log.info("Shutting down blocking I/O pool...")
+    _io_executor.shutdown(wait=False, cancel_futures=True)
@@ -3,7 +3,6 @@
 import os
 from dotenv import load_dotenv
 import logging
-from typing import Any, List, Optional
 
 # Set up logging FIRST
 logging.basicConfig(level=logging.INFO)
@@ -12,7 +11,89 @@ log = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Debug mode: verbose CrewAI output (every agent's prompts and reasoning) in the logs.
+DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_MODEL_NAME = "models/gemini-2.5-flash"
+# LiteLLM model id the CrewAI resume crew runs on.
+CREW_LLM_MODEL_NAME = "gemini/gemini-2.5-flash"
+
+# --- Concurrency Limits ---
+# How many arq jobs a single worker process runs at once.
+WORKER_MAX_JOBS = int(os.getenv("WORKER_MAX_JOBS", "50"))
+# How many Gemini calls a single process keeps in flight at once (the adaptive limit's ceiling).
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "32"))
+# Threads reserved for blocking I/O (sync Supabase client etc.) off the event loop.
+BLOCKING_IO_THREADS = int(os.getenv("BLOCKING_IO_THREADS", "16"))
+# Job-board scrapes a worker process runs at once (one thread each, across all scrape jobs).
+# Boards beyond this wait for a thread; their timeout only starts once they run.
+SCRAPE_MAX_THREADS = int(os.getenv("SCRAPE_MAX_THREADS", "12"))
+
+# --- Gemini Adaptive Concurrency / Circuit Breaker ---
+# The in-flight limit halves on 429/5xx (and shrinks when latency climbs), then grows back by
+# about one per round of successful calls, never below this floor.
+LLM_MIN_IN_FLIGHT = int(os.getenv("LLM_MIN_IN_FLIGHT", "2"))
+# Recent latency above this multiple of the long-run average counts as overload.
+LLM_LATENCY_TOLERANCE = float(os.getenv("LLM_LATENCY_TOLERANCE", "2.0"))
+# The breaker opens when this share of the last LLM_BREAKER_WINDOW calls were overloaded;
+# while open (for at least LLM_BREAKER_COOLDOWN_SECONDS) background calls fail fast.
+LLM_BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+
+# --- LLM Retries ---
+# Transient Gemini errors (429/5xx) are retried with jittered exponential backoff,
+# never past the per-request deadline.
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "4"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "30"))
+LLM_REQUEST_DEADLINE_SECONDS = float(os.getenv("LLM_REQUEST_DEADLINE_SECONDS", "90"))
+
+# --- Gemini Rate Limit (token buckets in Redis, shared by every API process and worker) ---
+# The project's quota for the model; set either to 0 to disable the limiter.
+GEMINI_RPM_LIMIT = int(os.getenv("GEMINI_RPM_LIMIT", "1000"))
+GEMINI_TPM_LIMIT = int(os.getenv("GEMINI_TPM_LIMIT", "1000000"))
+# Share of each bucket only interactive (API) calls may use; background jobs wait above it.
+GEMINI_INTERACTIVE_RESERVE = float(os.getenv("GEMINI_INTERACTIVE_RESERVE", "0.2"))
+# Output tokens charged up front per call; the difference is settled from the reported usage.
+GEMINI_EXPECTED_OUTPUT_TOKENS = int(os.getenv("GEMINI_EXPECTED_OUTPUT_TOKENS", "1024"))
+
+# --- Batch Rating ---
+# Job descriptions packed into one rating call, bounded by an (approximate) token budget.
+BATCH_RATING_TOKEN_BUDGET = int(os.getenv("BATCH_RATING_TOKEN_BUDGET", "24000"))
+BATCH_RATING_MAX_JOBS = int(os.getenv("BATCH_RATING_MAX_JOBS", "15"))
+# Job IDs carried by one queued bulk-analysis job (the worker re-packs them by token budget).
+BULK_ANALYZE_CHUNK_SIZE = int(os.getenv("BULK_ANALYZE_CHUNK_SIZE", "60"))
+
+# --- Resume Crew Tasks (async mode of the optimized-resume endpoints) ---
+# arq timeout for one crew run (three sequential agents, often several minutes).
+CREW_JOB_TIMEOUT_SECONDS = int(os.getenv("CREW_JOB_TIMEOUT_SECONDS", "900"))
+# How long a task's status, stage events and result stay fetchable in Redis.
+CREW_TASK_TTL_SECONDS = int(os.getenv("CREW_TASK_TTL_SECONDS", "86400"))
+
+# --- LLM Response Cache ---
+# Upper bound on cached LLM responses in Redis (least recently used entries are evicted first).
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+# --- PDF Renderer (Jinja templates) ---
+# Dev mode: re-check template files on every render so edits show up without a restart.
+TEMPLATE_AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD", "false").lower() == "true"
+# Compiled template bytecode is cached on disk so new processes skip recompiling. Unset, Jinja
+# picks a private per-user directory; if set, it must not be writable by other users.
+TEMPLATE_BYTECODE_CACHE_DIR = os.getenv("TEMPLATE_BYTECODE_CACHE_DIR")
+# Renders run in a pool of child processes so xhtml2pdf never blocks the event loop.
+RENDER_POOL_WORKERS = int(os.getenv("RENDER_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Renders queued or running at once before /render-* endpoints answer 503.
+RENDER_QUEUE_LIMIT = int(os.getenv("RENDER_QUEUE_LIMIT", str(RENDER_POOL_WORKERS * 4)))
+RENDER_TIMEOUT_SECONDS = float(os.getenv("RENDER_TIMEOUT_SECONDS", "30"))
+# Rendered PDFs are cached on disk (shared by API processes), least recently used evicted first.
+# The directory is created with mode 0700 and must belong to the user the API runs as.
+PDF_CACHE_DIR = os.getenv(
+    "PDF_CACHE_DIR",
+    os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "intelliapply", "pdf"),
+)
+PDF_CACHE_MAX_MB = int(os.getenv("PDF_CACHE_MAX_MB", "256"))
 
 if not GEMINI_API_KEY:
     # Use warning instead of raise to allow CI/Test execution without real keys
@@ -22,91 +103,28 @@ else:
     os.environ['GOOGLE_API_KEY'] = GEMINI_API_KEY
     log.info("✅ GOOGLE_API_KEY set from GEMINI_API_KEY")
 
-# Import after setting env vars
-import google.generativeai as genai
-from supabase import create_client, Client
-from pydantic import Field
-try:
-    from langchain_core.language_models.llms import LLM
-    from langchain_core.callbacks.manager import CallbackManagerForLLMRun
-    import litellm
-except ImportError:
-    log.error("Failed to import langchain/litellm dependencies. AI features may fail.")
-    LLM = object # Mock
-
-# Configure LiteLLM to suppress verbose logs
-try:
-    litellm.suppress_debug_info = True
-except:
-    pass
-
-# --- Custom LLM Wrapper for CrewAI ---
-class GeminiLLM(LLM):
-    """Custom LLM wrapper using LiteLLM for Gemini"""
-    
-    model: str = Field(default="gemini/gemini-2.5-flash")
-    temperature: float = Field(default=0.7)
-    max_tokens: int = Field(default=4096)
-    
-    @property
-    def _llm_type(self) -> str:
-        return "gemini"
-    
-    def _call(
-        self,
-        prompt: str,
-        stop: Optional[List[str]] = None,
-        run_manager: Optional[CallbackManagerForLLMRun] = None,
-        **kwargs: Any,
-    ) -> str:
-        """Call the Gemini API via LiteLLM"""
-        try:
-            response = litellm.completion(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                **kwargs
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            raise ValueError(f"LiteLLM call failed: {e}")
-
-# Initialize Supabase
+# Supabase
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-supabase: Optional[Client] = None
-if not SUPABASE_URL or not SUPABASE_KEY:
-    log.warning("⚠️ SUPABASE_URL or SUPABASE_KEY not found. Database features will fail.")
-else:
-    try:
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-        log.info("✅ Supabase client initialized")
-    except Exception as e:
-        log.error(f"❌ Failed to initialize Supabase: {e}")
-
-# Configure google-generativeai (direct SDK - for non-CrewAI usage)
-gemini_model = None
-if GEMINI_API_KEY:
-    try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        gemini_model = genai.GenerativeModel('models/gemini-2.5-flash')
-        log.info("✅ Gemini SDK client initialized: models/gemini-2.5-flash")
-    except Exception as e:
-        log.error(f"Failed to init Gemini SDK: {e}")
-
-# Configure custom LLM for CrewAI using LiteLLM
-crew_llm = None
-try:
-    crew_llm = GeminiLLM(
-        model="gemini/gemini-2.5-flash",
-        temperature=0.7,
-        max_tokens=4096
-    )
-    log.info("✅ CrewAI LLM initialized with LiteLLM: gemini/gemini-2.5-flash")
-except Exception as e:
-    log.error(f"Failed to init CrewAI LLM: {e}")
+# --- Auth (local JWT verification) ---
+# HS256 projects: the JWT secret from Supabase > Settings > API. Asymmetric-key projects use JWKS instead.
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+# Fall back to a remote `auth.get_user` round trip when a token can't be verified locally.
+AUTH_REMOTE_FALLBACK = os.getenv("AUTH_REMOTE_FALLBACK", "false").lower() == "true"
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+
+# --- Async DB client pool (keep-alive connections to Supabase's REST API) ---
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "50"))
+DB_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("DB_MAX_KEEPALIVE_CONNECTIONS", "20"))
+# Profile rows are cached per (profile_id, user_id) for this long, or until invalidated.
+PROFILE_CACHE_TTL_SECONDS = int(os.getenv("PROFILE_CACHE_TTL_SECONDS", "60"))
+
+# --- Metrics (Prometheus) ---
+# The API serves GET /metrics; the arq worker has no HTTP server, so it exposes its own (0 disables).
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9101"))
 
 def is_ready():
-    return supabase is not None and gemini_model is not None and crew_llm is not None
+    """True when the AI and DB credentials are configured (clients are created lazily, see app.core.services)."""
+    return bool(SUPABASE_URL and SUPABASE_KEY and GEMINI_API_KEY)
@@ -0,0 +1,54 @@
+# app/core/crew_llm.py
+# Imported lazily (see app.core.services.get_crew_llm): crewai and litellm are slow to import.
+import logging
+from typing import Any, List, Optional
+
+import litellm
+from crewai import BaseLLM
+
+from app.core.rate_limit import gemini_limiter, estimate_tokens
+
+log = logging.getLogger(__name__)
+
+# Configure LiteLLM to suppress verbose logs
+litellm.suppress_debug_info = True
+
+# --- Custom LLM for CrewAI ---
+class GeminiLLM(BaseLLM):
+    """
+    CrewAI LLM calling Gemini through LiteLLM. Being a CrewAI `BaseLLM`, crews call it
+    directly (other LLM objects are rebuilt by CrewAI from their model name), so every
+    crew call goes through `_call` and the shared Gemini rate limiter.
+    """
+
+    def __init__(self, model: str, temperature: Optional[float] = None, max_tokens: Optional[int] = None, **kwargs: Any):
+        super().__init__(model=model, temperature=temperature, **kwargs)
+        # Set explicitly: not every CrewAI release's BaseLLM keeps max_tokens, and `_call` needs it.
+        self.max_tokens = max_tokens
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None) -> str:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        return self._call(messages, stop=self.stop or None)
+
+    def _call(self, messages: List[dict], stop: Optional[List[str]] = None, **kwargs: Any) -> str:
+        """Call the Gemini API via LiteLLM, within the shared RPM/TPM quota."""
+        tokens = estimate_tokens(messages, self.max_tokens)
+        # Crews run in a worker thread; the limiter's Redis calls run on the app's event loop.
+        gemini_limiter.acquire_sync(tokens)
+        try:
+            response = litellm.completion(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                stop=stop,
+                **kwargs
+            )
+        except Exception as e:
+            raise ValueError(f"LiteLLM call failed: {e}")
+
+        usage = getattr(response, "usage", None)
+        gemini_limiter.settle_sync(tokens, getattr(usage, "total_tokens", None))
+        return response.choices[0].message.content
@@ -0,0 +1,148 @@
+# app/core/llm.py
+import asyncio
+import logging
+import time
+import weakref
+from typing import Any, AsyncIterator, Optional
+
+from app.core.adaptive import AdaptiveLimiter, CircuitOpenError, gemini_breaker
+from app.core.services import get_gemini_model
+from app.core.retry import RETRYABLE_ERRORS, retry_after_hint, retry_async
+from app.core.metrics import (
+    LLM_CALL_SECONDS, LLM_ERRORS, LLM_CIRCUIT_REJECTIONS, LLM_FIRST_CHUNK_SECONDS,
+    current_llm_service, record_llm_usage,
+)
+from app.core.rate_limit import gemini_limiter, current_llm_priority, estimate_tokens, reported_tokens
+from google.api_core import exceptions
+
+log = logging.getLogger(__name__)
+
+# One limiter per event loop (asyncio futures are bound to the loop they were created on).
+_in_flight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AdaptiveLimiter]" = weakref.WeakKeyDictionary()
+
+def _llm_slot() -> AdaptiveLimiter:
+    loop = asyncio.get_running_loop()
+    limiter = _in_flight.get(loop)
+    if limiter is None:
+        limiter = AdaptiveLimiter()
+        _in_flight[loop] = limiter
+    return limiter
+
+def _max_output_tokens(kwargs: dict) -> Optional[int]:
+    config = kwargs.get("generation_config")
+    if isinstance(config, dict):
+        return config.get("max_output_tokens")
+    return getattr(config, "max_output_tokens", None)
+
+async def _admit(tokens: int) -> None:
+    """Checks the circuit breaker, then waits for the call's share of the shared quota."""
+    priority = current_llm_priority.get()
+    if not gemini_breaker.allow(priority):
+        LLM_CIRCUIT_REJECTIONS.labels(priority=priority).inc()
+        raise CircuitOpenError(gemini_breaker.retry_after())
+    await gemini_limiter.acquire(tokens)
+
+def _record_failure(slot: AdaptiveLimiter, started_at: float, service: str, error: Exception) -> None:
+    if isinstance(error, RETRYABLE_ERRORS):
+        slot.on_overload(started_at)
+        gemini_breaker.record(False, retry_after_hint(error))
+    rate_limited = isinstance(error, (exceptions.ResourceExhausted, exceptions.TooManyRequests))
+    LLM_ERRORS.labels(service=service, kind="rate_limited" if rate_limited else "error").inc()
+
+async def generate_content(prompt: str, deadline: Optional[float] = None, **kwargs: Any):
+    """
+    Async, non-blocking wrapper around `gemini_model.generate_content`.
+    Every attempt first takes its share of the global RPM/TPM quota (app.core.rate_limit),
+    then waits for a slot under the process's adaptive in-flight limit (app.core.adaptive),
+    which shrinks on 429/5xx or rising latency and grows back as calls succeed.
+    While the circuit breaker is open, background calls raise CircuitOpenError at once.
+    Transient errors are retried per app.core.retry (the slot is released while backing off);
+    `deadline` caps the total time in seconds, defaulting to LLM_REQUEST_DEADLINE_SECONDS.
+    Latency, tokens and errors are recorded per calling service (see metrics.llm_service).
+    """
+    model = get_gemini_model()
+    if not model:
+        raise RuntimeError("Gemini client not initialized.")
+    service = current_llm_service.get()
+    tokens = estimate_tokens(prompt, _max_output_tokens(kwargs))
+
+    async def attempt():
+        await _admit(tokens)
+        slot = _llm_slot()
+        started_at = await slot.acquire()
+        try:
+            response = await model.generate_content_async(prompt, **kwargs)
+        except Exception as e:
+            _record_failure(slot, started_at, service, e)
+            raise
+        finally:
+            slot.release()
+        slot.on_success(time.monotonic() - started_at, started_at, service, tokens)
+        gemini_breaker.record(True)
+        return response
+
+    start = time.perf_counter()
+    try:
+        response = await retry_async(attempt, deadline=deadline, label=f"Gemini call ({service})")
+    except BaseException:
+        LLM_CALL_SECONDS.labels(service=service, outcome="error").observe(time.perf_counter() - start)
+        raise
+    LLM_CALL_SECONDS.labels(service=service, outcome="ok").observe(time.perf_counter() - start)
+    record_llm_usage(service, response)
+    await gemini_limiter.settle(tokens, reported_tokens(response))
+    return response
+
+async def stream_content(prompt: str, deadline: Optional[float] = None, **kwargs: Any) -> AsyncIterator[str]:
+    """
+    Streaming variant of `generate_content`: yields the response text as Gemini produces it.
+    Admission (breaker, shared quota, adaptive slot) is the same, and the slot is held until
+    the stream ends. Only opening the stream is retried (the SDK awaits the first chunk
+    there, so 429s surface before anything is yielded); a failure mid-stream is raised.
+    """
+    model = get_gemini_model()
+    if not model:
+        raise RuntimeError("Gemini client not initialized.")
+    service = current_llm_service.get()
+    tokens = estimate_tokens(prompt, _max_output_tokens(kwargs))
+    slot = _llm_slot()
+
+    async def attempt():
+        await _admit(tokens)
+        started_at = await slot.acquire()
+        try:
+            return started_at, await model.generate_content_async(prompt, stream=True, **kwargs)
+        except BaseException as e:
+            if isinstance(e, Exception):
+                _record_failure(slot, started_at, service, e)
+            slot.release()
+            raise
+
+    start = time.perf_counter()
+    try:
+        started_at, response = await retry_async(attempt, deadline=deadline, label=f"Gemini stream ({service})")
+    except BaseException:
+        LLM_CALL_SECONDS.labels(service=service, outcome="error").observe(time.perf_counter() - start)
+        raise
+    LLM_FIRST_CHUNK_SECONDS.labels(service=service).observe(time.perf_counter() - start)
+
+    outcome = "error"
+    try:
+        async for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                continue  # a chunk without text parts (e.g. only safety ratings)
+            if text:
+                yield text
+        outcome = "ok"
+    except Exception as e:
+        _record_failure(slot, started_at, service, e)
+        raise
+    finally:
+        slot.release()
+        LLM_CALL_SECONDS.labels(service=service, outcome=outcome).observe(time.perf_counter() - start)
+
+    slot.on_success(None, started_at)
+    gemini_breaker.record(True)
+    record_llm_usage(service, response)
+    await gemini_limiter.settle(tokens, reported_tokens(response))
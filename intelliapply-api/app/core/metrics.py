@@ -0,0 +1,202 @@
+# app/core/metrics.py
+"""
+Prometheus metrics for the hot paths (HTTP routes, Gemini calls, Supabase queries, arq jobs,
+PDF rendering and resume parsing).
+
+Recording is an in-memory counter/histogram update; nothing is formatted until /metrics is
+scraped. With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR so /metrics aggregates
+all processes.
+"""
+import contextvars
+import functools
+import inspect
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from arq import Retry
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+
+# Buckets (seconds) sized for each path: fast API/DB calls vs. multi-second LLM/render work.
+FAST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120, 300)
+
+# --- HTTP ---
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "API request latency by route template.",
+    ["method", "route", "status"], buckets=FAST_BUCKETS + (30, 60),
+)
+
+# --- Gemini ---
+LLM_CALL_SECONDS = Histogram(
+    "llm_call_duration_seconds", "Gemini call latency (all retries included) by calling service.",
+    ["service", "outcome"], buckets=SLOW_BUCKETS,
+)
+LLM_TOKENS = Counter("llm_tokens_total", "Gemini tokens by calling service.", ["service", "kind"])
+LLM_ERRORS = Counter(
+    "llm_errors_total", "Failed Gemini attempts by calling service (kind: rate_limited | error).",
+    ["service", "kind"],
+)
+LLM_RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "llm_rate_limit_wait_seconds", "Time Gemini calls spent waiting on the shared rate limiter.",
+    ["priority"], buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60),
+)
+LLM_FIRST_CHUNK_SECONDS = Histogram(
+    "llm_first_chunk_seconds", "Time from a streamed Gemini call's start to its first chunk.",
+    ["service"], buckets=FAST_BUCKETS,
+)
+LLM_CONCURRENCY_LIMIT = Gauge("llm_concurrency_limit", "Current adaptive limit on in-flight Gemini calls.")
+LLM_IN_FLIGHT = Gauge("llm_in_flight", "Gemini calls currently in flight.")
+LLM_CIRCUIT_STATE = Gauge("llm_circuit_state", "Gemini circuit breaker state (0 closed, 1 half-open, 2 open).")
+LLM_CIRCUIT_REJECTIONS = Counter(
+    "llm_circuit_rejections_total", "Gemini calls failed fast by the open circuit breaker.", ["priority"],
+)
+
+# --- Supabase ---
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Supabase (PostgREST) query latency.", ["table", "operation"], buckets=FAST_BUCKETS,
+)
+
+# --- arq ---
+QUEUE_DEPTH = Gauge("arq_queue_depth", "Jobs waiting in the arq queue (sampled when /metrics is scraped).")
+JOB_WAIT_SECONDS = Histogram(
+    "arq_job_wait_seconds", "Time from enqueue (or scheduled time) to start.", ["function"], buckets=SLOW_BUCKETS,
+)
+JOB_RUN_SECONDS = Histogram("arq_job_run_seconds", "Job run time.", ["function", "outcome"], buckets=SLOW_BUCKETS)
+JOBS_IN_PROGRESS = Gauge("arq_jobs_in_progress", "Jobs currently running in this worker.", ["function"])
+
+# --- Renderer / parser ---
+RENDER_SECONDS = Histogram(
+    "pdf_render_duration_seconds",
+    "PDF render latency as seen by the API, pool wait included (outcome: ok | error | timeout | rejected).",
+    ["function", "outcome"], buckets=FAST_BUCKETS + (30,),
+)
+PARSE_SECONDS = Histogram(
+    "resume_parse_duration_seconds", "Resume parsing latency by stage.", ["stage", "outcome"], buckets=SLOW_BUCKETS,
+)
+
+# Name of the service function whose Gemini calls are being made (see `llm_service`).
+current_llm_service: contextvars.ContextVar[str] = contextvars.ContextVar("current_llm_service", default="unknown")
+
+def _outcome(exc: Optional[BaseException]) -> str:
+    return "ok" if exc is None else "error"
+
+def timed(histogram: Histogram, **labels: str) -> Callable:
+    """
+    Decorator recording a (sync or async) function's duration in `histogram`, with an
+    `outcome` label of ok/error.
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                start, exc = time.perf_counter(), None
+                try:
+                    return await func(*args, **kwargs)
+                except BaseException as e:
+                    exc = e
+                    raise
+                finally:
+                    histogram.labels(**labels, outcome=_outcome(exc)).observe(time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start, exc = time.perf_counter(), None
+            try:
+                return func(*args, **kwargs)
+            except BaseException as e:
+                exc = e
+                raise
+            finally:
+                histogram.labels(**labels, outcome=_outcome(exc)).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def llm_service(name: Optional[str] = None) -> Callable:
+    """
+    Decorator labelling the Gemini calls made inside an async service function (or async
+    generator, e.g. a streaming one) with its name.
+    """
+    def decorator(func: Callable) -> Callable:
+        service = name or func.__name__
+
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def gen_wrapper(*args: Any, **kwargs: Any) -> Any:
+                # Set only while the generator runs, not while the consumer handles each item.
+                agen = func(*args, **kwargs)
+                try:
+                    while True:
+                        token = current_llm_service.set(service)
+                        try:
+                            item = await agen.__anext__()
+                        except StopAsyncIteration:
+                            return
+                        finally:
+                            current_llm_service.reset(token)
+                        yield item
+                finally:
+                    await agen.aclose()
+            return gen_wrapper
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            token = current_llm_service.set(service)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                current_llm_service.reset(token)
+        return wrapper
+    return decorator
+
+def record_llm_usage(service: str, response: Any) -> None:
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    for kind, attr in (("prompt", "prompt_token_count"), ("completion", "candidates_token_count")):
+        count = getattr(usage, attr, None)
+        if count:
+            LLM_TOKENS.labels(service=service, kind=kind).inc(count)
+
+def track_job(func: Callable) -> Callable:
+    """Decorator for arq job functions: queue wait time, run time (outcome ok/error/deferred) and in-progress count."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(ctx: dict, *args: Any, **kwargs: Any) -> Any:
+        # `score` is when the job became runnable (ms); equals enqueue time unless deferred.
+        ready_ms = ctx.get("score")
+        if ready_ms is None and isinstance(ctx.get("enqueue_time"), datetime):
+            ready_ms = ctx["enqueue_time"].timestamp() * 1000
+        if ready_ms:
+            JOB_WAIT_SECONDS.labels(function=name).observe(
+                max(0.0, datetime.now(timezone.utc).timestamp() - ready_ms / 1000)
+            )
+
+        in_progress = JOBS_IN_PROGRESS.labels(function=name)
+        in_progress.inc()
+        start, exc = time.perf_counter(), None
+        try:
+            return await func(ctx, *args, **kwargs)
+        except BaseException as e:
+            exc = e
+            raise
+        finally:
+            in_progress.dec()
+            outcome = "deferred" if isinstance(exc, Retry) else _outcome(exc)
+            JOB_RUN_SECONDS.labels(function=name, outcome=outcome).observe(time.perf_counter() - start)
+    return wrapper
+
+def render_latest() -> tuple[bytes, str]:
+    """The Prometheus text exposition for this process (or all processes in multiprocess mode)."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
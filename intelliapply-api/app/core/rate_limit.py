@@ -0,0 +1,188 @@
+# app/core/rate_limit.py
+"""
+Global Gemini rate limiter: token buckets for requests per minute and tokens per minute,
+kept in Redis so every API process and arq worker draws from the same quota.
+
+Calls are either interactive (a user is waiting on an API response; the default) or
+background (arq jobs, see `llm_priority`). Background calls must leave
+GEMINI_INTERACTIVE_RESERVE of each bucket untouched, so a bulk run slows down before
+it can starve interactive requests into 429s.
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import random
+import time
+from typing import Any, Callable, Optional
+
+from app.core.config import (
+    GEMINI_RPM_LIMIT, GEMINI_TPM_LIMIT, GEMINI_INTERACTIVE_RESERVE, GEMINI_EXPECTED_OUTPUT_TOKENS,
+)
+from app.core.metrics import LLM_RATE_LIMIT_WAIT_SECONDS
+
+log = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+BUCKET_KEY = "ratelimit:gemini"
+# Longest single sleep before re-checking the bucket (others may have refunded tokens).
+MAX_POLL_SECONDS = 2.0
+
+current_llm_priority: contextvars.ContextVar[str] = contextvars.ContextVar("current_llm_priority", default=INTERACTIVE)
+
+# Refills both buckets for the time elapsed (Redis server clock), then takes one request and
+# ARGV[3] tokens if both stay above the caller's reserve. Returns "0" when taken, otherwise
+# the seconds until they would be (as a string: Lua numbers are truncated to integers).
+_ACQUIRE_SCRIPT = """
+local rpm, tpm = tonumber(ARGV[1]), tonumber(ARGV[2])
+local cost, reserve = tonumber(ARGV[3]), tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'requests', 'tokens', 'ts')
+local requests = tonumber(state[1]) or rpm
+local tokens = tonumber(state[2]) or tpm
+local elapsed = math.max(0, now - (tonumber(state[3]) or now))
+requests = math.min(rpm, requests + elapsed * rpm / 60)
+tokens = math.min(tpm, tokens + elapsed * tpm / 60)
+
+local need_requests = math.min(rpm, 1 + reserve * rpm)
+local need_tokens = math.min(tpm, cost + reserve * tpm)
+local wait = 0
+if requests < need_requests then wait = math.max(wait, (need_requests - requests) * 60 / rpm) end
+if tokens < need_tokens then wait = math.max(wait, (need_tokens - tokens) * 60 / tpm) end
+if wait == 0 then
+    requests = requests - 1
+    tokens = tokens - math.min(cost, tpm)
+end
+
+redis.call('HSET', KEYS[1], 'requests', requests, 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 120)
+return tostring(wait)
+"""
+
+# Credits (or debits, if negative) ARGV[1] tokens once a call reports its real usage.
+_SETTLE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+local tokens = tonumber(redis.call('HINCRBYFLOAT', KEYS[1], 'tokens', ARGV[1]))
+if tokens > tonumber(ARGV[2]) then redis.call('HSET', KEYS[1], 'tokens', ARGV[2]) end
+return 0
+"""
+
+def estimate_tokens(prompt: Any, max_output_tokens: Optional[int] = None) -> int:
+    """Up-front charge for a call: ~4 characters per prompt token plus the expected output."""
+    return len(str(prompt)) // 4 + (max_output_tokens or GEMINI_EXPECTED_OUTPUT_TOKENS)
+
+def reported_tokens(response: Any) -> Optional[int]:
+    """Total tokens a Gemini response reports having used (thinking tokens included)."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return None
+    total = getattr(usage, "total_token_count", None)
+    if total:
+        return total
+    return (getattr(usage, "prompt_token_count", 0) or 0) + (getattr(usage, "candidates_token_count", 0) or 0) or None
+
+def llm_priority(priority: str) -> Callable:
+    """Decorator running an async function's Gemini calls at the given priority."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            token = current_llm_priority.set(priority)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                current_llm_priority.reset(token)
+        return wrapper
+    return decorator
+
+class GeminiRateLimiter:
+    """
+    Shared RPM/TPM limiter. Each call acquires one request plus its estimated tokens before it
+    is sent, and settles the estimate against the usage the response reports.
+    If Redis is not bound or fails, calls go through unthrottled (Gemini's 429s still apply).
+    """
+
+    def __init__(self, rpm: int = GEMINI_RPM_LIMIT, tpm: int = GEMINI_TPM_LIMIT,
+                 reserve: float = GEMINI_INTERACTIVE_RESERVE, key: str = BUCKET_KEY):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.reserve = reserve
+        self.key = key
+        self.redis = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._acquire_script = None
+        self._settle_script = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.rpm > 0 and self.tpm > 0
+
+    def bind(self, redis) -> None:
+        """Attaches the process's Redis connection; call from the event loop that owns it."""
+        self.redis = redis
+        self._loop = asyncio.get_running_loop()
+        self._acquire_script = redis.register_script(_ACQUIRE_SCRIPT)
+        self._settle_script = redis.register_script(_SETTLE_SCRIPT)
+
+    async def acquire(self, tokens: int, priority: Optional[str] = None) -> float:
+        """Waits until the call fits in both buckets; returns the seconds spent waiting."""
+        if not self.enabled or not self.redis:
+            return 0.0
+        priority = priority or current_llm_priority.get()
+        reserve = 0 if priority == INTERACTIVE else self.reserve
+        start = time.monotonic()
+
+        while True:
+            try:
+                wait = float(await self._acquire_script(keys=[self.key], args=[self.rpm, self.tpm, tokens, reserve]))
+            except Exception as e:
+                log.warning(f"Gemini rate limiter unavailable, not throttling: {e}")
+                break
+            if wait <= 0:
+                break
+            # Jitter spreads out callers that were all told the same wait.
+            await asyncio.sleep(min(wait, MAX_POLL_SECONDS) * random.uniform(1.0, 1.2))
+
+        waited = time.monotonic() - start
+        LLM_RATE_LIMIT_WAIT_SECONDS.labels(priority=priority).observe(waited)
+        if waited > 1:
+            log.info(f"Gemini rate limiter: {priority} call waited {waited:.1f}s for quota.")
+        return waited
+
+    async def settle(self, estimated: int, actual: Optional[int]) -> None:
+        """Returns over-estimated tokens to the bucket (or takes the shortfall)."""
+        if not self.enabled or not self.redis or not actual or actual == estimated:
+            return
+        try:
+            await self._settle_script(keys=[self.key], args=[estimated - actual, self.tpm])
+        except Exception as e:
+            log.warning(f"Gemini rate limiter settle failed: {e}")
+
+    def _run_on_loop(self, coro) -> Any:
+        """Runs a limiter coroutine from a worker thread (e.g. a CrewAI run) on the bound loop."""
+        loop = self._loop
+        if loop is None or loop.is_closed() or not loop.is_running():
+            coro.close()
+            return None
+        try:
+            if asyncio.get_running_loop() is loop:
+                coro.close()  # blocking here would deadlock the loop
+                log.warning("Gemini rate limiter: sync call made on the event loop thread; not throttling.")
+                return None
+        except RuntimeError:
+            pass  # no loop in this thread, as expected
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def acquire_sync(self, tokens: int, priority: Optional[str] = None) -> float:
+        if not self.enabled or not self.redis:
+            return 0.0
+        return self._run_on_loop(self.acquire(tokens, priority or current_llm_priority.get())) or 0.0
+
+    def settle_sync(self, estimated: int, actual: Optional[int]) -> None:
+        if self.enabled and self.redis:
+            self._run_on_loop(self.settle(estimated, actual))
+
+gemini_limiter = GeminiRateLimiter()
@@ -0,0 +1,100 @@
+# app/core/retry.py
+import asyncio
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from google.api_core import exceptions
+
+from app.core.config import LLM_MAX_ATTEMPTS, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY, LLM_REQUEST_DEADLINE_SECONDS
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Transient Gemini failures worth another attempt; anything else fails immediately.
+RETRYABLE_ERRORS = (
+    exceptions.ResourceExhausted,    # 429
+    exceptions.TooManyRequests,
+    exceptions.ServiceUnavailable,   # 503
+    exceptions.InternalServerError,  # 500
+    exceptions.DeadlineExceeded,
+    asyncio.TimeoutError,
+)
+
+_RETRY_IN_PATTERN = re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE)
+_RETRY_DELAY_PATTERN = re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE)
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = LLM_MAX_ATTEMPTS
+    base_delay: float = LLM_RETRY_BASE_DELAY
+    max_delay: float = LLM_RETRY_MAX_DELAY
+    # Total time budget for all attempts and sleeps, in seconds.
+    deadline: float = LLM_REQUEST_DEADLINE_SECONDS
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (0-based) attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+def retry_after_hint(exc: BaseException) -> Optional[float]:
+    """
+    Server-suggested delay, if the error carries one: an HTTP `Retry-After` header,
+    a gRPC RetryInfo `retry_delay`, or Gemini's "Please retry in 12.3s" message.
+    """
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    if headers.get("Retry-After"):
+        try:
+            return float(headers["Retry-After"])
+        except ValueError:
+            pass
+
+    for detail in getattr(exc, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None and hasattr(delay, "seconds"):
+            return delay.seconds + getattr(delay, "nanos", 0) / 1e9
+
+    message = str(exc)
+    match = _RETRY_IN_PATTERN.search(message) or _RETRY_DELAY_PATTERN.search(message)
+    return float(match.group(1)) if match else None
+
+async def retry_async(
+    call: Callable[[], Awaitable[T]],
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    deadline: Optional[float] = None,
+    label: str = "LLM call",
+) -> T:
+    """
+    Awaits `call()` until it succeeds, retrying transient errors with jittered exponential
+    backoff (or the server's retry hint, if longer). Sleeps never block the event loop.
+    Gives up, re-raising the last error, when attempts run out or the next wait would
+    overrun the deadline (`deadline` seconds from now; defaults to the policy's).
+    """
+    budget = policy.deadline if deadline is None else deadline
+    give_up_at = time.monotonic() + budget
+
+    for attempt in range(policy.max_attempts):
+        remaining = give_up_at - time.monotonic()
+        try:
+            return await asyncio.wait_for(call(), timeout=max(remaining, 0.001))
+        except RETRYABLE_ERRORS as e:
+            if attempt == policy.max_attempts - 1:
+                raise
+
+            hint = retry_after_hint(e)
+            wait = max(policy.backoff(attempt), hint or 0)
+            if time.monotonic() + wait >= give_up_at:
+                log.warning(f"{label}: giving up after {attempt + 1} attempts ({budget:.0f}s deadline): {e}")
+                raise
+
+            log.warning(f"{label}: transient error ({type(e).__name__}). Retrying in {wait:.2f}s "
+                        f"(attempt {attempt + 2}/{policy.max_attempts})...")
+            await asyncio.sleep(wait)
+
+    raise RuntimeError("unreachable")  # loop always returns or raises
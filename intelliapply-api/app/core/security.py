@@ -1,39 +1,149 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from .config import supabase
+from .config import (
+    SUPABASE_URL, SUPABASE_KEY, SUPABASE_JWT_SECRET, SUPABASE_JWT_AUDIENCE,
+    AUTH_REMOTE_FALLBACK, AUTH_CACHE_TTL_SECONDS,
+)
+from .concurrency import run_blocking
+from app.repositories.client import get_db
 import logging
 
 log = logging.getLogger(__name__)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-def get_current_user(token: str = Depends(oauth2_scheme)) -> str:
+# Asymmetric-key Supabase projects publish their signing keys here; PyJWKClient caches them.
+_jwks_client = jwt.PyJWKClient(f"{SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json", cache_keys=True) if SUPABASE_URL else None
+_ISSUER = f"{SUPABASE_URL.rstrip('/')}/auth/v1" if SUPABASE_URL else None
+# Algorithms accepted per key source; any other header `alg` is rejected before a key is looked up.
+_SECRET_ALGORITHMS = ("HS256",)
+_JWKS_ALGORITHMS = ("RS256", "ES256")
+
+class TokenCache:
+    """Small TTL + LRU map of token hash -> user_id. Entries never outlive the token's `exp`."""
+
+    def __init__(self, ttl_seconds: int, max_entries: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[str]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if not entry:
+            return None
+        user_id, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return user_id
+
+    def set(self, token: str, user_id: str, token_exp: Optional[float] = None) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        if token_exp:
+            expires_at = min(expires_at, token_exp)
+        self._entries[self._key(token)] = (user_id, expires_at)
+        self._entries.move_to_end(self._key(token))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+_token_cache = TokenCache(AUTH_CACHE_TTL_SECONDS)
+
+def _credentials_exception(detail: str = "Could not validate credentials") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+async def _verify_locally(token: str) -> dict:
+    """
+    Verifies signature, expiry and audience without a network hop (JWKS keys are fetched
+    once and cached). Raises jwt.PyJWTError on invalid tokens (jwt.InvalidAlgorithmError for
+    an unexpected `alg`), LookupError if no key is configured.
+    """
+    alg = jwt.get_unverified_header(token).get("alg")
+
+    if alg in _SECRET_ALGORITHMS:
+        if not SUPABASE_JWT_SECRET:
+            raise LookupError("SUPABASE_JWT_SECRET is not configured.")
+        key, algorithms = SUPABASE_JWT_SECRET, list(_SECRET_ALGORITHMS)
+    elif alg not in _JWKS_ALGORITHMS:
+        raise jwt.InvalidAlgorithmError(f"Unsupported token algorithm: {alg!r}")
+    elif _jwks_client:
+        # Only the first call per key id hits the network; later calls are served from PyJWKClient's cache.
+        signing_key = await run_blocking(_jwks_client.get_signing_key_from_jwt, token)
+        # The key's own algorithm, so a header naming another one fails verification.
+        key, algorithms = signing_key.key, [signing_key.algorithm_name]
+    else:
+        raise LookupError("No JWKS endpoint configured.")
+
+    return jwt.decode(
+        token,
+        key,
+        algorithms=algorithms,
+        audience=SUPABASE_JWT_AUDIENCE,
+        issuer=_ISSUER,
+        options={"require": ["exp", "sub"]},
+    )
+
+async def _verify_remotely(token: str) -> str:
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        raise HTTPException(status_code=503, detail="Database not connected")
+
+    user_response = await (await get_db()).auth.get_user(token)
+    user = user_response.user
+    if not user:
+        raise _credentials_exception("Invalid or expired token")
+    return user.id
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> str:
     """
     Dependency to get the current user from the Supabase JWT.
     Returns the user ID.
+
+    Tokens are verified locally (signature, expiry, audience) and cached for a short TTL.
+    A remote `auth.get_user` check is only used when AUTH_REMOTE_FALLBACK is enabled.
     """
+    cached_user_id = _token_cache.get(token)
+    if cached_user_id:
+        return cached_user_id
+
     try:
-        if not supabase:
-             raise HTTPException(status_code=503, detail="Database not connected")
-
-        user_response = supabase.auth.get_user(token)
-        user = user_response.user
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid or expired token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        # Return the user object (or just user.id if you prefer)
-        return user.id
+        claims = await _verify_locally(token)
+        user_id = claims["sub"]
+        _token_cache.set(token, user_id, claims.get("exp"))
+        return user_id
+    except jwt.ExpiredSignatureError:
+        raise _credentials_exception("Invalid or expired token")
+    except jwt.InvalidAlgorithmError as e:
+        log.error(f"Auth error: {e}")
+        raise _credentials_exception()
+    except (jwt.PyJWTError, LookupError) as e:
+        if not AUTH_REMOTE_FALLBACK:
+            log.error(f"Auth error: {e}")
+            raise _credentials_exception()
+        log.warning(f"Local JWT verification failed ({e}); falling back to remote validation.")
+
+    try:
+        user_id = await _verify_remotely(token)
+        _token_cache.set(token, user_id)
+        return user_id
     except Exception as e:
         # Check if it's already an HTTPException
         if isinstance(e, HTTPException):
             raise e
-            
+
         log.error(f"Auth error: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _credentials_exception()
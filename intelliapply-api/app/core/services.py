@@ -0,0 +1,88 @@
+# app/core/services.py
+"""
+Lazily-initialized service clients.
+
+Heavy SDKs (google-generativeai, supabase, crewai/litellm) are imported and their clients
+built on first use rather than at import time, so API startup and `--reload` restarts stay fast.
+Each getter returns None (and logs why) when the service isn't configured or fails to start.
+A failed start isn't remembered: the next call after INIT_RETRY_SECONDS tries again.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+from app.core.config import GEMINI_API_KEY, GEMINI_MODEL_NAME, SUPABASE_URL, SUPABASE_KEY, CREW_LLM_MODEL_NAME
+
+log = logging.getLogger(__name__)
+
+# Minimum time between attempts to start a service whose last attempt raised.
+INIT_RETRY_SECONDS = 5.0
+
+_instances: dict[str, Any] = {}
+_failed_at: dict[str, float] = {}
+_lock = threading.Lock()
+
+def _get(name: str, factory: Callable[[], Any]) -> Any:
+    if name in _instances:
+        return _instances[name]
+    with _lock:
+        if name in _instances:
+            return _instances[name]
+        failed_at = _failed_at.get(name)
+        if failed_at is not None and time.monotonic() - failed_at < INIT_RETRY_SECONDS:
+            return None
+        try:
+            # A factory returning None (not configured) is cached; only exceptions are retried.
+            _instances[name] = factory()
+        except Exception as e:
+            _failed_at[name] = time.monotonic()
+            log.error(f"❌ Failed to initialize {name}: {e} (retrying in {INIT_RETRY_SECONDS:.0f}s)")
+            return None
+        _failed_at.pop(name, None)
+        return _instances[name]
+
+def override(name: str, instance: Any) -> None:
+    """Replaces a service (benchmarks and local tooling use this to install stubs)."""
+    with _lock:
+        _instances[name] = instance
+
+def _create_gemini_model():
+    if not GEMINI_API_KEY:
+        log.warning("❌ GEMINI_API_KEY not found in .env file!")
+        return None
+    import google.generativeai as genai
+
+    genai.configure(api_key=GEMINI_API_KEY)
+    model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+    log.info(f"✅ Gemini SDK client initialized: {GEMINI_MODEL_NAME}")
+    return model
+
+def _create_supabase():
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        log.warning("⚠️ SUPABASE_URL or SUPABASE_KEY not found. Database features will fail.")
+        return None
+    from supabase import create_client
+
+    client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    log.info("✅ Supabase client initialized")
+    return client
+
+def _create_crew_llm():
+    from app.core.crew_llm import GeminiLLM
+
+    llm = GeminiLLM(model=CREW_LLM_MODEL_NAME, temperature=0.7, max_tokens=4096)
+    log.info(f"✅ CrewAI LLM initialized with LiteLLM: {CREW_LLM_MODEL_NAME}")
+    return llm
+
+def get_gemini_model():
+    """The google-generativeai model used by the direct (non-CrewAI) services."""
+    return _get("gemini_model", _create_gemini_model)
+
+def get_supabase():
+    """The sync Supabase client (request paths use the async client in app.repositories)."""
+    return _get("supabase", _create_supabase)
+
+def get_crew_llm():
+    """The LiteLLM-backed CrewAI LLM the resume crew runs on."""
+    return _get("crew_llm", _create_crew_llm)
@@ -0,0 +1,56 @@
+# app/core/streaming.py
+"""Server-sent events helpers for the streaming endpoints."""
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Optional
+
+from app.core.cache import llm_cache
+
+log = logging.getLogger(__name__)
+
+# Keep proxies (e.g. nginx) from buffering or caching the stream.
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def sse_event(event: str, data: Any, event_id: Optional[Any] = None) -> str:
+    """One SSE message with a JSON payload."""
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_cached(
+    func_name: str,
+    inputs: dict,
+    chunks: Callable[[], AsyncIterator[str]],
+    finalize: Callable[[str], Any],
+    to_text: Callable[[Any], str],
+    bypass: bool = False,
+) -> AsyncIterator[str]:
+    """
+    Streams an LLM text generation as SSE, sharing the LLM cache with the non-streaming endpoint.
+
+    Events: `delta` ({"text": ...}) per chunk, then `done` ({"result": ..., "cached": bool}),
+    where `result` is `finalize(full_text)`, the value the non-streaming endpoint returns and
+    caches under (func_name, inputs). A cache hit is sent as one delta (`to_text(result)`).
+    Failures end the stream with an `error` event; nothing is cached unless it completes.
+    """
+    if not bypass:
+        cached = await llm_cache.get(func_name, inputs)
+        if cached is not None:
+            log.info(f"LLM cache hit: {func_name}")
+            yield sse_event("delta", {"text": to_text(cached)})
+            yield sse_event("done", {"result": cached, "cached": True})
+            return
+
+    parts = []
+    try:
+        async for text in chunks():
+            parts.append(text)
+            yield sse_event("delta", {"text": text})
+        result = finalize("".join(parts))
+    except Exception as e:
+        log.error(f"Streaming {func_name} failed: {e}")
+        yield sse_event("error", {"detail": "AI generation failed."})
+        return
+
+    if result:
+        await llm_cache.set(func_name, inputs, result)
+    yield sse_event("done", {"result": result, "cached": False})
@@ -0,0 +1,68 @@
+# app/repositories/client.py
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Optional
+
+import httpx
+
+from app.core.config import SUPABASE_URL, SUPABASE_KEY, DB_MAX_CONNECTIONS, DB_MAX_KEEPALIVE_CONNECTIONS
+from app.core.metrics import DB_QUERY_SECONDS
+
+log = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    from supabase import AsyncClient
+
+_client: Optional["AsyncClient"] = None
+_http: Optional[httpx.AsyncClient] = None
+_lock = asyncio.Lock()
+
+async def get_db() -> "AsyncClient":
+    """
+    Returns the process-wide async Supabase client, creating it on first use.
+    All PostgREST/Storage/Auth calls share one pooled httpx client with keep-alive.
+    """
+    global _client, _http
+    if _client:
+        return _client
+
+    async with _lock:
+        if _client:
+            return _client
+        if not SUPABASE_URL or not SUPABASE_KEY:
+            raise RuntimeError("SUPABASE_URL or SUPABASE_KEY not configured.")
+        from supabase import AsyncClientOptions, acreate_client
+
+        _http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=DB_MAX_CONNECTIONS,
+                max_keepalive_connections=DB_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(30.0),
+            http2=False,
+        )
+        _client = await acreate_client(
+            SUPABASE_URL,
+            SUPABASE_KEY,
+            options=AsyncClientOptions(httpx_client=_http, auto_refresh_token=False, persist_session=False),
+        )
+        log.info("✅ Async Supabase client initialized (pooled, keep-alive)")
+        return _client
+
+async def close_db() -> None:
+    global _client, _http
+    if _http:
+        await _http.aclose()
+    _client, _http = None, None
+
+async def execute(query, table: str = "unknown", operation: str = "unknown"):
+    """Awaits a query builder and raises if PostgREST reported an error."""
+    start = time.perf_counter()
+    try:
+        response = await query.execute()
+    finally:
+        DB_QUERY_SECONDS.labels(table=table, operation=operation).observe(time.perf_counter() - start)
+    if hasattr(response, 'error') and response.error:
+        raise Exception(str(response.error))
+    return response
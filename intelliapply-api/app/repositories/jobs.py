@@ -0,0 +1,91 @@
+# app/repositories/jobs.py
+from typing import Optional
+
+from app.repositories.client import get_db, execute
+
+class JobsRepo:
+    """Async data access for the `jobs` table."""
+
+    table = "jobs"
+
+    async def _query(self):
+        return (await get_db()).table(self.table)
+
+    async def get(self, job_id: int, columns: str = "*", user_id: Optional[str] = None) -> Optional[dict]:
+        query = (await self._query()).select(columns).eq("id", job_id)
+        if user_id:
+            query = query.eq("user_id", user_id)
+        response = await execute(query.maybe_single(), table=self.table, operation="get")
+        return response.data if response else None
+
+    async def get_many(self, job_ids: list[int], columns: str = "*") -> list[dict]:
+        if not job_ids:
+            return []
+        response = await execute(
+            (await self._query()).select(columns).in_("id", job_ids),
+            table=self.table, operation="get_many",
+        )
+        return response.data or []
+
+    async def list_unrated_ids(self, job_ids: list[int], user_id: str) -> list[int]:
+        """IDs (owned by the user) that have a description but no AI rating yet."""
+        response = await execute(
+            (await self._query())
+            .select("id")
+            .in_("id", job_ids)
+            .eq("user_id", user_id)
+            .not_.is_("description", "null")
+            .is_("gemini_rating", "null"),
+            table=self.table, operation="list_unrated_ids",
+        )
+        return [job["id"] for job in response.data]
+
+    async def count_matching(self, user_id: str, title: str, company: str) -> int:
+        response = await execute(
+            (await self._query())
+            .select("id", count="exact")
+            .eq("user_id", user_id)
+            .ilike("title", title)
+            .ilike("company", company),
+            table=self.table, operation="count_matching",
+        )
+        return response.count or 0
+
+    async def existing_urls(self, user_id: str, job_urls: list[str]) -> set[str]:
+        if not job_urls:
+            return set()
+        response = await execute(
+            (await self._query())
+            .select("job_url")
+            .eq("user_id", user_id)
+            .in_("job_url", job_urls),
+            table=self.table, operation="existing_urls",
+        )
+        return set(job["job_url"] for job in response.data)
+
+    async def insert(self, rows: list[dict] | dict) -> list[dict]:
+        response = await execute((await self._query()).insert(rows), table=self.table, operation="insert")
+        return response.data or []
+
+    async def update(self, job_id: int, data: dict, user_id: Optional[str] = None) -> list[dict]:
+        query = (await self._query()).update(data).eq("id", job_id)
+        if user_id:
+            query = query.eq("user_id", user_id)
+        response = await execute(query, table=self.table, operation="update")
+        return response.data or []
+
+    async def delete(self, job_ids: list[int], user_id: str) -> int:
+        response = await execute(
+            (await self._query()).delete().in_("id", job_ids).eq("user_id", user_id),
+            table=self.table, operation="delete",
+        )
+        return len(response.data)
+
+    async def delete_untracked(self, user_id: str) -> int:
+        response = await execute(
+            (await self._query()).delete().eq("user_id", user_id).eq("is_tracked", False),
+            table=self.table, operation="delete_untracked",
+        )
+        return len(response.data)
+
+jobs_repo = JobsRepo()
@@ -0,0 +1,134 @@
+# app/repositories/profiles.py
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from app.core.config import PROFILE_CACHE_TTL_SECONDS
+from app.repositories.client import get_db, execute
+
+log = logging.getLogger(__name__)
+
+# Redis pub/sub channel used to invalidate cached profiles in every API/worker process.
+INVALIDATION_CHANNEL = "profiles:invalidate"
+INVALIDATION_MIN_BACKOFF_SECONDS = 1.0
+INVALIDATION_MAX_BACKOFF_SECONDS = 30.0
+
+def _parse_columns(columns: str) -> frozenset[str]:
+    return frozenset(c.strip() for c in columns.split(",") if c.strip())
+
+class ProfilesRepo:
+    """
+    Async data access for the `profiles` table.
+
+    `get_cached` keeps a short-lived, in-process copy of the columns each caller asked for,
+    keyed by (profile_id, user_id), so a bulk run reads the profile once instead of per job.
+    Entries expire after PROFILE_CACHE_TTL_SECONDS or when `invalidate` is called.
+    """
+
+    table = "profiles"
+
+    def __init__(self, cache_ttl_seconds: int = PROFILE_CACHE_TTL_SECONDS):
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self._cache: dict[tuple[str, Optional[str]], tuple[float, dict]] = {}
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        # Bumped by invalidate (per profile) and invalidate_all, so a fetch that started
+        # before an invalidation doesn't store the row it read.
+        self._generations: dict[str, int] = {}
+        self._epoch = 0
+
+    def _generation(self, profile_id: str) -> tuple[int, int]:
+        return self._epoch, self._generations.get(profile_id, 0)
+
+    async def get(self, profile_id: str, columns: str = "*", user_id: Optional[str] = None) -> Optional[dict]:
+        query = (await get_db()).table(self.table).select(columns).eq("id", profile_id)
+        if user_id:
+            query = query.eq("user_id", user_id)
+        response = await execute(query.maybe_single(), table=self.table, operation="get")
+        return response.data if response else None
+
+    async def get_cached(self, profile_id: str, columns: str, user_id: Optional[str] = None) -> Optional[dict]:
+        """Like `get`, but served from the profile cache. `columns` must be an explicit list."""
+        wanted = _parse_columns(columns)
+        key = (profile_id, user_id)
+
+        entry = self._cache.get(key)
+        if entry and entry[0] > time.monotonic() and wanted <= entry[1].keys():
+            return {column: entry[1][column] for column in wanted}
+
+        # Single-flight: concurrent misses for the same projection share one query. It runs as
+        # its own task, so a caller being cancelled (e.g. a job timeout) doesn't fail the rest.
+        generation = self._generation(profile_id)
+        flight_key = (profile_id, user_id, wanted, generation)
+        task = self._inflight.get(flight_key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, columns, generation))
+            self._inflight[flight_key] = task
+            task.add_done_callback(lambda done: self._flight_done(flight_key, done))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: tuple[str, Optional[str]], columns: str, generation: tuple[int, int]) -> Optional[dict]:
+        profile = await self.get(key[0], columns=columns, user_id=key[1])
+        if profile is not None and self._generation(key[0]) == generation:
+            self._store(key, profile)
+        return profile
+
+    def _flight_done(self, flight_key: tuple, task: asyncio.Task) -> None:
+        if self._inflight.get(flight_key) is task:
+            del self._inflight[flight_key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved in case every caller was cancelled
+
+    def _store(self, key: tuple[str, Optional[str]], profile: dict) -> None:
+        now = time.monotonic()
+        entry = self._cache.get(key)
+        merged = {**entry[1], **profile} if entry and entry[0] > now else dict(profile)
+        self._cache[key] = (now + self.cache_ttl_seconds, merged)
+
+    def invalidate(self, profile_id: str) -> None:
+        self._generations[profile_id] = self._generations.get(profile_id, 0) + 1
+        for key in [k for k in self._cache if k[0] == profile_id]:
+            del self._cache[key]
+        log.info(f"Profile cache invalidated for {profile_id}.")
+
+    def invalidate_all(self) -> None:
+        self._epoch += 1
+        self._cache.clear()
+
+    async def publish_invalidation(self, redis, profile_id: str) -> None:
+        """Invalidates locally and tells every other process (API workers, arq workers) to do the same."""
+        self.invalidate(profile_id)
+        if redis:
+            await redis.publish(INVALIDATION_CHANNEL, profile_id)
+
+    async def listen_for_invalidations(self, redis) -> None:
+        """
+        Long-running task: applies invalidations published by other processes. Reconnects with
+        backoff if Redis fails, dropping the whole cache since messages may have been missed.
+        """
+        backoff = INVALIDATION_MIN_BACKOFF_SECONDS
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                backoff = INVALIDATION_MIN_BACKOFF_SECONDS
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    data = message["data"]
+                    self.invalidate(data.decode() if isinstance(data, bytes) else data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"Profile invalidation listener failed ({e!r}); reconnecting in {backoff:.0f}s.")
+                self.invalidate_all()
+            finally:
+                try:
+                    await pubsub.unsubscribe(INVALIDATION_CHANNEL)
+                    await pubsub.close()
+                except Exception:
+                    pass
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, INVALIDATION_MAX_BACKOFF_SECONDS)
+
+profiles_repo = ProfilesRepo()
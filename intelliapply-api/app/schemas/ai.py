@@ -4,14 +4,20 @@ from typing import Optional
 class OptimizedResumeRequest(BaseModel):
     profile_id: str
     job_id: int
+    # Queue the crew run and return a task id at once (see /ai/crew-tasks/{task_id}).
+    async_mode: bool = False
 
 class AIRequest(BaseModel):
     job_description: str
     profile_id: str
     company: str | None = None
     title: str | None = None
+    # Skip the LLM response cache and force a fresh generation.
+    bypass_cache: bool = False
 
 class ResumeFromTextRequest(BaseModel):
     profile_id: str
     job_description: str
     resume_context: str 
+    # Queue the crew run and return a task id at once (see /ai/crew-tasks/{task_id}).
+    async_mode: bool = False
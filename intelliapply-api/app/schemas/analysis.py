@@ -4,7 +4,11 @@ from typing import List, Optional
 class AnalyzeRequest(BaseModel):
     profile_id: str
     description: Optional[str] = None
+    # Skip the LLM response cache and force a fresh rating.
+    bypass_cache: bool = False
 
 class BulkAnalyzeRequest(BaseModel):
     profile_id: str
     job_ids: List[int]
+    # Rate several jobs per Gemini call (one resume prompt per batch instead of per job).
+    batch_mode: bool = True
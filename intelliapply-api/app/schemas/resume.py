@@ -76,6 +76,7 @@ class GapAnalysisRequest(BaseModel):
     resume_data: Dict[str, Any]
     job_description: str
     job_url: Optional[str] = None
+    bypass_cache: bool = False
 
 class GapItem(BaseModel):
     missing_skill: str
@@ -91,6 +92,7 @@ class GapAnalysisResponse(BaseModel):
 class CoverLetterRequest(BaseModel):
     resume_data: Dict[str, Any]
     job_description: str
+    bypass_cache: bool = False
 
 class CoverLetterResponse(BaseModel):
     cover_letter_text: str
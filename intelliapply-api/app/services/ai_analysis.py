@@ -1,17 +1,22 @@
 
 # app/services/ai_analysis.py
 import json
-import google.generativeai as genai
-from app.core.config import gemini_model
+from typing import AsyncIterator
+from app.core.config import BATCH_RATING_TOKEN_BUDGET, BATCH_RATING_MAX_JOBS
+from app.core.services import get_gemini_model
+from app.core.llm import generate_content, stream_content
+from app.core.metrics import llm_service
 import logging
 
 log = logging.getLogger(__name__)
 
-def get_gemini_analysis(resume_context: str, job_description: str, experience_level: str) -> dict | None:
+@llm_service()
+async def get_gemini_analysis(resume_context: str, job_description: str, experience_level: str) -> dict | None:
     """
     Gets a qualitative analysis and rating from the Gemini API.
+    Async so the worker can keep many analyses in flight on one event loop.
     """
-    if not gemini_model:
+    if not get_gemini_model():
         log.error("Gemini client not initialized. Cannot perform analysis.")
         return None
         
@@ -44,10 +49,8 @@ def get_gemini_analysis(resume_context: str, job_description: str, experience_le
     """
     
     try:
-        generation_config = genai.types.GenerationConfig(
-            response_mime_type="application/json"
-        )
-        response = gemini_model.generate_content(
+        generation_config = {"response_mime_type": "application/json"}
+        response = await generate_content(
             prompt,
             generation_config=generation_config
         )
@@ -59,11 +62,126 @@ def get_gemini_analysis(resume_context: str, job_description: str, experience_le
             log.error(f"Gemini non-JSON response: {e.response}")
         return None
 
-def get_interview_prep(resume_context: str, job_description: str) -> dict | None:
+def estimate_tokens(text: str | None) -> int:
+    """Rough token estimate (~4 characters per token) used for batch packing."""
+    return len(text or "") // 4 + 1
+
+def pack_jobs_for_batch(
+    jobs: list[dict],
+    token_budget: int = BATCH_RATING_TOKEN_BUDGET,
+    max_jobs: int = BATCH_RATING_MAX_JOBS,
+) -> list[list[dict]]:
+    """
+    Greedily packs jobs (dicts with 'id' and 'description') into batches whose
+    descriptions fit the token budget. A job larger than the budget gets a batch of its own.
+    """
+    batches: list[list[dict]] = []
+    current: list[dict] = []
+    current_tokens = 0
+
+    for job in jobs:
+        tokens = estimate_tokens(job.get("description"))
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_jobs):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(job)
+        current_tokens += tokens
+
+    if current:
+        batches.append(current)
+    return batches
+
+def _is_valid_rating(item) -> bool:
+    if not isinstance(item, dict):
+        return False
+    rating = item.get("gemini_rating")
+    reason = item.get("ai_reason")
+    if isinstance(rating, bool) or not isinstance(rating, (int, float)) or not 1 <= rating <= 10:
+        return False
+    return isinstance(reason, str) and bool(reason.strip())
+
+@llm_service()
+async def get_gemini_batch_analysis(resume_context: str, jobs: list[dict], experience_level: str) -> dict[int, dict]:
+    """
+    Rates several jobs against one resume in a single Gemini call.
+    Returns {job_id: {"gemini_rating", "ai_reason"}} for every job whose output was well-formed;
+    missing or malformed items are left out so the caller can fall back to per-job analysis.
+    """
+    if not get_gemini_model():
+        log.error("Gemini client not initialized. Cannot perform analysis.")
+        return {}
+    if not jobs:
+        return {}
+
+    log.info(f"Getting Gemini batch analysis for {len(jobs)} jobs ('{experience_level}' role)...")
+
+    job_blocks = "\n\n".join(
+        f"[JOB {job['id']}]\n{job.get('description')}\n[END JOB {job['id']}]" for job in jobs
+    )
+
+    prompt = f"""
+    Act as an extremely strict, expert technical recruiter. Your only goal is to protect my time by filtering out irrelevant job postings.
+
+    MY RESUME CONTEXT:
+    ---
+    {resume_context}
+    ---
+    This resume clearly indicates my skills are in SOFTWARE development.
+
+    THE JOB I AM LOOKING FOR:
+    ---
+    I am looking for an '{experience_level}' role.
+    ---
+
+    JOB DESCRIPTIONS TO ANALYZE (each one is wrapped in [JOB <id>] ... [END JOB <id>]):
+    ---
+    {job_blocks}
+    ---
+
+    YOUR INSTRUCTIONS (Follow these exactly, for EACH job independently):
+    1.  **EXPERIENCE LEVEL CHECK (MOST IMPORTANT):** Analyze the job title and description for keywords related to seniority (e.g., "Senior", "Sr.", "Lead", "Principal", "Manager", "Staff"). If the job requires a higher experience level than '{experience_level}', you MUST give it a low rating and reject it.
+    2.  **FIELD RELEVANCE CHECK:** Analyze if the core responsibilities are a strong match for my SOFTWARE skills. Immediately REJECT jobs that are primarily for hardware, mechanical engineering, sales, or other non-software fields.
+    3.  **RATING:** Based on BOTH checks above, provide a suitability rating from 1 to 10. A rating of 7 or higher means it is a very strong match for BOTH my software skills AND my desired '{experience_level}'. Be extremely critical.
+    4.  **JSON OUTPUT:** Return ONLY a valid JSON object whose keys are the job ids (as strings) and whose values are objects with two keys: "gemini_rating" (int) and "ai_reason" (a concise, one-sentence reason for your rating).
+
+    Example Output:
+    {{
+      "123": {{"gemini_rating": 8, "ai_reason": "..."}},
+      "456": {{"gemini_rating": 2, "ai_reason": "..."}}
+    }}
+    """
+
+    try:
+        generation_config = {"response_mime_type": "application/json"}
+        response = await generate_content(
+            prompt,
+            generation_config=generation_config
+        )
+        raw = json.loads(response.text)
+    except Exception as e:
+        log.error(f"Gemini batch analysis error: {e}")
+        return {}
+
+    if not isinstance(raw, dict):
+        log.error("Gemini batch analysis returned a non-object payload.")
+        return {}
+
+    results: dict[int, dict] = {}
+    for job in jobs:
+        item = raw.get(str(job["id"]))
+        if _is_valid_rating(item):
+            results[job["id"]] = {"gemini_rating": int(item["gemini_rating"]), "ai_reason": item["ai_reason"].strip()}
+
+    if len(results) < len(jobs):
+        log.warning(f"Batch analysis returned {len(results)}/{len(jobs)} well-formed ratings.")
+    return results
+
+@llm_service()
+async def get_interview_prep(resume_context: str, job_description: str) -> dict | None:
     """
     Gets interview prep questions from the Gemini API.
     """
-    if not gemini_model:
+    if not get_gemini_model():
         log.error("Gemini client not initialized. Cannot perform analysis.")
         return None
         
@@ -97,10 +215,8 @@ def get_interview_prep(resume_context: str, job_description: str) -> dict | None
     """
     
     try:
-        generation_config = genai.types.GenerationConfig(
-            response_mime_type="application/json"
-        )
-        response = gemini_model.generate_content(
+        generation_config = {"response_mime_type": "application/json"}
+        response = await generate_content(
             prompt,
             generation_config=generation_config
         )
@@ -110,11 +226,12 @@ def get_interview_prep(resume_context: str, job_description: str) -> dict | None
         log.error(f"Gemini interview prep error: {e}")
         return None
 
-def get_resume_suggestions(resume_context: str, job_description: str) -> dict | None:
+@llm_service()
+async def get_resume_suggestions(resume_context: str, job_description: str) -> dict | None:
     """
     Gets resume tailoring suggestions from the Gemini API.
     """
-    if not gemini_model:
+    if not get_gemini_model():
         log.error("Gemini client not initialized. Cannot get suggestions.")
         return None
         
@@ -150,10 +267,8 @@ def get_resume_suggestions(resume_context: str, job_description: str) -> dict |
     """
     
     try:
-        generation_config = genai.types.GenerationConfig(
-            response_mime_type="application/json"
-        )
-        response = gemini_model.generate_content(
+        generation_config = {"response_mime_type": "application/json"}
+        response = await generate_content(
             prompt,
             generation_config=generation_config
         )
@@ -163,17 +278,9 @@ def get_resume_suggestions(resume_context: str, job_description: str) -> dict |
         log.error(f"Gemini suggestions error: {e}")
         return None
 
-def get_cover_letter(resume_context: str, job_description: str, company: str, title: str) -> dict | None:
-    """
-    Generates a cover letter from the Gemini API.
-    """
-    if not gemini_model:
-        log.error("Gemini client not initialized. Cannot write cover letter.")
-        return None
-        
-    log.info(f"Getting Gemini cover letter for {title} at {company}...")
-    
-    prompt = f"""
+def _cover_letter_prompt(resume_context: str, job_description: str, company: str, title: str) -> str:
+    """Shared by `get_cover_letter` and `stream_cover_letter`, which share a cache entry."""
+    return f"""
     Act as an expert career coach and professional writer. Your task is to write a concise, professional, and compelling cover letter.
 
     MY RESUME CONTEXT:
@@ -190,20 +297,37 @@ def get_cover_letter(resume_context: str, job_description: str, company: str, ti
     INSTRUCTIONS:
     1.  Write a three-paragraph cover letter.
     2.  The tone should be professional, confident, and tailored.
-    3.  Return ONLY a valid JSON object with one key: "coverLetter".
-    4.  The value of "coverLetter" should be a single string containing the full letter text (with newlines as \n).
+    3.  Return ONLY the letter text: no JSON, no Markdown, no placeholders.
+    """
+
+@llm_service()
+async def get_cover_letter(resume_context: str, job_description: str, company: str, title: str) -> dict | None:
+    """
+    Generates a cover letter from the Gemini API.
     """
+    if not get_gemini_model():
+        log.error("Gemini client not initialized. Cannot write cover letter.")
+        return None
+        
+    log.info(f"Getting Gemini cover letter for {title} at {company}...")
     
+    prompt = _cover_letter_prompt(resume_context, job_description, company, title)
+
     try:
-        generation_config = genai.types.GenerationConfig(
-            response_mime_type="application/json"
-        )
-        response = gemini_model.generate_content(
-            prompt,
-            generation_config=generation_config
-        )
-        return json.loads(response.text)
+        response = await generate_content(prompt)
+        return {"coverLetter": response.text.strip()}
         
     except Exception as e:
         log.error(f"Gemini cover letter error: {e}")
         return None
+
+@llm_service("get_cover_letter")
+async def stream_cover_letter(resume_context: str, job_description: str, company: str, title: str) -> AsyncIterator[str]:
+    """
+    Streams the same cover letter (same prompt) chunk by chunk. Callers wrap the full text
+    as {"coverLetter": ...}, the shape `get_cover_letter` returns and caches.
+    """
+    log.info(f"Streaming Gemini cover letter for {title} at {company}...")
+    prompt = _cover_letter_prompt(resume_context, job_description, company, title)
+    async for text in stream_content(prompt):
+        yield text
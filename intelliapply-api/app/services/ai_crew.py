@@ -1,27 +1,41 @@
 
 # app/services/ai_crew.py
+import asyncio
+import functools
+import json
 import logging
-from crewai import Agent, Task, Crew, Process
-from app.core.config import crew_llm
+import threading
+from typing import Callable, Optional
+from app.core.cache import llm_cache
+from app.core.config import DEBUG
+from app.core.services import get_crew_llm
 from app.schemas.resume import OptimizedResumeOutput
+from app.services.crew_tasks import OPTIMIZING_RESUME
 
 log = logging.getLogger(__name__)
 
-def run_resume_crew(job_description: str, resume_context: str, profile_data: dict) -> str:
-    if not crew_llm:
-        log.error("CrewAI LLM not configured.")
-        return '{"error": "AI Crew is not configured."}'
+# The two analysis stages, as named in the LLM cache (see app.core.cache.CACHE_POLICIES),
+# in the order of the crew's tasks.
+RESUME_ANALYSIS = "crew_resume_analysis"
+JOB_ANALYSIS = "crew_job_analysis"
+ANALYSIS_STAGES = (RESUME_ANALYSIS, JOB_ANALYSIS)
 
-    log.info("Starting Resume Optimization Crew...")
-    
-    contact_info_block = f"""
-    USER'S REAL CONTACT INFO (Use this for the JSON):
-    Name: {profile_data.get('full_name')}
-    Email: {profile_data.get('email')}
-    Phone: {profile_data.get('phone')}
-    LinkedIn: {profile_data.get('linkedin_url')}
-    Portfolio: {profile_data.get('portfolio_url')}
+def crew_error(output: str) -> Optional[str]:
+    """The error message if `run_resume_crew` returned its error payload instead of a resume."""
+    if not output.lstrip().startswith('{"error"'):
+        return None
+    try:
+        return json.loads(output).get("error") or output
+    except ValueError:
+        return output
+
+def _build_resume_crew(crew_llm, skip: tuple = ()):
+    """
+    The crew's agents and tasks, without the analysis stages named in `skip`. Built per run:
+    crewai keeps per-run state on agents and tasks, and building is cheap (a few ms).
     """
+    # crewai is slow to import; the API only pays for it once a crew actually runs.
+    from crewai import Agent, Task, Crew, Process
 
     resume_analyzer = Agent(
         role='Resume Analyst',
@@ -31,7 +45,7 @@ def run_resume_crew(job_description: str, resume_context: str, profile_data: dic
             "You have a keen eye for detail and can quickly parse a resume."
         ),
         llm=crew_llm,
-        verbose=True,
+        verbose=DEBUG,
         allow_delegation=False,
     )
 
@@ -42,7 +56,7 @@ def run_resume_crew(job_description: str, resume_context: str, profile_data: dic
             "You are a senior hiring manager who knows exactly what skills and experience matter most."
         ),
         llm=crew_llm,
-        verbose=True,
+        verbose=DEBUG,
         allow_delegation=False,
     )
     
@@ -53,10 +67,12 @@ def run_resume_crew(job_description: str, resume_context: str, profile_data: dic
             "You are a world-class career coach and resume writer who crafts optimized resumes that get candidates hired."
         ),
         llm=crew_llm,
-        verbose=True,
+        verbose=DEBUG,
         allow_delegation=False,
     )
 
+    # The two analyses are independent, so they run concurrently (async_execution);
+    # the optimizer waits for both.
     task_analyze_resume = Task(
         description=(
             "Analyze this resume text and extract all skills, experiences, and projects:\n\n"
@@ -64,6 +80,7 @@ def run_resume_crew(job_description: str, resume_context: str, profile_data: dic
         ),
         expected_output='A structured summary of skills, experience, and projects.',
         agent=resume_analyzer,
+        async_execution=True,
     )
 
     task_analyze_job = Task(
@@ -73,13 +90,24 @@ def run_resume_crew(job_description: str, resume_context: str, profile_data: dic
         ),
         expected_output='A list of the top 5-7 keywords and required skills.',
         agent=job_analyzer,
+        async_execution=True,
     )
 
+    # (agent, task) for each analysis stage that runs; skipped ones are given as text instead.
+    analyses = [
+        (agent, task)
+        for stage, agent, task in zip(
+            ANALYSIS_STAGES, (resume_analyzer, job_analyzer), (task_analyze_resume, task_analyze_job)
+        )
+        if stage not in skip
+    ]
+
     task_optimize_resume = Task(
         description=(
-            f"Using the analyses provided, rewrite this resume to align with the job description. "
+            "Using the analyses provided, rewrite this resume to align with the job description. "
             "Use keywords from the job analysis. Output ONLY a valid JSON object matching the Pydantic schema.\n\n"
-            f"{contact_info_block}\n\n"
+            "{contact_info}\n\n"
+            "{earlier_analyses}"
             "Original Resume Text:\n{resume_text}"
         ),
         expected_output=(
@@ -94,20 +122,87 @@ def run_resume_crew(job_description: str, resume_context: str, profile_data: dic
             "   - Reference specific keywords from the job description analysis in your reasoning."
         ),
         agent=resume_optimizer,
-        context=[task_analyze_resume, task_analyze_job],
+        context=[task for _, task in analyses],
         output_pydantic=OptimizedResumeOutput
     )
     
-    crew = Crew(
-        agents=[resume_analyzer, job_analyzer, resume_optimizer],
-        tasks=[task_analyze_resume, task_analyze_job, task_optimize_resume],
+    return Crew(
+        agents=[agent for agent, _ in analyses] + [resume_optimizer],
+        tasks=[task for _, task in analyses] + [task_optimize_resume],
         process=Process.sequential,
-        verbose=True
+        verbose=DEBUG
     )
-    
+
+def _earlier_analyses_block(analyses: dict) -> str:
+    """Cached analyses, written into the optimizer's prompt in place of the skipped tasks' output."""
+    titles = {RESUME_ANALYSIS: "Resume analysis", JOB_ANALYSIS: "Job description analysis"}
+    return "".join(
+        f"{titles[stage]}:\n{analyses[stage]}\n\n" for stage in ANALYSIS_STAGES if analyses.get(stage)
+    )
+
+def run_resume_crew(job_description: str, resume_context: str, profile_data: dict,
+                    on_stage: Optional[Callable[[str], None]] = None,
+                    analyses: Optional[dict] = None) -> str:
+    """
+    Runs the three-agent optimization crew (blocking; call it off the event loop).
+    `on_stage`, if given, is called from a crew thread with OPTIMIZING_RESUME once the
+    analysis tasks have finished (see app.services.crew_tasks).
+    `analyses` maps RESUME_ANALYSIS / JOB_ANALYSIS to their output text: stages already in it
+    are skipped (the optimizer gets the given text), and the stages that run are added to it
+    as each finishes, whether or not the optimizer then succeeds.
+    """
+    if analyses is None:
+        analyses = {}
+    crew_llm = get_crew_llm()
+    if not crew_llm:
+        log.error("CrewAI LLM not configured.")
+        return '{"error": "AI Crew is not configured."}'
+
+    log.info("Starting Resume Optimization Crew...")
+    skip = tuple(stage for stage in ANALYSIS_STAGES if analyses.get(stage))
+    if skip:
+        log.info(f"Reusing earlier crew output for: {', '.join(skip)}")
+    try:
+        crew = _build_resume_crew(crew_llm, skip)
+    except Exception as e:
+        log.error(f"Failed to build the resume crew: {e}", exc_info=True)
+        return f'{{"error": "The AI crew failed to process the request. {str(e)}"}}'
+
+    # Each analysis is recorded as soon as its task finishes, so it's kept (and cached by
+    # run_resume_crew_cached) even if the optimizer fails afterwards.
+    ran = [stage for stage in ANALYSIS_STAGES if stage not in skip]
+    analysis_tasks = crew.tasks[:-1]
+    analyses_left = [len(analysis_tasks)]
+    lock = threading.Lock()
+
+    def analysis_done(stage: str, output) -> None:
+        with lock:
+            if output is not None and output.raw:
+                analyses[stage] = output.raw
+            analyses_left[0] -= 1
+            done = analyses_left[0] == 0
+        if done and on_stage:
+            on_stage(OPTIMIZING_RESUME)
+
+    for stage, task in zip(ran, analysis_tasks):
+        task.callback = functools.partial(analysis_done, stage)
+    if not analysis_tasks and on_stage:
+        on_stage(OPTIMIZING_RESUME)
+
+    contact_info_block = f"""
+    USER'S REAL CONTACT INFO (Use this for the JSON):
+    Name: {profile_data.get('full_name')}
+    Email: {profile_data.get('email')}
+    Phone: {profile_data.get('phone')}
+    LinkedIn: {profile_data.get('linkedin_url')}
+    Portfolio: {profile_data.get('portfolio_url')}
+    """
+
     inputs = {
         'resume_text': resume_context,
-        'job_description': job_description
+        'job_description': job_description,
+        'contact_info': contact_info_block,
+        'earlier_analyses': _earlier_analyses_block(analyses),
     }
 
     try:
@@ -117,7 +212,7 @@ def run_resume_crew(job_description: str, resume_context: str, profile_data: dic
         
         if not result:
             raise Exception("Crew returned no result.")
-            
+
         # The result is a CrewOutput object. valid JSON should be in .raw or .json_dict
         # The user's output showed the JSON string inside the "raw" field.
         final_output = result.raw
@@ -131,3 +226,37 @@ def run_resume_crew(job_description: str, resume_context: str, profile_data: dic
     except Exception as e:
         log.error(f"CrewAI kickoff failed: {e}", exc_info=True)
         return f'{{"error": "The AI crew failed to process the request. {str(e)}"}}'
+
+async def run_resume_crew_cached(job_description: str, resume_context: str, profile_data: dict,
+                                 on_stage: Optional[Callable[[str], None]] = None) -> str:
+    """
+    `run_resume_crew` in a thread, reusing the analysis stages' output from the LLM cache.
+    The resume analysis is keyed by the resume text and the job analysis by the description
+    (plus each stage's prompt version), so with both cached only the optimizer calls the LLM.
+    """
+    stage_inputs = {
+        RESUME_ANALYSIS: {"resume_text": resume_context},
+        JOB_ANALYSIS: {"job_description": job_description},
+    }
+    analyses = {}
+    for stage, inputs in stage_inputs.items():
+        cached = await llm_cache.get(stage, inputs)
+        if cached:
+            analyses[stage] = cached
+    cached_stages = set(analyses)
+
+    try:
+        return await asyncio.to_thread(
+            run_resume_crew,
+            job_description=job_description,
+            resume_context=resume_context,
+            profile_data=profile_data,
+            on_stage=on_stage,
+            analyses=analyses,
+        )
+    finally:
+        # The analyses stand on their own, so they're kept even if the optimizer failed
+        # (or the job timed out) after they finished.
+        for stage, text in list(analyses.items()):
+            if stage not in cached_stages:
+                await llm_cache.set(stage, stage_inputs[stage], text)
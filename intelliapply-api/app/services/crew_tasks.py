@@ -0,0 +1,106 @@
+# app/services/crew_tasks.py
+"""
+Status and stage events for resume crews run as arq jobs (the async mode of
+/ai/generate-optimized-resume and /ai/generate-resume-from-text).
+
+The API records the task as queued before enqueueing it; the worker then moves it through
+the crew's stages. The latest status (with the result, once complete) is kept at
+crew_task:<id>, and every transition is appended to crew_task_events:<id> so an SSE
+client can (re)connect at any point and replay what it missed.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator, Optional
+
+from app.core.config import CREW_TASK_TTL_SECONDS
+from app.core.streaming import sse_event
+
+log = logging.getLogger(__name__)
+
+STATUS_PREFIX = "crew_task:"
+EVENTS_PREFIX = "crew_task_events:"
+
+QUEUED = "queued"
+# The resume and job description analyses run concurrently.
+ANALYZING = "analyzing"
+OPTIMIZING_RESUME = "optimizing_resume"
+COMPLETE = "complete"
+FAILED = "failed"
+TERMINAL_STAGES = (COMPLETE, FAILED)
+
+# How often the SSE stream checks for new events, and sends a keep-alive comment when idle.
+EVENT_POLL_SECONDS = 0.5
+HEARTBEAT_SECONDS = 15.0
+
+# Sets the status and appends the event atomically, unless the task already reached a
+# terminal stage (ARGV[4...]): a crew thread outliving its job's timeout can't undo FAILED.
+_PUBLISH_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current then
+    local stage = cjson.decode(current)['stage']
+    for i = 4, #ARGV do
+        if stage == ARGV[i] then
+            return 0
+        end
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+redis.call('RPUSH', KEYS[2], ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return 1
+"""
+
+async def publish_stage(redis, task_id: str, user_id: str, stage: str, **fields) -> bool:
+    """
+    Sets the task's status to `stage` (plus any result/error fields) and appends the event.
+    Returns False, changing nothing, if the task has already completed or failed.
+    """
+    now = time.time()
+    status = {"task_id": task_id, "user_id": user_id, "stage": stage, "updated_at": now, **fields}
+    event = {"stage": stage, "at": now, **fields}
+
+    published = await redis.register_script(_PUBLISH_SCRIPT)(
+        keys=[STATUS_PREFIX + task_id, EVENTS_PREFIX + task_id],
+        args=[json.dumps(status), json.dumps(event), CREW_TASK_TTL_SECONDS, *TERMINAL_STAGES],
+    )
+    if not published:
+        log.info(f"Crew task {task_id} already finished; ignoring stage {stage}.")
+    return bool(published)
+
+async def get_status(redis, task_id: str, user_id: str) -> Optional[dict]:
+    """The task's current status, or None if it doesn't exist (or belongs to someone else)."""
+    raw = await redis.get(STATUS_PREFIX + task_id)
+    if not raw:
+        return None
+    status = json.loads(raw)
+    if status.pop("user_id", None) != user_id:
+        return None
+    return status
+
+async def sse_events(redis, task_id: str, start: int = 0) -> AsyncIterator[str]:
+    """
+    Server-sent events for the task's stage transitions from index `start` on, ending after
+    the terminal (complete/failed) event. Each event's `id` is its index, so a client
+    reconnecting with Last-Event-ID resumes right after it.
+    """
+    key = EVENTS_PREFIX + task_id
+    index = start
+    idle_since = time.monotonic()
+    while True:
+        raw_events = await redis.lrange(key, index, -1)
+        for raw in raw_events:
+            event = json.loads(raw)
+            yield sse_event("stage", event, event_id=index)
+            index += 1
+            if event.get("stage") in TERMINAL_STAGES:
+                return
+        if raw_events:
+            idle_since = time.monotonic()
+        elif not await redis.exists(STATUS_PREFIX + task_id):
+            return  # expired
+        elif time.monotonic() - idle_since >= HEARTBEAT_SECONDS:
+            yield ": keep-alive\n\n"
+            idle_since = time.monotonic()
+        await asyncio.sleep(EVENT_POLL_SECONDS)
@@ -2,11 +2,14 @@
 # app/services/generator.py
 import json
 import logging
-from app.core.config import gemini_model
+from typing import AsyncIterator
+from app.core.llm import generate_content, stream_content
+from app.core.metrics import llm_service
 
 log = logging.getLogger(__name__)
 
-def tailor_resume(current_resume: dict, job_description: str, gap_answers: dict = None) -> dict:
+@llm_service()
+async def tailor_resume(current_resume: dict, job_description: str, gap_answers: dict = None) -> dict:
     
     user_context = ""
     if gap_answers:
@@ -38,7 +41,7 @@ def tailor_resume(current_resume: dict, job_description: str, gap_answers: dict
     """
 
     try:
-        response = gemini_model.generate_content(
+        response = await generate_content(
             prompt, 
             generation_config={"response_mime_type": "application/json"}
         )
@@ -47,11 +50,8 @@ def tailor_resume(current_resume: dict, job_description: str, gap_answers: dict
         log.error(f"Tailoring Failed: {e}")
         raise ValueError("Failed to generate tailored resume")
 
-def write_cover_letter(current_resume: dict, job_description: str) -> str:
-    """
-    Generates a tailored cover letter based on the resume and JD.
-    """
-    prompt = f"""
+def _cover_letter_prompt(current_resume: dict, job_description: str) -> str:
+    return f"""
     You are an expert Career Coach. Write a professional, persuasive Cover Letter for this candidate.
 
     JOB DESCRIPTION:
@@ -73,9 +73,20 @@ def write_cover_letter(current_resume: dict, job_description: str) -> str:
     Return plain text.
     """
 
+@llm_service()
+async def write_cover_letter(current_resume: dict, job_description: str) -> str:
+    """
+    Generates a tailored cover letter based on the resume and JD.
+    """
     try:
-        response = gemini_model.generate_content(prompt)
+        response = await generate_content(_cover_letter_prompt(current_resume, job_description))
         return response.text.strip()
     except Exception as e:
         log.error(f"Cover Letter Generation Failed: {e}")
         raise ValueError("Failed to generate cover letter")
+
+@llm_service("write_cover_letter")
+async def stream_cover_letter(current_resume: dict, job_description: str) -> AsyncIterator[str]:
+    """Streams `write_cover_letter`'s text as Gemini generates it (strip the joined text)."""
+    async for text in stream_content(_cover_letter_prompt(current_resume, job_description)):
+        yield text
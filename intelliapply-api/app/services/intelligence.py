@@ -2,12 +2,14 @@
 # app/services/intelligence.py
 import json
 import logging
-from app.core.config import gemini_model
+from app.core.llm import generate_content
+from app.core.metrics import llm_service
 from app.schemas.resume import GapAnalysisResponse
 
 log = logging.getLogger(__name__)
 
-def analyze_gaps(resume_json: dict, job_description: str) -> GapAnalysisResponse:
+@llm_service()
+async def analyze_gaps(resume_json: dict, job_description: str) -> GapAnalysisResponse:
     """
     Compares Resume JSON vs Job Description.
     Returns a structured list of missing skills and questions.
@@ -48,7 +50,7 @@ def analyze_gaps(resume_json: dict, job_description: str) -> GapAnalysisResponse
     """
 
     try:
-        response = gemini_model.generate_content(
+        response = await generate_content(
             prompt, 
             generation_config={"response_mime_type": "application/json"}
         )
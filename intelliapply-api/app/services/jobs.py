@@ -1,12 +1,12 @@
 
 # app/services/jobs.py
-from app.core.config import supabase
+from app.repositories.jobs import jobs_repo
 import logging
 from datetime import datetime
 
 log = logging.getLogger(__name__)
 
-def batch_save_jobs(jobs_list: list[dict], user_id: str, search_id: str) -> int:
+async def batch_save_jobs(jobs_list: list[dict], user_id: str, search_id: str) -> int:
     """
     Saves a list of jobs in a single batch insert with OPTIMIZED deduplication.
     
@@ -26,24 +26,10 @@ def batch_save_jobs(jobs_list: list[dict], user_id: str, search_id: str) -> int:
          log.info("No valid URLs in batch. Skipping.")
          return 0
 
-    existing_urls = set()
-
     # 2. Query ONLY for these URLs in the DB
     try:
-        if not supabase:
-             raise Exception("Database not connected")
-
         # We paginate this check if batch is huge, but usually batch < 100
-        existing_jobs_res = supabase.table("jobs") \
-            .select("job_url") \
-            .eq("user_id", user_id) \
-            .in_("job_url", incoming_urls) \
-            .execute()
-        
-        if hasattr(existing_jobs_res, 'error') and existing_jobs_res.error:
-            raise Exception(str(existing_jobs_res.error))
-
-        existing_urls = set(job['job_url'] for job in existing_jobs_res.data)
+        existing_urls = await jobs_repo.existing_urls(user_id, incoming_urls)
         log.info(f"Found {len(existing_urls)} duplicates in DB out of {len(incoming_urls)} incoming.")
 
     except Exception as e:
@@ -95,11 +81,11 @@ def batch_save_jobs(jobs_list: list[dict], user_id: str, search_id: str) -> int:
     # 4. Single Batch Insert
     if jobs_to_save:
         log.info(f"Saving {len(jobs_to_save)} new jobs. Skipped {skipped_count}.")
-        insert_response = supabase.table("jobs").insert(jobs_to_save).execute()
-        
-        if hasattr(insert_response, 'error') and insert_response.error:
-            log.error(f"Batch insert failed: {insert_response.error}")
-            raise Exception(str(insert_response.error))
+        try:
+            await jobs_repo.insert(jobs_to_save)
+        except Exception as e:
+            log.error(f"Batch insert failed: {e}")
+            raise e
         
         return len(jobs_to_save)
     else:
@@ -1,104 +1,126 @@
 
 # app/services/parser.py
-import fitz  # PyMuPDF
+import asyncio
 import json
 import logging
-import time
-import random
+from bisect import bisect_left, bisect_right
 from google.api_core import exceptions
-from app.core.config import gemini_model
+from app.core.llm import generate_content
+from app.core.metrics import PARSE_SECONDS, llm_service, timed
 
 log = logging.getLogger(__name__)
 
+# A link only attaches to a block within this many points vertically.
+MAX_LINK_DY = 15
+
+class _BlockIndex:
+    """
+    Text blocks sorted by top edge, so the blocks that can be within MAX_LINK_DY
+    of a link are found with two bisects instead of scanning the whole page.
+    """
+
+    def __init__(self, blocks: list):
+        self.order = sorted(range(len(blocks)), key=lambda i: blocks[i][1])
+        self.tops = [blocks[i][1] for i in self.order]
+        # A block's bottom is at most this far below its top; bounds the search window.
+        self.max_height = max((b[3] - b[1] for b in blocks), default=0)
+
+    def candidates(self, y_mid: float) -> list[int]:
+        """Original indices (ascending) of blocks whose top lies in the reachable band."""
+        # Widened by 1pt so float rounding can never drop a block the exact check would accept.
+        lo = bisect_left(self.tops, y_mid - MAX_LINK_DY - self.max_height - 1)
+        hi = bisect_right(self.tops, y_mid + MAX_LINK_DY + 1)
+        return sorted(self.order[lo:hi])
+
+def _best_block_for_link(link_rect, blocks: list, index: _BlockIndex) -> int:
+    lx0, ly0, lx1, ly1 = link_rect
+    l_y_mid = (ly0 + ly1) / 2
+
+    best_block_idx = -1
+    min_score = float('inf')
+
+    # Candidates are visited in original order so ties resolve exactly as a full scan would.
+    for i in index.candidates(l_y_mid):
+        bx0, by0, bx1, by1 = blocks[i][:4]
+
+        # 1. Vertical distance from the link's center to the block's vertical range
+        if l_y_mid < by0:
+            dy = by0 - l_y_mid
+        elif l_y_mid > by1:
+            dy = l_y_mid - by1
+        else:
+            dy = 0
+
+        # 2. Strict Vertical Limit: further away, it likely belongs to another line.
+        if dy > MAX_LINK_DY:
+            continue
+
+        # 3. Horizontal distance
+        if lx1 < bx0:     # Link is left of text
+            dx = bx0 - lx1
+        elif lx0 > bx1:   # Link is right of text
+            dx = lx0 - bx1
+        else:             # Link overlaps text horizontally
+            dx = 0
+
+        # 4. Weighted Score
+        # We penalize vertical distance heavily (x50) so links stay on their own line.
+        # We penalize horizontal distance lightly so icons next to titles are caught.
+        score = dx + (dy * 50)
+
+        if score < min_score:
+            min_score = score
+            best_block_idx = i
+
+    return best_block_idx
+
+@timed(PARSE_SECONDS, stage="extract")
 def extract_text_with_inline_links(file_bytes: bytes) -> str:
     """
     Extracts text and associates links using a Weighted Proximity Metric.
     It heavily penalizes vertical misalignment to prevent links from 'drifting'
     to the line above or below.
     """
+    import fitz  # PyMuPDF, imported on first parse to keep it out of API startup
+
     doc = fitz.open(stream=file_bytes, filetype="pdf")
-    full_text = ""
+    lines = []
 
     for page in doc:
-        links = page.get_links()
         # Get text blocks: (x0, y0, x1, y1, "text", ...)
         blocks = page.get_text("blocks")
-        
-        # Map: block_index -> list of URLs
-        block_to_links = {i: set() for i in range(len(blocks))}
-        
-        for link in links:
+        index = _BlockIndex(blocks)
+
+        # Map: block_index -> set of URLs
+        block_to_links = {}
+
+        for link in page.get_links():
             if link["kind"] != fitz.LINK_URI:
                 continue
-            
-            # Link geometry
-            lx0, ly0, lx1, ly1 = link["from"]
-            l_y_mid = (ly0 + ly1) / 2
-            l_x_mid = (lx0 + lx1) / 2
-            
-            best_block_idx = -1
-            min_score = float('inf')
-            
-            for i, b in enumerate(blocks):
-                bx0, by0, bx1, by1, text, _, _ = b
-                b_y_mid = (by0 + by1) / 2
-                
-                # 1. Calculate Vertical Distance (dy)
-                # Distance from link's vertical center to the block's vertical range
-                if l_y_mid < by0:
-                    dy = by0 - l_y_mid
-                elif l_y_mid > by1:
-                    dy = l_y_mid - by1
-                else:
-                    dy = 0 # It's inside the vertical band
-                
-                # 2. Calculate Horizontal Distance (dx)
-                if lx1 < bx0:     # Link is left of text
-                    dx = bx0 - lx1
-                elif lx0 > bx1:   # Link is right of text
-                    dx = lx0 - bx1
-                else:             # Link overlaps text horizontally
-                    dx = 0
-                
-                # 3. Strict Vertical Limit
-                # If the link is more than 15pts away vertically, it likely belongs to another line.
-                if dy > 15:
-                    continue
-
-                # 4. Weighted Score
-                # We penalize vertical distance heavily (x50) so links stay on their own line.
-                # We penalize horizontal distance lightly so icons next to titles are caught.
-                score = dx + (dy * 50)
-                
-                if score < min_score:
-                    min_score = score
-                    best_block_idx = i
-            
+            best_block_idx = _best_block_for_link(link["from"], blocks, index)
             # Attach link to the winner
             if best_block_idx != -1:
-                block_to_links[best_block_idx].add(link["uri"])
-
-        # Reconstruct text
-        # Sort blocks by vertical position (reading order)
-        indexed_blocks = list(enumerate(blocks))
-        indexed_blocks.sort(key=lambda x: x[1][1]) 
-        
-        for original_idx, b in indexed_blocks:
-            text = b[4].strip()
+                block_to_links.setdefault(best_block_idx, set()).add(link["uri"])
+
+        # Reconstruct text in reading order (the index is already sorted by vertical position)
+        for original_idx in index.order:
+            text = blocks[original_idx][4].strip()
             if not text: continue
-            
+
             # Append links to the text line
-            urls = sorted(list(block_to_links[original_idx]))
-            for url in urls:
-                text += f" [LINK: {url}]"
-            
-            full_text += text + "\n"
+            urls = sorted(block_to_links.get(original_idx, ()))
+            lines.append("".join([text, *(f" [LINK: {url}]" for url in urls)]) + "\n")
 
-    return full_text
+    return "".join(lines)
 
-def parse_resume_to_json(file_bytes: bytes) -> dict:
-    raw_data = extract_text_with_inline_links(file_bytes)
-    
+async def parse_resume_to_json(file_bytes: bytes) -> dict:
+    raw_data = await asyncio.to_thread(extract_text_with_inline_links, file_bytes)
+    return await parse_resume_text_to_json(raw_data)
+
+@timed(PARSE_SECONDS, stage="llm")
+@llm_service()
+async def parse_resume_text_to_json(raw_data: str) -> dict:
+    """LLM stage of resume parsing: text (with `[LINK: url]` markers) -> structured JSON."""
     prompt = f"""
     You are a resume parser. Convert the text below into valid JSON.
     The text contains embedded links in the format `[LINK: url]`.
@@ -126,25 +148,17 @@ def parse_resume_to_json(file_bytes: bytes) -> dict:
     {raw_data}
     """
 
-    # --- RETRY LOGIC ---
-    max_retries = 3
-    base_delay = 2
-
-    for attempt in range(max_retries):
-        try:
-            response = gemini_model.generate_content(
-                prompt, 
-                generation_config={"response_mime_type": "application/json"}
-            )
-            return json.loads(response.text)
-            
-        except exceptions.ResourceExhausted:
-            wait_time = base_delay * (2 ** attempt) + random.uniform(0, 1)
-            log.warning(f"Rate limit hit (429). Retrying in {wait_time:.2f} seconds...")
-            time.sleep(wait_time)
-            
-        except Exception as e:
-            log.error(f"AI Parse Error: {e}")
-            raise ValueError(f"Failed to parse resume structure: {e}")
-
-    raise ValueError("Server is busy (Rate Limit Exceeded). Please try again in a minute.")
+    # Transient errors (429/5xx) are retried with non-blocking backoff by generate_content.
+    try:
+        response = await generate_content(
+            prompt,
+            generation_config={"response_mime_type": "application/json"}
+        )
+        return json.loads(response.text)
+
+    except (exceptions.ResourceExhausted, asyncio.TimeoutError):
+        raise ValueError("Server is busy (Rate Limit Exceeded). Please try again in a minute.")
+
+    except Exception as e:
+        log.error(f"AI Parse Error: {e}")
+        raise ValueError(f"Failed to parse resume structure: {e}")
@@ -0,0 +1,145 @@
+# app/services/pdf_cache.py
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Optional
+
+from app.core.config import PDF_CACHE_DIR, PDF_CACHE_MAX_MB
+from app.services.renderer import TEMPLATE_DIR
+
+log = logging.getLogger(__name__)
+
+# Templates each kind of document may be rendered with (auto-fit picks between the resume ones).
+TEMPLATES_BY_KIND = {
+    "resume": ("resume.html", "resume_compact.html"),
+    "cover_letter": ("cover_letter.html",),
+}
+
+class PdfCache:
+    """
+    Disk-backed, size-capped LRU of rendered PDFs.
+
+    Keys hash the canonical JSON of the inputs together with the template files' mtimes,
+    so editing a template invalidates its PDFs. Each entry is `<key>.pdf` plus a `<key>.json`
+    sidecar of response metadata; a hit touches the file, and eviction removes the
+    least recently touched entries once the directory exceeds `max_bytes`. The directory must
+    be private to this user (other users could otherwise plant or read PDFs); if it isn't,
+    the cache stays disabled.
+    """
+
+    def __init__(self, directory: str = PDF_CACHE_DIR, max_bytes: int = PDF_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self._usable: Optional[bool] = None
+
+    def _directory_ready(self) -> bool:
+        """Creates the directory (mode 0700) on first use; False if it isn't private to this user."""
+        if self._usable is None:
+            try:
+                os.makedirs(self.directory, mode=0o700, exist_ok=True)
+                info = os.stat(self.directory)
+                if info.st_uid != os.getuid():
+                    raise PermissionError("directory is owned by another user")
+                if info.st_mode & 0o077:
+                    os.chmod(self.directory, 0o700)
+                self._usable = True
+            except OSError as e:
+                log.error(f"PDF cache disabled ({self.directory}): {e}")
+                self._usable = False
+        return self._usable
+
+    @staticmethod
+    def make_key(kind: str, resume_data: dict, cover_letter_text: Optional[str] = None) -> str:
+        mtimes = {name: os.stat(TEMPLATE_DIR / name).st_mtime_ns for name in TEMPLATES_BY_KIND[kind]}
+        payload = json.dumps(
+            {"kind": kind, "data": resume_data, "text": cover_letter_text, "templates": mtimes},
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.directory, f"{key}.{ext}")
+
+    def get(self, key: str) -> Optional[tuple[bytes, dict]]:
+        if not self._directory_ready():
+            return None
+        try:
+            with open(self._path(key, "pdf"), "rb") as f:
+                pdf_bytes = f.read()
+            with open(self._path(key, "json")) as f:
+                meta = json.load(f)
+            os.utime(self._path(key, "pdf"))  # LRU: mark as recently used
+            return pdf_bytes, meta
+        except (OSError, ValueError):
+            return None
+
+    def touch(self, key: str) -> bool:
+        """Marks an entry as recently used; False if it isn't cached."""
+        if not self._directory_ready():
+            return False
+        try:
+            os.utime(self._path(key, "pdf"))
+            return os.path.exists(self._path(key, "json"))
+        except OSError:
+            return False
+
+    def put(self, key: str, pdf_bytes: bytes, meta: Optional[dict] = None) -> bool:
+        if not self._directory_ready():
+            return False
+        try:
+            # Write-then-rename so concurrent readers never see a partial file.
+            for ext, content, mode in (("json", json.dumps(meta or {}), "w"), ("pdf", pdf_bytes, "wb")):
+                tmp = self._path(key, f"{ext}.{os.getpid()}.tmp")
+                with open(tmp, mode) as f:
+                    f.write(content)
+                os.replace(tmp, self._path(key, ext))
+        except OSError as e:
+            log.warning(f"PDF cache write failed: {e}")
+            self._usable = None  # re-check (and re-create) the directory next time
+            return False
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(pdf_bytes)
+            if self._size > self.max_bytes:
+                self._evict()
+        return True
+
+    def _entries(self) -> list[os.DirEntry]:
+        try:
+            return [e for e in os.scandir(self.directory) if e.name.endswith(".pdf")]
+        except OSError:
+            return []
+
+    def _scan_size(self) -> int:
+        return sum(e.stat().st_size for e in self._entries())
+
+    def _evict(self) -> None:
+        """Removes least recently used PDFs until the cache is back under 90% of its cap."""
+        entries = sorted(self._entries(), key=lambda e: e.stat().st_mtime)
+        size = sum(e.stat().st_size for e in entries)
+        target = self.max_bytes * 0.9
+        evicted = 0
+        for entry in entries:
+            if size <= target:
+                break
+            key = entry.name[:-len(".pdf")]
+            size -= entry.stat().st_size
+            for ext in ("pdf", "json"):
+                try:
+                    os.remove(self._path(key, ext))
+                except OSError:
+                    pass
+            evicted += 1
+        self._size = size
+        log.info(f"PDF cache evicted {evicted} least recently used files.")
+
+pdf_cache = PdfCache()
@@ -0,0 +1,114 @@
+# app/services/render_pool.py
+import asyncio
+import functools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, TypeVar
+
+from app.core.config import RENDER_POOL_WORKERS, RENDER_QUEUE_LIMIT, RENDER_TIMEOUT_SECONDS
+from app.core.metrics import RENDER_SECONDS
+from app.services import renderer
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class RenderPoolSaturated(Exception):
+    """Raised when RENDER_QUEUE_LIMIT renders are already queued or running."""
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Renders submitted and not yet finished, including ones whose caller already timed out.
+_pending = 0
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=RENDER_POOL_WORKERS,
+            # Spawned (not forked) children: the parent runs an event loop and threads.
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=renderer.warm_up,
+        )
+        log.info(f"✅ Render pool started ({RENDER_POOL_WORKERS} processes, queue limit {RENDER_QUEUE_LIMIT})")
+    return _pool
+
+def _discard_pool(pool: ProcessPoolExecutor, kill: bool = False) -> None:
+    """Stops handing work to `pool` (the next render starts a fresh one); `kill` ends its processes."""
+    global _pool
+    if _pool is pool:
+        _pool = None
+    if kill:
+        # No public API for this before Python 3.14. Renders still queued or running on it
+        # fail with BrokenProcessPool, which run_render retries on the new pool.
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.kill()
+    pool.shutdown(wait=False)
+
+def _noop() -> None:
+    return None
+
+async def start_render_pool() -> None:
+    """Spawns and warms every render process up front so the first downloads don't pay for it."""
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    try:
+        await asyncio.gather(*(loop.run_in_executor(pool, _noop) for _ in range(RENDER_POOL_WORKERS)))
+    except Exception as e:
+        log.error(f"❌ Failed to warm the render pool: {e}")
+
+def shutdown_render_pool() -> None:
+    global _pool
+    if _pool is not None:
+        log.info("Shutting down render pool...")
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def _release(future) -> None:
+    global _pending
+    _pending -= 1
+    if not future.cancelled():
+        future.exception()  # retrieved here in case the caller already timed out
+
+async def run_render(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Runs a (picklable, module-level) render function in the process pool.
+    Raises RenderPoolSaturated when the queue is full and asyncio.TimeoutError after
+    RENDER_TIMEOUT_SECONDS. A timed-out render may be hung, so its pool is replaced and its
+    processes killed. If a worker dies (BrokenProcessPool), the render is retried once on a new pool.
+    """
+    global _pending
+    if _pending >= RENDER_QUEUE_LIMIT:
+        RENDER_SECONDS.labels(function=func.__name__, outcome="rejected").observe(0)
+        raise RenderPoolSaturated(f"{_pending} renders already queued.")
+
+    loop = asyncio.get_running_loop()
+    start, outcome = time.perf_counter(), "error"
+    try:
+        for attempt in range(2):
+            pool = _get_pool()
+            try:
+                future = loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+                _pending += 1
+                future.add_done_callback(_release)
+                # shield(): a timeout must not cancel the executor future (the slot is released on completion).
+                remaining = RENDER_TIMEOUT_SECONDS - (time.perf_counter() - start)
+                result = await asyncio.wait_for(asyncio.shield(future), timeout=max(remaining, 0))
+            except BrokenProcessPool:
+                _discard_pool(pool)
+                if attempt:
+                    raise
+                log.warning(f"Render pool broke during {func.__name__}; retrying on a new pool.")
+                continue
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                log.error(f"{func.__name__} timed out after {RENDER_TIMEOUT_SECONDS:.0f}s; replacing the render pool.")
+                _discard_pool(pool, kill=True)
+                raise
+            outcome = "ok"
+            return result
+        raise RuntimeError("unreachable")  # the loop always returns or raises
+    finally:
+        RENDER_SECONDS.labels(function=func.__name__, outcome=outcome).observe(time.perf_counter() - start)
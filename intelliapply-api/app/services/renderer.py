@@ -1,19 +1,56 @@
-
 # app/services/renderer.py
-from jinja2 import Environment, FileSystemLoader
-from xhtml2pdf import pisa
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
 from io import BytesIO
+from dataclasses import dataclass
+from pathlib import Path
 import os
+import threading
 import logging
-import fitz  # PyMuPDF
+from app.core.config import TEMPLATE_AUTO_RELOAD, TEMPLATE_BYTECODE_CACHE_DIR
 
 log = logging.getLogger(__name__)
 
+# intelliapply-api/templates, independent of the process's working directory.
+TEMPLATE_DIR = Path(__file__).resolve().parents[2] / "templates"
+TEMPLATE_NAMES = ("resume.html", "resume_compact.html", "cover_letter.html")
+
+def _build_environment() -> Environment:
+    # Cached bytecode is executed as-is, so the directory must be private to this user:
+    # Jinja's default creates (and checks) one with mode 0700.
+    bytecode_cache = None
+    try:
+        if TEMPLATE_BYTECODE_CACHE_DIR:
+            os.makedirs(TEMPLATE_BYTECODE_CACHE_DIR, mode=0o700, exist_ok=True)
+            info = os.stat(TEMPLATE_BYTECODE_CACHE_DIR)
+            if info.st_uid != os.getuid() or info.st_mode & 0o022:
+                raise RuntimeError("directory is not owned by this user or is writable by others")
+            bytecode_cache = FileSystemBytecodeCache(TEMPLATE_BYTECODE_CACHE_DIR)
+        else:
+            bytecode_cache = FileSystemBytecodeCache()
+    except (OSError, RuntimeError) as e:
+        log.warning(f"Template bytecode cache disabled ({TEMPLATE_BYTECODE_CACHE_DIR or 'default dir'}): {e}")
+
+    return Environment(
+        loader=FileSystemLoader(str(TEMPLATE_DIR)),
+        bytecode_cache=bytecode_cache,
+        # Compiled templates stay in memory; only dev mode re-checks the files.
+        auto_reload=TEMPLATE_AUTO_RELOAD,
+        cache_size=len(TEMPLATE_NAMES) * 2,
+    )
+
+# Built once per process; templates compile on first use (or load from the bytecode cache).
+env = _build_environment()
+
+def warm_up() -> None:
+    """Compiles every template and loads xhtml2pdf's fonts (run once per render process)."""
+    from xhtml2pdf import pisa
+
+    for name in TEMPLATE_NAMES:
+        env.get_template(name)
+    pisa.CreatePDF(src="<p>warm-up</p>", dest=BytesIO())
+
 def _generate_pdf_bytes(data: dict, template_name: str, extra_context: dict = None) -> bytes:
     """Internal helper to render a specific template to PDF bytes."""
-    # Assuming 'templates' folder is in the project root.
-    template_dir = os.path.join(os.getcwd(), "templates")
-    env = Environment(loader=FileSystemLoader(template_dir))
     template = env.get_template(template_name)
     
     # Merge data with any extra context (like cover letter text)
@@ -22,6 +59,9 @@ def _generate_pdf_bytes(data: dict, template_name: str, extra_context: dict = No
         context.update(extra_context)
 
     html_string = template.render(**context)
+
+    # xhtml2pdf/reportlab load slowly; renders run in the render pool, which imports them once.
+    from xhtml2pdf import pisa
     
     pdf_buffer = BytesIO()
     pisa_status = pisa.CreatePDF(
@@ -34,29 +74,143 @@ def _generate_pdf_bytes(data: dict, template_name: str, extra_context: dict = No
     
     return pdf_buffer.getvalue()
 
-def render_resume_pdf(resume_data: dict) -> bytes:
+# --- Auto-fit (standard vs compact resume) ---
+# Standard layout: letter page, 0.35in margins, 10pt text at line-height 1.2.
+STANDARD_LINE_HEIGHT_PT = 12.0
+STANDARD_TOP_MARGIN_PT = 0.35 * 72
+STANDARD_PAGE_LINES = (11 - 2 * 0.35) * 72 / STANDARD_LINE_HEIGHT_PT
+CHARS_PER_LINE = 125
+CHARS_PER_BULLET_LINE = 118
+# Predictions this far over one page skip the standard render entirely.
+COMPACT_CONFIDENCE = 1.08
+# Weight of each new measurement in the learned estimate correction.
+CORRECTION_ALPHA = 0.2
+# Every Nth compact prediction is rendered with the standard template anyway, so the correction
+# also learns from long resumes and can come back down after over-predicting.
+COMPACT_CHECK_EVERY = 10
+
+@dataclass
+class RenderResult:
+    pdf_bytes: bytes
+    template: str
+    # predicted_compact | standard | standard_overflow (the latter rendered twice)
+    path: str
+    predicted_lines: float
+
+class AutoFit:
     """
-    Renders the resume JSON into a PDF using Auto-Fit strategy.
+    Predicts whether a resume fits the standard template on one page from its line and
+    bullet counts, so long resumes go straight to the compact template.
+
+    The estimate is scaled by a correction learned from every standard render (measured
+    height / estimated height, as an EMA), so it converges on the real layout over time.
+    A sample of compact predictions is checked the same way rather than trusted blindly.
     """
-    log.info("Attempting rendering with Standard Template...")
-    pdf_bytes = _generate_pdf_bytes(resume_data, "resume.html")
-    
-    try:
+
+    def __init__(self):
+        self.correction = 1.0
+        self._compact_predictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _wrapped(text, chars_per_line: int = CHARS_PER_LINE) -> int:
+        text = str(text or "")
+        return max(1, -(-len(text) // chars_per_line)) if text.strip() else 0
+
+    def estimate_lines(self, data: dict) -> float:
+        """Rough height of the standard layout, in 10pt lines (before correction)."""
+        lines = 4.0  # name + contact rows
+        section = 2.0  # title, rule and spacing
+
+        if data.get("summary"):
+            lines += section + self._wrapped(data["summary"])
+
+        skills = data.get("skills") or {}
+        lines += section + sum(
+            self._wrapped(f"{category}: " + ", ".join(map(str, items or [])))
+            for category, items in (skills.items() if isinstance(skills, dict) else [])
+        )
+
+        lines += section
+        for job in data.get("experience") or []:
+            lines += 2.3 + sum(self._wrapped(b, CHARS_PER_BULLET_LINE) for b in job.get("bullets") or [])
+
+        projects = data.get("projects") or []
+        if projects:
+            lines += section
+        for proj in projects:
+            lines += 1.2
+            if proj.get("bullets"):
+                lines += sum(self._wrapped(b, CHARS_PER_BULLET_LINE) for b in proj["bullets"])
+            elif proj.get("description"):
+                lines += self._wrapped(proj["description"])
+            if proj.get("technologies"):
+                lines += self._wrapped("Technologies: " + ", ".join(map(str, proj["technologies"])))
+
+        lines += section + 2 * len(data.get("education") or [])
+        return lines
+
+    def predict_lines(self, data: dict) -> float:
+        return self.estimate_lines(data) * self.correction
+
+    def learn(self, estimated_lines: float, pdf_bytes: bytes) -> int:
+        """Measures a standard render, updates the correction and returns its page count."""
+        import fitz  # PyMuPDF
+
         doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        page_count = doc.page_count
-        doc.close()
-        
+        try:
+            page_count = doc.page_count
+            bottoms = [b[3] for b in doc[-1].get_text("blocks")]
+        finally:
+            doc.close()
+
+        if bottoms and estimated_lines > 0:
+            used_pt = (page_count - 1) * STANDARD_PAGE_LINES * STANDARD_LINE_HEIGHT_PT
+            used_pt += max(bottoms) - STANDARD_TOP_MARGIN_PT
+            ratio = (used_pt / STANDARD_LINE_HEIGHT_PT) / estimated_lines
+            with self._lock:
+                self.correction += CORRECTION_ALPHA * (ratio - self.correction)
+        return page_count
+
+    def _check_compact(self) -> bool:
+        with self._lock:
+            self._compact_predictions += 1
+            return self._compact_predictions % COMPACT_CHECK_EVERY == 0
+
+    def render(self, resume_data: dict) -> RenderResult:
+        estimated = self.estimate_lines(resume_data)
+        predicted = estimated * self.correction
+
+        if predicted > STANDARD_PAGE_LINES * COMPACT_CONFIDENCE:
+            if not self._check_compact():
+                log.info(f"Auto-fit: predicted {predicted:.0f} lines (page holds {STANDARD_PAGE_LINES:.0f}). Using Compact Template.")
+                return RenderResult(_generate_pdf_bytes(resume_data, "resume_compact.html"), "resume_compact.html", "predicted_compact", predicted)
+            log.info(f"Auto-fit: predicted {predicted:.0f} lines. Rendering Standard Template to check the prediction...")
+        else:
+            log.info(f"Auto-fit: predicted {predicted:.0f} lines. Rendering Standard Template...")
+        pdf_bytes = _generate_pdf_bytes(resume_data, "resume.html")
+        try:
+            page_count = self.learn(estimated, pdf_bytes)
+        except Exception as e:
+            log.error(f"Error checking PDF page count: {e}")
+            return RenderResult(pdf_bytes, "resume.html", "standard", predicted)
+
         if page_count > 1:
             log.info(f"Standard template resulted in {page_count} pages. Switching to Compact Template.")
-            pdf_bytes = _generate_pdf_bytes(resume_data, "resume_compact.html")
-        else:
-            log.info("Standard template fit on 1 page. Success.")
-            
-    except Exception as e:
-        log.error(f"Error checking PDF page count: {e}")
-        return pdf_bytes
-    
-    return pdf_bytes
+            return RenderResult(_generate_pdf_bytes(resume_data, "resume_compact.html"), "resume_compact.html", "standard_overflow", predicted)
+        return RenderResult(pdf_bytes, "resume.html", "standard", predicted)
+
+auto_fit = AutoFit()
+
+def render_resume(resume_data: dict) -> RenderResult:
+    """Renders the resume JSON into a PDF, reporting which template and auto-fit path were used."""
+    return auto_fit.render(resume_data)
+
+def render_resume_pdf(resume_data: dict) -> bytes:
+    """
+    Renders the resume JSON into a PDF using Auto-Fit strategy.
+    """
+    return render_resume(resume_data).pdf_bytes
 
 def render_cover_letter_pdf(resume_data: dict, cover_letter_text: str) -> bytes:
     """
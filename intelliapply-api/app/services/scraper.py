@@ -1,43 +1,239 @@
-
 # app/services/scraper.py
-import pandas as pd
-from jobspy import scrape_jobs
+import asyncio
 import logging
 import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, TypeVar
+
+from app.core.config import SCRAPE_MAX_THREADS
 
 log = logging.getLogger(__name__)
 
-def run_job_scrape(search_term: str, location: str, hours_old: int) -> list[dict]:
+T = TypeVar("T")
+
+# Redis key prefix (plus the arq job id) for a scrape_and_save run's progress, which the
+# API records as queued and the worker updates as each job board finishes.
+SCRAPE_PROGRESS_PREFIX = "scrape_progress:"
+SCRAPE_PROGRESS_TTL_SECONDS = 3600
+
+# We are removing "naukri" (blocked) and keeping the working ones
+SCRAPE_SITES = ["linkedin", "indeed", "glassdoor"]
+
+@dataclass(frozen=True)
+class SiteConfig:
+    timeout: int = 120       # seconds before we stop waiting for this board
+    results_wanted: int = 20
+
+# Per-board settings; a slow or blocked board only delays itself.
+SITE_CONFIGS: dict[str, SiteConfig] = {
+    "linkedin": SiteConfig(timeout=90, results_wanted=20),
+    "indeed": SiteConfig(timeout=60, results_wanted=20),
+    "glassdoor": SiteConfig(timeout=60, results_wanted=20),
+}
+
+@dataclass
+class SiteResult:
+    site: str
+    jobs: list[dict]
+    seconds: float
+    error: str | None = None
+
+@dataclass
+class SiteStats:
+    runs: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    total_seconds: float = 0.0
+    last_seconds: float = 0.0
+
+# In-process latency/failure counters per board (see get_site_stats).
+_site_stats: dict[str, SiteStats] = {}
+
+# Each board scrape runs in its own thread so boards (and scrape jobs) run concurrently.
+_scrape_executor = ThreadPoolExecutor(max_workers=SCRAPE_MAX_THREADS, thread_name_prefix="scraper")
+
+class _JobSpyErrors(logging.Handler):
+    """
+    Counts ERROR records per board from jobspy's `JobSpy:<Board>` loggers: jobspy catches a
+    board's request errors itself and only logs them, returning no jobs.
+    """
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.counts: Counter = Counter()
+        self.last: dict[str, str] = {}
+
+    def emit(self, record: logging.LogRecord) -> None:
+        site = record.name.removeprefix("JobSpy:").lower()
+        self.counts[site] += 1
+        self.last[site] = record.getMessage()
+
+    def attach(self) -> None:
+        for name, logger in list(logging.root.manager.loggerDict.items()):
+            if name.startswith("JobSpy:") and isinstance(logger, logging.Logger) and self not in logger.handlers:
+                logger.addHandler(self)
+
+_jobspy_errors = _JobSpyErrors()
+
+def _scrape_to_records(sites: list[str], search_term: str, location: str, hours_old: int,
+                       results_wanted: int, timeout: int) -> list[dict]:
+    """
+    Runs one jobspy scrape and returns sanitized records. Raises on scrape errors, including
+    the ones jobspy only logs, when they leave a board without results.
+    """
+    # jobspy (and pandas with it) is imported on first scrape, keeping it out of API startup.
+    from jobspy import scrape_jobs
+
+    _jobspy_errors.attach()
+    # Concurrent scrapes of the same board share its counter; an error there fails both.
+    errors_before = {site: _jobspy_errors.counts[site] for site in sites}
+    jobs_df = scrape_jobs(
+        site_name=sites,
+        search_term=search_term,
+        location=location,
+        country_indeed='India',
+        hours_old=hours_old,
+        job_type='fulltime',
+        results_wanted=results_wanted,
+        timeout=timeout
+    )
+
+    errors = [_jobspy_errors.last[site] for site in sites if _jobspy_errors.counts[site] > errors_before[site]]
+    if errors and jobs_df.empty:
+        raise RuntimeError("; ".join(errors))
+    if errors:
+        log.warning(f"jobspy [{', '.join(sites)}]: partial results after errors: {'; '.join(errors)}")
+    if jobs_df.empty:
+        return []
+
+    json_string = jobs_df.to_json(orient='records', date_format='iso')
+    return json.loads(json_string)
+
+def run_job_scrape(search_term: str, location: str, hours_old: int, sites: list[str] | None = None) -> list[dict]:
     """
     Uses JobSpy to scrape jobs based on a search config.
+    Pass `sites` to scrape a subset of SCRAPE_SITES (e.g. one board at a time).
     """
-    log.info(f"--- Starting jobspy scrape ---")
+    sites = sites or SCRAPE_SITES
+    log.info(f"--- Starting jobspy scrape ({', '.join(sites)}) ---")
     log.info(f"Term: {search_term}, Location: {location}, Hours: {hours_old}")
-    
+
     try:
-        jobs_df: pd.DataFrame = scrape_jobs(
-            # We are removing "naukri" (blocked) and keeping the working ones
-            site_name=["linkedin", "indeed", "glassdoor"], 
-            search_term=search_term,
-            location=location,
-            country_indeed='India',
-            hours_old=hours_old,
-            job_type='fulltime', 
+        jobs_list = _scrape_to_records(
+            sites, search_term, location, hours_old,
             results_wanted=20, # 20 per site
             timeout=120
         )
-        
-        if jobs_df.empty:
+
+        if not jobs_list:
             log.info("jobspy: No new jobs found matching criteria.")
             return []
-        
-        json_string = jobs_df.to_json(orient='records', date_format='iso')
-        jobs_list = json.loads(json_string)
-        
+
         log.info(f"jobspy: Found and sanitized {len(jobs_list)} potential new jobs.")
         return jobs_list
-        
+
     except Exception as e:
         log.error(f"jobspy: An error occurred during scraping.")
         log.error(f"jobspy: ERROR DETAILS: {e}")
         return []
+
+def _record_site_result(result: SiteResult, timed_out: bool = False) -> None:
+    stats = _site_stats.setdefault(result.site, SiteStats())
+    stats.runs += 1
+    stats.total_seconds += result.seconds
+    stats.last_seconds = result.seconds
+    if result.error:
+        stats.failures += 1
+    if timed_out:
+        stats.timeouts += 1
+
+async def _run_in_scrape_thread(func: Callable[[], T], timeout: float) -> tuple[T, float]:
+    """
+    Runs `func` on the scrape executor, allowing it `timeout` seconds from when its thread
+    starts (time spent queued for a thread doesn't count). Returns (result, run seconds).
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.create_future()
+
+    def mark_started():
+        if not started.done():
+            started.set_result(time.perf_counter())
+
+    def run():
+        loop.call_soon_threadsafe(mark_started)
+        return func()
+
+    future = loop.run_in_executor(_scrape_executor, run)
+    try:
+        await asyncio.wait({started, future}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        future.cancel()  # drops the scrape if it is still queued for a thread
+        raise
+    run_started = started.result() if started.done() else time.perf_counter()
+    remaining = timeout - (time.perf_counter() - run_started)
+    # On timeout the thread keeps running in the background, but we stop waiting for it.
+    result = await asyncio.wait_for(future, timeout=max(remaining, 0.001))
+    return result, time.perf_counter() - run_started
+
+async def _scrape_one_site(site: str, search_term: str, location: str, hours_old: int) -> SiteResult:
+    config = SITE_CONFIGS.get(site, SiteConfig())
+    started = time.perf_counter()
+    timed_out = False
+
+    try:
+        jobs, run_seconds = await _run_in_scrape_thread(
+            lambda: _scrape_to_records([site], search_term, location, hours_old, config.results_wanted, config.timeout),
+            timeout=config.timeout,
+        )
+        queued = time.perf_counter() - started - run_seconds
+        if queued >= 1:
+            log.info(f"jobspy [{site}]: waited {queued:.1f}s for a scrape thread.")
+        result = SiteResult(site, jobs, time.perf_counter() - started)
+    except asyncio.TimeoutError:
+        timed_out = True
+        result = SiteResult(site, [], time.perf_counter() - started, error=f"timed out after {config.timeout}s")
+    except Exception as e:
+        result = SiteResult(site, [], time.perf_counter() - started, error=str(e))
+
+    _record_site_result(result, timed_out)
+    if result.error:
+        log.error(f"jobspy [{site}]: {result.error} ({result.seconds:.1f}s)")
+    else:
+        log.info(f"jobspy [{site}]: Found {len(result.jobs)} jobs in {result.seconds:.1f}s")
+    return result
+
+async def scrape_sites_concurrently(
+    search_term: str, location: str, hours_old: int, sites: list[str] | None = None
+) -> AsyncIterator[SiteResult]:
+    """
+    Scrapes every board concurrently, each with its own timeout and results_wanted,
+    and yields each board's result as soon as it finishes (fastest first).
+    Failed or timed-out boards yield an empty result with `error` set.
+    """
+    sites = sites or SCRAPE_SITES
+    log.info(f"--- Starting concurrent jobspy scrape ({', '.join(sites)}) ---")
+    log.info(f"Term: {search_term}, Location: {location}, Hours: {hours_old}")
+
+    tasks = [asyncio.create_task(_scrape_one_site(site, search_term, location, hours_old)) for site in sites]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def get_site_stats() -> dict[str, dict]:
+    """Per-board run/failure/timeout counts and latencies since process start."""
+    return {
+        site: {
+            "runs": s.runs,
+            "failures": s.failures,
+            "timeouts": s.timeouts,
+            "last_seconds": round(s.last_seconds, 2),
+            "avg_seconds": round(s.total_seconds / s.runs, 2) if s.runs else 0.0,
+        }
+        for site, s in _site_stats.items()
+    }
@@ -1,37 +1,162 @@
 # arq_worker.py
+import asyncio
+import json
 import logging
 import os
+import time
 from datetime import datetime
 from typing import Optional
+from arq import Retry, func
 from arq.connections import RedisSettings
-from app.core.config import is_ready, supabase
-from app.services.ai_analysis import get_gemini_analysis
+from app.core.config import is_ready, WORKER_MAX_JOBS, LLM_MAX_IN_FLIGHT, WORKER_METRICS_PORT, CREW_JOB_TIMEOUT_SECONDS
+from app.core.adaptive import gemini_breaker
+from app.core.concurrency import shutdown_blocking_pool
+from app.core.metrics import track_job
+from app.core.rate_limit import gemini_limiter, llm_priority, BACKGROUND
+from app.repositories.client import close_db
+from app.repositories.jobs import jobs_repo
+from app.repositories.profiles import profiles_repo
+from app.core.cache import llm_cache
+from app.services import crew_tasks
+from app.services.ai_crew import run_resume_crew_cached, crew_error
+from app.services.ai_analysis import get_gemini_analysis, get_gemini_batch_analysis, pack_jobs_for_batch
 from app.services.jobs import batch_save_jobs
+from app.services.scraper import (
+    scrape_sites_concurrently, get_site_stats, SCRAPE_PROGRESS_PREFIX, SCRAPE_PROGRESS_TTL_SECONDS,
+)
 
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
 async def startup(ctx):
-    log.info("Arq worker is starting up...")
+    log.info(f"Arq worker is starting up (max_jobs={WORKER_MAX_JOBS}, llm_in_flight={LLM_MAX_IN_FLIGHT})...")
+    # Share the LLM response cache with the API through the worker's Redis connection.
+    llm_cache.bind(ctx['redis'])
+    # Draw from the same Gemini quota as the API; jobs below run at background priority.
+    gemini_limiter.bind(ctx['redis'])
+    # Drop cached profiles as soon as the API reports an edit.
+    ctx['profile_invalidations'] = asyncio.create_task(profiles_repo.listen_for_invalidations(ctx['redis']))
+    if WORKER_METRICS_PORT:
+        from prometheus_client import start_http_server
+        try:
+            start_http_server(WORKER_METRICS_PORT)
+            log.info(f"✅ Worker metrics on :{WORKER_METRICS_PORT}/metrics")
+        except OSError as e:
+            log.warning(f"⚠️ Worker metrics server not started: {e}")
 
 async def shutdown(ctx):
     log.info("Arq worker is shutting down...")
+    ctx['profile_invalidations'].cancel()
+    await close_db()
+    shutdown_blocking_pool()
 
 
+# --- JOB 1: SCRAPE-AND-SAVE PIPELINE ---
+async def _publish_scrape_progress(ctx, user_id: str, state: str, found: int, saved: int, timings: dict, **fields):
+    """Stores the pipeline's progress so the API can report it while the job is still running."""
+    progress = {"user_id": user_id, "state": state, "found": found, "saved": saved, "timings": timings, **fields}
+    try:
+        await ctx['redis'].set(
+            SCRAPE_PROGRESS_PREFIX + ctx['job_id'], json.dumps(progress), ex=SCRAPE_PROGRESS_TTL_SECONDS
+        )
+    except Exception as e:
+        log.warning(f"Failed to publish scrape progress: {e}")
+
+async def scrape_and_save(ctx, search_config: dict, user_id: str, search_id: str):
+    """
+    Scrapes each job board and saves its results as soon as that board returns,
+    so the dashboard (via Supabase Realtime) shows the first jobs without waiting
+    for the slowest site. Returns per-stage timings.
+    """
+    log.info(f"--- WORKER RECEIVED JOB: scrape_and_save ('{search_config.get('search_term')}', User: {user_id}) ---")
+
+    started = time.perf_counter()
+    timings = {"sites": {}, "first_save_s": None}
+    total_found = 0
+    total_saved = 0
+
+    try:
+        if not is_ready():
+            raise Exception("Worker not configured (Supabase/Gemini keys missing)")
+
+        # Boards are scraped concurrently; each one's results are saved as soon as it returns.
+        async for result in scrape_sites_concurrently(
+            search_config["search_term"],
+            search_config["location"],
+            search_config.get("hours_old", 24),
+        ):
+            site, jobs = result.site, result.jobs
+            scrape_s = result.seconds
+
+            save_started = time.perf_counter()
+            saved = await batch_save_jobs(jobs, user_id, search_id) if jobs else 0
+            save_s = time.perf_counter() - save_started
+
+            if saved and timings["first_save_s"] is None:
+                timings["first_save_s"] = round(time.perf_counter() - started, 2)
+
+            total_found += len(jobs)
+            total_saved += saved
+            timings["sites"][site] = {
+                "found": len(jobs),
+                "saved": saved,
+                "scrape_s": round(scrape_s, 2),
+                "save_s": round(save_s, 2),
+                "error": result.error,
+            }
+            log.info(f"scrape_and_save: {site} -> found {len(jobs)}, saved {saved} (scrape {scrape_s:.1f}s, save {save_s:.1f}s)")
+            await _publish_scrape_progress(ctx, user_id, "running", total_found, total_saved, timings)
+    except BaseException as e:
+        # Also covers the job timing out (CancelledError), so pollers see a terminal state.
+        log.error(f"scrape_and_save failed: {e!r}")
+        timings["total_s"] = round(time.perf_counter() - started, 2)
+        await _publish_scrape_progress(
+            ctx, user_id, "failed", total_found, total_saved, timings, error=str(e) or type(e).__name__
+        )
+        raise
+
+    timings["total_s"] = round(time.perf_counter() - started, 2)
+    timings["site_stats"] = get_site_stats()
+    await _publish_scrape_progress(ctx, user_id, "complete", total_found, total_saved, timings)
+    log.info(f"--- WORKER FINISHED JOB: scrape_and_save ({total_saved}/{total_found} saved in {timings['total_s']}s) ---")
+    return {"status": "ok", "found": total_found, "saved": total_saved, "timings": timings}
+
 # --- JOB 2: ON-DEMAND AI ANALYST (No changes) ---
-async def analyze_job_on_demand(ctx, job_id: int, profile_id: str, description: Optional[str] = None):
+# How many times a batch's unrated jobs are re-queued while the Gemini circuit breaker is open.
+MAX_BREAKER_DEFERRALS = 5
+
+def _defer_while_circuit_open() -> None:
+    """
+    Puts an analysis job back on the queue instead of running it into the breaker: while it
+    is open, and while it is half-open with its one probe call already taken.
+    """
+    if gemini_breaker.rejects(BACKGROUND):
+        defer = gemini_breaker.retry_after()
+        log.warning(f"Gemini circuit breaker is {gemini_breaker.state}; deferring job by {defer:.0f}s.")
+        raise Retry(defer=defer)
+
+async def cached_gemini_analysis(resume_context: str, job_description: str, experience_level: str, bypass_cache: bool = False):
+    return await llm_cache.get_or_compute(
+        "get_gemini_analysis",
+        {"resume_context": resume_context, "job_description": job_description, "experience_level": experience_level},
+        lambda: get_gemini_analysis(resume_context, job_description, experience_level),
+        bypass=bypass_cache,
+    )
+
+@llm_priority(BACKGROUND)
+async def analyze_job_on_demand(ctx, job_id: int, profile_id: str, description: Optional[str] = None, bypass_cache: bool = False):
     log.info(f"--- WORKER RECEIVED JOB: analyze_job_on_demand (Job ID: {job_id}, Profile ID: {profile_id}) ---")
     
     if not is_ready():
         raise Exception("Worker not configured (Supabase/Gemini keys missing)")
+    _defer_while_circuit_open()
 
     job_description = description 
 
     try:
         if not job_description:
             log.info(f"No description provided, fetching job {job_id} from DB...")
-            job_res = supabase.table("jobs").select("id, description").eq("id", job_id).single().execute()
-            job = job_res.data
+            job = await jobs_repo.get(job_id, columns="id, description")
             if not job: raise Exception(f"Job {job_id} not found.")
             if not job.get("description"): raise Exception(f"Job {job_id} has no description in DB.")
             job_description = job.get("description")
@@ -39,17 +164,18 @@ async def analyze_job_on_demand(ctx, job_id: int, profile_id: str, description:
             log.info(f"Using provided description for job {job_id}.")
 
         log.info(f"Fetching profile {profile_id}...")
-        profile_res = supabase.table("profiles").select("resume_context, experience_level").eq("id", profile_id).single().execute()
-        profile = profile_res.data
+        profile = await profiles_repo.get_cached(profile_id, columns="resume_context, experience_level")
         if not profile: raise Exception(f"Profile {profile_id} not found.")
 
-        ai_result = get_gemini_analysis(
+        ai_result = await cached_gemini_analysis(
             resume_context=profile.get("resume_context"),
             job_description=job_description,
-            experience_level=profile.get("experience_level", "entry_level")
+            experience_level=profile.get("experience_level", "entry_level"),
+            bypass_cache=bypass_cache
         )
         
         if not ai_result:
+            _defer_while_circuit_open()
             raise Exception("AI analysis failed to return valid data.")
 
         update_data = {
@@ -60,22 +186,148 @@ async def analyze_job_on_demand(ctx, job_id: int, profile_id: str, description:
         }
         
         log.info(f"Updating job {job_id} with AI rating: {ai_result.get('gemini_rating')}/10")
-        supabase.table("jobs").update(update_data).eq("id", job_id).execute()
+        await jobs_repo.update(job_id, update_data)
         
         log.info(f"--- WORKER FINISHED JOB: analyze_job_on_demand (Job ID: {job_id}) ---")
         return {"status": "ok", "job_id": job_id, "rating": update_data["gemini_rating"]}
 
+    except Retry:
+        raise
     except Exception as e:
         log.error(f"Failed to process job {job_id}: {e}")
         raise e
 
+# --- JOB 3: BATCH AI ANALYST ---
+@llm_priority(BACKGROUND)
+async def analyze_jobs_batch(ctx, profile_id: str, job_ids: list[int], deferrals: int = 0):
+    """
+    Rates a chunk of jobs. Payloads carry only IDs; descriptions are fetched here in one
+    query and packed into token-budgeted Gemini calls. Any job whose batch output is
+    missing or malformed falls back to a single-job analysis. Jobs left unrated because
+    the Gemini circuit breaker opened are re-queued for after its cooldown.
+    """
+    log.info(f"--- WORKER RECEIVED JOB: analyze_jobs_batch ({len(job_ids)} jobs, Profile ID: {profile_id}) ---")
+
+    if not is_ready():
+        raise Exception("Worker not configured (Supabase/Gemini keys missing)")
+    _defer_while_circuit_open()
+
+    profile = await profiles_repo.get_cached(profile_id, columns="resume_context, experience_level")
+    if not profile: raise Exception(f"Profile {profile_id} not found.")
+
+    resume_context = profile.get("resume_context")
+    experience_level = profile.get("experience_level", "entry_level")
+
+    jobs = [job for job in await jobs_repo.get_many(job_ids, columns="id, description") if job.get("description")]
+    if len(jobs) < len(job_ids):
+        log.warning(f"{len(job_ids) - len(jobs)} jobs were missing or had no description. Skipping them.")
+
+    batches = pack_jobs_for_batch(jobs)
+    ratings = {}
+    for batch_ratings in await asyncio.gather(
+        *(get_gemini_batch_analysis(resume_context, batch, experience_level) for batch in batches)
+    ):
+        ratings.update(batch_ratings)
+
+    async def save(job: dict) -> bool:
+        ai_result = ratings.get(job["id"])
+        if not ai_result:
+            log.info(f"Falling back to single-job analysis for job {job['id']}.")
+            ai_result = await cached_gemini_analysis(
+                resume_context=resume_context,
+                job_description=job["description"],
+                experience_level=experience_level
+            )
+        if not ai_result:
+            log.error(f"AI analysis failed for job {job['id']}.")
+            return False
+
+        update_data = {
+            "gemini_rating": ai_result.get("gemini_rating"),
+            "ai_reason": ai_result.get("ai_reason"),
+            "profile_id": profile_id,
+        }
+        await jobs_repo.update(job["id"], update_data)
+        return True
+
+    saved = await asyncio.gather(*(save(job) for job in jobs), return_exceptions=True)
+    for job, result in zip(jobs, saved):
+        if isinstance(result, Exception):
+            log.error(f"Failed to save rating for job {job['id']}: {result}")
+    ok = sum(1 for s in saved if s is True)
+    fallbacks = len(jobs) - len(ratings)
+
+    unrated = [job["id"] for job, result in zip(jobs, saved) if result is not True]
+    deferred = 0
+    if unrated and gemini_breaker.rejects(BACKGROUND) and deferrals < MAX_BREAKER_DEFERRALS:
+        defer = gemini_breaker.retry_after()
+        await ctx['redis'].enqueue_job('analyze_jobs_batch', profile_id, unrated, deferrals + 1, _defer_by=defer)
+        deferred = len(unrated)
+        log.warning(
+            f"Gemini circuit breaker is {gemini_breaker.state}; re-queued {deferred} unrated jobs for {defer:.0f}s from now."
+        )
+
+    log.info(f"--- WORKER FINISHED JOB: analyze_jobs_batch ({ok}/{len(jobs)} rated, {fallbacks} fallbacks) ---")
+    return {"status": "ok", "rated": ok, "total": len(jobs), "fallbacks": fallbacks, "deferred": deferred}
+
+# --- JOB 4: RESUME OPTIMIZATION CREW (async mode of the /ai optimized-resume endpoints) ---
+async def generate_optimized_resume(ctx, user_id: str, job_description: str, resume_context: str, profile_data: dict):
+    """
+    Runs the resume crew for a task queued by the API (the arq job id is the task id),
+    publishing each stage transition and the final result to app.services.crew_tasks.
+    """
+    task_id = ctx['job_id']
+    redis = ctx['redis']
+    log.info(f"--- WORKER RECEIVED JOB: generate_optimized_resume (Task: {task_id}, User: {user_id}) ---")
+    loop = asyncio.get_running_loop()
+
+    def on_stage(stage: str):
+        # Called from the crew's thread; publish on the worker's loop, in order.
+        try:
+            asyncio.run_coroutine_threadsafe(
+                crew_tasks.publish_stage(redis, task_id, user_id, stage), loop
+            ).result(timeout=10)
+        except Exception as e:
+            log.warning(f"Failed to publish crew stage '{stage}' for task {task_id}: {e}")
+
+    try:
+        if not is_ready():
+            raise Exception("Worker not configured (Supabase/Gemini keys missing)")
+        await crew_tasks.publish_stage(redis, task_id, user_id, crew_tasks.ANALYZING)
+        optimized_resume = await run_resume_crew_cached(
+            job_description=job_description,
+            resume_context=resume_context,
+            profile_data=profile_data,
+            on_stage=on_stage,
+        )
+        error = crew_error(optimized_resume)
+        if error:
+            raise Exception(error)
+    except BaseException as e:
+        # Also covers the job timing out (CancelledError), so clients never wait on a dead task.
+        log.error(f"Resume crew task {task_id} failed: {e!r}")
+        await crew_tasks.publish_stage(redis, task_id, user_id, crew_tasks.FAILED, error=str(e) or type(e).__name__)
+        raise
+
+    await crew_tasks.publish_stage(
+        redis, task_id, user_id, crew_tasks.COMPLETE, result={"optimized_resume": optimized_resume}
+    )
+    log.info(f"--- WORKER FINISHED JOB: generate_optimized_resume (Task: {task_id}) ---")
+    return {"status": "ok", "task_id": task_id}
+
 # --- WORKER SETTINGS (THIS IS THE IMPORTANT CHANGE) ---
 class WorkerSettings:
     functions = [
-        analyze_job_on_demand,
+        func(track_job(scrape_and_save), timeout=300),
+        track_job(analyze_job_on_demand),
+        track_job(analyze_jobs_batch),
+        # Crew runs take minutes; a failed run is reported to the client rather than retried.
+        func(track_job(generate_optimized_resume), timeout=CREW_JOB_TIMEOUT_SECONDS, max_tries=1),
     ] 
     on_startup = startup
     on_shutdown = shutdown
+    # Jobs are I/O-bound (Gemini + Supabase), so one process can run many at once.
+    max_jobs = WORKER_MAX_JOBS
     # --- THIS IS THE FIX ---
     redis_settings = RedisSettings.from_dsn(os.getenv('REDIS_URL', 'redis://127.0.0.1:6379'))
     # --- END OF FIX ---
\ No newline at end of file
@@ -0,0 +1,129 @@
+# benchmarks/bench_adaptive_concurrency.py
+"""
+Background Gemini calls against a stub model that can only serve `--capacity` calls at once:
+past that it answers 429 (ResourceExhausted), and latency grows with load below it.
+
+  - fixed:    the old fixed in-flight cap (LLM_MAX_IN_FLIGHT) with no circuit breaker
+  - adaptive: the AIMD limiter and circuit breaker from app.core.adaptive
+
+Each call goes through app.core.llm.generate_content with the normal retry policy; a call
+that still fails (or is failed fast by the breaker) is re-run after a short wait, the way
+an arq job would be retried/deferred. The shared Redis rate limiter is left unbound so only
+the in-flight control is measured.
+
+Run from intelliapply-api/:
+    python -m benchmarks.bench_adaptive_concurrency --calls 300 --capacity 8
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from types import SimpleNamespace
+
+from google.api_core import exceptions
+
+from app.core import llm, services
+from app.core.adaptive import AdaptiveLimiter, CircuitBreaker, CircuitOpenError
+from app.core.config import LLM_MAX_IN_FLIGHT
+from app.core.rate_limit import BACKGROUND, current_llm_priority
+from app.core.retry import RETRYABLE_ERRORS
+
+
+class OverloadedModel:
+    """Serves `capacity` concurrent calls; anything beyond is rejected with a 429."""
+
+    def __init__(self, capacity: int, latency: float):
+        self.capacity = capacity
+        self.latency = latency
+        self.in_flight = 0
+        self.attempts = 0
+        self.rejected = 0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.attempts += 1
+        self.in_flight += 1
+        try:
+            if self.in_flight > self.capacity:
+                await asyncio.sleep(self.latency * 0.1)
+                self.rejected += 1
+                raise exceptions.ResourceExhausted("Resource has been exhausted (e.g. check quota).")
+            await asyncio.sleep(self.latency * (1 + self.in_flight / self.capacity))
+            return SimpleNamespace(text="{}", usage_metadata=None)
+        finally:
+            self.in_flight -= 1
+
+
+async def run(mode: str, args) -> dict:
+    model = OverloadedModel(args.capacity, args.latency)
+    services.override("gemini_model", model)
+    loop = asyncio.get_running_loop()
+    if mode == "fixed":
+        llm._in_flight[loop] = AdaptiveLimiter(max_limit=LLM_MAX_IN_FLIGHT, min_limit=LLM_MAX_IN_FLIGHT)
+        llm.gemini_breaker = CircuitBreaker(failure_rate=0)
+    else:
+        llm._in_flight[loop] = AdaptiveLimiter()
+        llm.gemini_breaker = CircuitBreaker(cooldown=args.cooldown)
+    current_llm_priority.set(BACKGROUND)
+
+    job_failures = 0
+    fast_fails = 0
+
+    async def job(i):
+        nonlocal job_failures, fast_fails
+        while True:
+            try:
+                return await llm.generate_content(f"job {i}")
+            except CircuitOpenError as e:
+                fast_fails += 1
+                await asyncio.sleep(e.retry_after or args.requeue_delay)
+            except RETRYABLE_ERRORS:
+                job_failures += 1
+                await asyncio.sleep(args.requeue_delay)
+
+    # Like a worker with max_jobs = --concurrency analysis jobs running at once.
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def one(i):
+        async with sem:
+            await job(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.calls)))
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": round(seconds, 2),
+        "calls_per_sec": round(args.calls / seconds, 2),
+        "gemini_attempts": model.attempts,
+        "rate_limited": model.rejected,
+        "failed_job_runs": job_failures,
+        "breaker_fast_fails": fast_fails,
+        "final_limit": round(llm._in_flight[loop].limit, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=100, help="Concurrent analysis jobs")
+    parser.add_argument("--capacity", type=int, default=8, help="Concurrent calls the stub serves before 429s")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub Gemini latency at no load (s)")
+    parser.add_argument("--cooldown", type=float, default=2.0, help="Breaker cooldown for the run (s)")
+    parser.add_argument("--requeue-delay", type=float, default=1.0, help="Wait before re-running a failed job (s)")
+    args = parser.parse_args()
+    # Retry warnings would drown the report.
+    logging.getLogger("app.core.retry").setLevel(logging.ERROR)
+
+    results = {mode: asyncio.run(run(mode, args)) for mode in ("fixed", "adaptive")}
+    print(json.dumps({
+        "calls": args.calls,
+        "concurrency": args.concurrency,
+        "capacity": args.capacity,
+        "llm_max_in_flight": LLM_MAX_IN_FLIGHT,
+        **results,
+        "speedup": round(results["fixed"]["seconds"] / results["adaptive"]["seconds"], 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_api_load.py
+"""
+Load test for a DB-bound endpoint under concurrency, served in-process by one event loop
+(like a single uvicorn worker):
+  - legacy: the pre-repository handler body (sync Supabase call inside `async def`)
+  - async:  the real POST /api/v1/jobs/{id}/update-status through JobsRepo
+
+Both use stub databases with the same per-query latency.
+
+Run from intelliapply-api/:
+    python -m benchmarks.bench_api_load --requests 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+import app.repositories.client as db_client
+from app.core.security import get_current_user
+from benchmarks.stubs import AsyncStubSupabase, StubSupabase
+from main import app
+
+ROWS = {"jobs": [{"id": 1}]}
+
+
+def install_legacy_route(sync_db: StubSupabase):
+    @app.post("/legacy/jobs/{job_id}/update-status")
+    async def legacy_update_status(job_id: int):
+        sync_db.table("jobs").update({"status": "Applied"}).eq("id", job_id).eq("user_id", "bench").execute()
+        return {"status": "ok"}
+
+
+async def load(path: str, n_requests: int, concurrency: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with sem:
+                response = await client.post(path, json={"status": "Applied"})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(n_requests)))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--db-latency", type=float, default=0.05, help="Stub Supabase latency (s)")
+    args = parser.parse_args()
+
+    app.dependency_overrides[get_current_user] = lambda: "bench"
+    install_legacy_route(StubSupabase(ROWS, latency=args.db_latency))
+    db_client._client = AsyncStubSupabase(ROWS, latency=args.db_latency)
+
+    legacy_s = asyncio.run(load("/legacy/jobs/1/update-status", args.requests, args.concurrency))
+    async_s = asyncio.run(load("/api/v1/jobs/1/update-status", args.requests, args.concurrency))
+
+    print(json.dumps({
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "db_latency_s": args.db_latency,
+        "legacy": {"seconds": round(legacy_s, 2), "requests_per_sec": round(args.requests / legacy_s, 1)},
+        "async": {"seconds": round(async_s, 2), "requests_per_sec": round(args.requests / async_s, 1)},
+        "speedup": round(legacy_s / async_s, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_autofit.py
+"""
+Auto-fit rendering vs the original render-twice strategy on synthetic resumes of mixed length:
+  - legacy:  render resume.html, count pages, re-render resume_compact.html if it overflows
+  - autofit: app.services.renderer.render_resume (predict, then verify standard renders and a
+             sample of compact predictions)
+
+Reports renders per resume, wall time, and how often both strategies chose the same template.
+
+Run from intelliapply-api/:
+    python -m benchmarks.bench_autofit --resumes 40
+"""
+import argparse
+import json
+import random
+import time
+from collections import Counter
+
+import fitz  # PyMuPDF
+
+from app.services.renderer import _generate_pdf_bytes, AutoFit
+
+WORDS = ("built scalable services with Python FastAPI Redis and Postgres reducing latency by "
+         "forty percent while leading a team of engineers across product design testing "
+         "deployment pipelines cloud infrastructure dashboards analytics and customer features").split()
+
+
+def sentence(rng: random.Random, lo: int, hi: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(lo, hi))).capitalize() + "."
+
+
+def make_resume(rng: random.Random) -> dict:
+    """Anything from a one-job graduate resume to a long multi-page CV."""
+    size = rng.random()
+    return {
+        "personal_info": {"name": "Jane Doe", "email": "jane@example.com", "phone": "555-0100",
+                          "linkedin": "https://linkedin.com/in/jane", "github": "https://github.com/jane",
+                          "portfolio": "", "location": "Remote"},
+        "summary": sentence(rng, 25, 60),
+        "skills": {k: rng.sample(WORDS, rng.randint(4, 12)) for k in ("languages", "frameworks", "tools")},
+        "experience": [
+            {"company": f"Company {i}", "role": "Software Engineer", "dates": "2020 - 2023",
+             "bullets": [sentence(rng, 10, 35) for _ in range(rng.randint(2, 3 + int(size * 4)))]}
+            for i in range(1 + int(size * 4))
+        ],
+        "projects": [
+            {"name": f"Project {i}", "github_url": "https://github.com/jane/p", "demo_url": "",
+             "bullets": [sentence(rng, 10, 30) for _ in range(rng.randint(1, 3))],
+             "technologies": rng.sample(WORDS, 4)}
+            for i in range(rng.randint(1, 2 + int(size * 3)))
+        ],
+        "education": [{"institution": "State University", "degree": "B.S. Computer Science", "dates": "2016 - 2020"}],
+    }
+
+
+def legacy_render(data: dict) -> tuple[bytes, str, int]:
+    pdf_bytes = _generate_pdf_bytes(data, "resume.html")
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    pages = doc.page_count
+    doc.close()
+    if pages > 1:
+        return _generate_pdf_bytes(data, "resume_compact.html"), "resume_compact.html", 2
+    return pdf_bytes, "resume.html", 1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--resumes", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    resumes = [make_resume(rng) for _ in range(args.resumes)]
+
+    start = time.perf_counter()
+    legacy = [legacy_render(r) for r in resumes]
+    legacy_s = time.perf_counter() - start
+
+    engine = AutoFit()  # fresh correction, so the run includes the learning phase
+    start = time.perf_counter()
+    results = [engine.render(r) for r in resumes]
+    autofit_s = time.perf_counter() - start
+
+    paths = Counter(r.path for r in results)
+    autofit_renders = paths["predicted_compact"] + paths["standard"] + 2 * paths["standard_overflow"]
+    agree = sum(r.template == l[1] for r, l in zip(results, legacy))
+
+    print(json.dumps({
+        "resumes": args.resumes,
+        "needed_compact": sum(l[1] == "resume_compact.html" for l in legacy),
+        "legacy": {"seconds": round(legacy_s, 2), "renders_per_resume": round(sum(l[2] for l in legacy) / args.resumes, 2)},
+        "autofit": {"seconds": round(autofit_s, 2), "renders_per_resume": round(autofit_renders / args.resumes, 2),
+                    "paths": dict(paths), "learned_correction": round(engine.correction, 3)},
+        "same_template": f"{agree}/{args.resumes}",
+        "speedup": round(legacy_s / autofit_s, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_import_time.py
+"""
+Startup guard: measures `import main` with `python -X importtime` in fresh interpreters and
+fails (exit code 1) if it exceeds the budget or if any heavy, lazily-loaded dependency is
+imported at startup.
+
+Run from intelliapply-api/:
+    python -m benchmarks.bench_import_time --budget-ms 1500
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Must only be imported on first use (see app.core.services and the services' local imports).
+LAZY_MODULES = (
+    "crewai", "pandas", "jobspy", "litellm", "langchain_core",
+    "google.generativeai", "supabase", "xhtml2pdf", "fitz",
+)
+
+PROBE = (
+    "import sys, main; "
+    f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+)
+
+
+def measure() -> tuple[int, list[tuple[int, str]], list[str]]:
+    """Returns (cumulative µs for `main`, [(cumulative µs, top-level module)], eagerly imported lazy modules)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        capture_output=True, text=True, check=True,
+    )
+    total_us, modules = 0, []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Names are indented two spaces per nesting level (after one separator space).
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() == "main":
+            total_us = int(cumulative)
+        elif depth == 1:
+            modules.append((int(cumulative), name.strip()))
+
+    eager = [m for m in proc.stdout.strip().splitlines()[-1].split(",") if m] if proc.stdout.strip() else []
+    return total_us, sorted(modules, reverse=True), eager
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--runs", type=int, default=3, help="Best of N fresh interpreters")
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    total_us, modules, eager = min(runs, key=lambda r: r[0])
+    total_ms = total_us / 1000
+
+    report = {
+        "import_main_ms": round(total_ms, 1),
+        "budget_ms": args.budget_ms,
+        "slowest_imports_ms": {name: round(us / 1000, 1) for us, name in modules[:args.top]},
+        "eager_heavy_modules": eager,
+        "ok": total_ms <= args.budget_ms and not eager,
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# benchmarks/bench_parser_links.py
+"""
+Micro-benchmark for link-to-block assignment in the resume parser:
+  - reference: the original full scan (every link scored against every block)
+  - indexed:   app.services.parser.extract_text_with_inline_links (bisect over sorted blocks)
+
+Uses a synthetic, link-dense PDF (default 10 pages, 300 links) and asserts both produce
+identical output before timing them.
+
+Run from intelliapply-api/:
+    python -m benchmarks.bench_parser_links --pages 10 --links 300
+"""
+import argparse
+import json
+import random
+import time
+
+import fitz  # PyMuPDF
+
+from app.services.parser import _BlockIndex, _best_block_for_link, extract_text_with_inline_links
+
+
+def reference_extract(file_bytes: bytes) -> str:
+    """The pre-index implementation, kept verbatim as the correctness oracle."""
+    doc = fitz.open(stream=file_bytes, filetype="pdf")
+    full_text = ""
+
+    for page in doc:
+        links = page.get_links()
+        blocks = page.get_text("blocks")
+        block_to_links = {i: set() for i in range(len(blocks))}
+
+        for link in links:
+            if link["kind"] != fitz.LINK_URI:
+                continue
+            lx0, ly0, lx1, ly1 = link["from"]
+            l_y_mid = (ly0 + ly1) / 2
+
+            best_block_idx = -1
+            min_score = float('inf')
+
+            for i, b in enumerate(blocks):
+                bx0, by0, bx1, by1, text, _, _ = b
+                if l_y_mid < by0:
+                    dy = by0 - l_y_mid
+                elif l_y_mid > by1:
+                    dy = l_y_mid - by1
+                else:
+                    dy = 0
+                if lx1 < bx0:
+                    dx = bx0 - lx1
+                elif lx0 > bx1:
+                    dx = lx0 - bx1
+                else:
+                    dx = 0
+                if dy > 15:
+                    continue
+                score = dx + (dy * 50)
+                if score < min_score:
+                    min_score = score
+                    best_block_idx = i
+
+            if best_block_idx != -1:
+                block_to_links[best_block_idx].add(link["uri"])
+
+        indexed_blocks = list(enumerate(blocks))
+        indexed_blocks.sort(key=lambda x: x[1][1])
+
+        for original_idx, b in indexed_blocks:
+            text = b[4].strip()
+            if not text: continue
+            urls = sorted(list(block_to_links[original_idx]))
+            for url in urls:
+                text += f" [LINK: {url}]"
+            full_text += text + "\n"
+
+    return full_text
+
+
+def reference_assign(pages: list) -> list:
+    """Full scan over pre-extracted (blocks, links) pages; same scoring as `reference_extract`."""
+    out = []
+    for blocks, links in pages:
+        for link in links:
+            lx0, ly0, lx1, ly1 = link["from"]
+            l_y_mid = (ly0 + ly1) / 2
+            best_block_idx, min_score = -1, float('inf')
+            for i, b in enumerate(blocks):
+                bx0, by0, bx1, by1 = b[:4]
+                dy = by0 - l_y_mid if l_y_mid < by0 else (l_y_mid - by1 if l_y_mid > by1 else 0)
+                dx = bx0 - lx1 if lx1 < bx0 else (lx0 - bx1 if lx0 > bx1 else 0)
+                if dy > 15:
+                    continue
+                score = dx + (dy * 50)
+                if score < min_score:
+                    min_score, best_block_idx = score, i
+            out.append(best_block_idx)
+    return out
+
+
+def indexed_assign(pages: list) -> list:
+    out = []
+    for blocks, links in pages:
+        index = _BlockIndex(blocks)
+        out.extend(_best_block_for_link(link["from"], blocks, index) for link in links)
+    return out
+
+
+def make_pdf(pages: int, links: int, seed: int = 7) -> bytes:
+    """Two-column pages of short text lines, with URI links scattered next to random lines."""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    per_page = max(1, links // pages)
+
+    for p in range(pages):
+        page = doc.new_page()
+        line_rects = []
+        y = 40
+        while y < 800:
+            for x in (40, 310):
+                text = f"Project {p}-{len(line_rects)}: built things with Python"
+                page.insert_text((x, y + 8), text, fontsize=8)
+                line_rects.append(fitz.Rect(x, y, x + fitz.get_text_length(text, fontsize=8), y + 10))
+            y += rng.choice((14, 18, 26))
+
+        for n in range(per_page):
+            target = rng.choice(line_rects)
+            x0 = target.x1 + rng.uniform(-60, 20)
+            y0 = target.y0 + rng.uniform(-8, 8)
+            page.insert_link({
+                "kind": fitz.LINK_URI,
+                "from": fitz.Rect(x0, y0, x0 + 12, y0 + 10),
+                "uri": f"https://github.com/user/project-{p}-{n}",
+            })
+
+    return doc.tobytes()
+
+
+def timed(fn, data, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--links", type=int, default=300)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    pdf = make_pdf(args.pages, args.links)
+    expected = reference_extract(pdf)
+    actual = extract_text_with_inline_links(pdf)
+    assert actual == expected, "Indexed link assignment diverged from the reference scan"
+
+    # Assignment stage alone, on geometry extracted once (PDF parsing dominates end-to-end time).
+    doc = fitz.open(stream=pdf, filetype="pdf")
+    pages = [
+        (page.get_text("blocks"), [l for l in page.get_links() if l["kind"] == fitz.LINK_URI])
+        for page in doc
+    ]
+    assert indexed_assign(pages) == reference_assign(pages), "Link assignments diverged"
+
+    reference_s = timed(reference_extract, pdf, args.repeats)
+    indexed_s = timed(extract_text_with_inline_links, pdf, args.repeats)
+    assign_reference_s = timed(reference_assign, pages, args.repeats)
+    assign_indexed_s = timed(indexed_assign, pages, args.repeats)
+
+    print(json.dumps({
+        "pages": args.pages,
+        "links": args.links,
+        "blocks": sum(len(blocks) for blocks, _ in pages),
+        "identical_output": True,
+        "assignment": {
+            "reference_ms": round(assign_reference_s * 1000, 2),
+            "indexed_ms": round(assign_indexed_s * 1000, 2),
+            "speedup": round(assign_reference_s / assign_indexed_s, 2),
+        },
+        "end_to_end": {
+            "reference_ms": round(reference_s * 1000, 2),
+            "indexed_ms": round(indexed_s * 1000, 2),
+            "speedup": round(reference_s / indexed_s, 2),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
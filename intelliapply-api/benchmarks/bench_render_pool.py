@@ -0,0 +1,100 @@
+# benchmarks/bench_render_pool.py
+"""
+PDF rendering on the event loop vs in the render process pool, served in-process (one event loop):
+  - inline: the pre-pool handler body (render_resume called directly inside `async def`)
+  - pool:   the real POST /api/v1/resume/render-pdf (app.services.render_pool)
+
+While the renders run, GET / is polled to show how long a cheap endpoint waits behind them.
+
+Run from intelliapply-api/:
+    python -m benchmarks.bench_render_pool --renders 16 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import httpx
+from fastapi import Body, Response
+
+from app.core.config import RENDER_QUEUE_LIMIT
+from app.services.render_pool import start_render_pool, shutdown_render_pool
+from app.services.renderer import render_resume
+from benchmarks.bench_autofit import make_resume
+from main import app
+
+
+def install_inline_route():
+    @app.post("/legacy/render-pdf")
+    async def legacy_render_pdf(resume_data: dict = Body(...)):
+        return Response(content=render_resume(resume_data).pdf_bytes, media_type="application/pdf")
+
+
+async def load(path: str, resumes: list[dict], concurrency: int) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120, follow_redirects=True) as client:
+        done = asyncio.Event()
+        probe_ms = []
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                (await client.get("/")).raise_for_status()
+                probe_ms.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.02)
+
+        async def render(data):
+            async with sem:
+                (await client.post(path, json=data)).raise_for_status()
+
+        probe_task = asyncio.create_task(probe())
+        await asyncio.sleep(0)  # let the first probe start
+        start = time.perf_counter()
+        await asyncio.gather(*(render(r) for r in resumes))
+        seconds = time.perf_counter() - start
+        done.set()
+        await probe_task
+
+    return {
+        "seconds": round(seconds, 2),
+        "renders_per_sec": round(len(resumes) / seconds, 2),
+        # Probes answered during the run; a blocked loop answers almost none.
+        "probes": len(probe_ms),
+        "probe_p50_ms": round(statistics.median(probe_ms), 1),
+        "probe_max_ms": round(max(probe_ms), 1),
+    }
+
+
+async def run(resumes: list[dict], concurrency: int) -> dict:
+    await start_render_pool()
+    try:
+        inline = await load("/legacy/render-pdf", resumes, concurrency)
+        pool = await load("/api/v1/resume/render-pdf", resumes, concurrency)
+    finally:
+        shutdown_render_pool()
+    return {"inline": inline, "pool": pool}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--renders", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=RENDER_QUEUE_LIMIT,
+                        help="Client-side concurrency (above RENDER_QUEUE_LIMIT the pool answers 503)")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    resumes = [make_resume(rng) for _ in range(args.renders)]
+    install_inline_route()
+
+    print(json.dumps({
+        "renders": args.renders,
+        "concurrency": args.concurrency,
+        **asyncio.run(run(resumes, args.concurrency)),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_worker_concurrency.py
+"""
+Compares worker throughput for `analyze_job_on_demand` with a stubbed Gemini model:
+  - legacy: sync Gemini/Supabase calls made directly inside the async job (blocks the loop)
+  - async:  the current worker path (async Gemini client + async repositories)
+
+Run from intelliapply-api/:
+    python -m benchmarks.bench_worker_concurrency --jobs 100 --latency 1.0
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import arq_worker
+import app.repositories.client as db_client
+from app.core import services
+from benchmarks.stubs import AsyncStubSupabase, StubGeminiModel, StubSupabase
+
+ROWS = {
+    "jobs": {"id": 1, "description": "Junior Python developer, FastAPI, React."},
+    "profiles": {"resume_context": "Python, FastAPI, React projects.", "experience_level": "entry_level"},
+}
+
+
+async def legacy_analyze(ctx, job_id: int, profile_id: str, model, db):
+    """The pre-async job body: every call blocks the event loop."""
+    db.table("profiles").select("resume_context, experience_level").eq("id", profile_id).single().execute()
+    response = model.generate_content("prompt")
+    json.loads(response.text)
+    db.table("jobs").update({}).eq("id", job_id).execute()
+
+
+async def run_jobs(job_fn, n_jobs: int, max_jobs: int) -> float:
+    # arq runs up to `max_jobs` jobs concurrently per worker; mirror that with a semaphore.
+    sem = asyncio.Semaphore(max_jobs)
+
+    async def one(i):
+        async with sem:
+            await job_fn(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_jobs)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=1.0, help="Mean stub Gemini latency (s)")
+    parser.add_argument("--db-latency", type=float, default=0.05, help="Stub Supabase latency (s)")
+    parser.add_argument("--max-jobs", type=int, default=arq_worker.WORKER_MAX_JOBS)
+    args = parser.parse_args()
+
+    model = StubGeminiModel(mean_latency=args.latency)
+    db = StubSupabase(ROWS, latency=args.db_latency)
+
+    # Point the real worker path at the stubs.
+    services.override("gemini_model", model)
+    db_client._client = AsyncStubSupabase(ROWS, latency=args.db_latency)
+    arq_worker.is_ready = lambda: True
+
+    legacy_s = asyncio.run(run_jobs(
+        lambda i: legacy_analyze({}, i, "p1", model, db), args.jobs, args.max_jobs
+    ))
+    async_s = asyncio.run(run_jobs(
+        lambda i: arq_worker.analyze_job_on_demand({}, i, "p1", ROWS["jobs"]["description"]), args.jobs, args.max_jobs
+    ))
+
+    print(json.dumps({
+        "jobs": args.jobs,
+        "max_jobs": args.max_jobs,
+        "llm_max_in_flight": arq_worker.LLM_MAX_IN_FLIGHT,
+        "legacy": {"seconds": round(legacy_s, 2), "jobs_per_sec": round(args.jobs / legacy_s, 2)},
+        "async": {"seconds": round(async_s, 2), "jobs_per_sec": round(args.jobs / async_s, 2)},
+        "speedup": round(legacy_s / async_s, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
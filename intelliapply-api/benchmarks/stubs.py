@@ -0,0 +1,345 @@
+# benchmarks/stubs.py
+"""
+In-process stand-ins for Gemini, Supabase, Redis and the CrewAI LLM so benchmarks run
+without network access.
+"""
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+LATENCY_DISTRIBUTIONS = ("lognormal", "uniform", "fixed")
+# Streamed stub responses: the first chunk arrives after this share of the call's latency,
+# the rest of the text follows in STREAM_CHUNKS roughly equal pieces.
+FIRST_CHUNK_SHARE = 0.1
+STREAM_CHUNKS = 8
+
+
+def default_gemini_response(prompt: str) -> str:
+    return json.dumps({"gemini_rating": 7, "ai_reason": "Stubbed analysis."})
+
+
+class StubGeminiModel:
+    """
+    Mimics `genai.GenerativeModel`. Latency is drawn around `mean_latency` seconds from a seeded
+    `distribution` (lognormal with `sigma`, uniform over [0.5x, 1.5x], or fixed), so runs are
+    repeatable; `respond(prompt)` returns the response text.
+    """
+
+    def __init__(self, mean_latency: float = 1.0, sigma: float = 0.25, seed: int = 7,
+                 distribution: str = "lognormal", respond: Callable[[str], str] = default_gemini_response):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {distribution!r}")
+        self.mean_latency = mean_latency
+        self.sigma = sigma
+        self.distribution = distribution
+        self.respond = respond
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    def _latency(self) -> float:
+        if self.distribution == "fixed":
+            return self.mean_latency
+        if self.distribution == "uniform":
+            return self.mean_latency * self._rng.uniform(0.5, 1.5)
+        return self.mean_latency * self._rng.lognormvariate(0, self.sigma)
+
+    def _response(self, prompt):
+        self.calls += 1
+        text = self.respond(str(prompt))
+        # Rough 4-characters-per-token estimate, so token metrics have something to count.
+        usage = SimpleNamespace(prompt_token_count=len(str(prompt)) // 4, candidates_token_count=len(text) // 4)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    def generate_content(self, prompt, **kwargs):
+        time.sleep(self._latency())
+        return self._response(prompt)
+
+    async def generate_content_async(self, prompt, stream: bool = False, **kwargs):
+        if stream:
+            return await self._stream(prompt)
+        await asyncio.sleep(self._latency())
+        return self._response(prompt)
+
+    async def _stream(self, prompt) -> "_StubStream":
+        # Like the SDK, returns once the first chunk is in; the rest arrive over the call's latency.
+        latency = self._latency()
+        await asyncio.sleep(latency * FIRST_CHUNK_SHARE)
+        response = self._response(prompt)
+        words = response.text.split(" ")
+        size = max(1, -(-len(words) // STREAM_CHUNKS))
+        chunks = [" ".join(words[i:i + size]) + (" " if i + size < len(words) else "") for i in range(0, len(words), size)]
+        return _StubStream(chunks, latency * (1 - FIRST_CHUNK_SHARE) / max(1, len(chunks) - 1), response.usage_metadata)
+
+
+class _StubStream:
+    """Mimics the SDK's AsyncGenerateContentResponse for `stream=True`."""
+
+    def __init__(self, chunks: list[str], interval: float, usage_metadata):
+        self.chunks = chunks
+        self.interval = interval
+        self.usage_metadata = usage_metadata
+        self.text = "".join(chunks)
+
+    async def __aiter__(self):
+        for i, chunk in enumerate(self.chunks):
+            if i:
+                await asyncio.sleep(self.interval)
+            yield SimpleNamespace(text=chunk)
+
+
+class _StubQuery:
+    def __init__(self, client, table: str):
+        self._client = client
+        self._table = table
+
+    def __getattr__(self, name):
+        # select/eq/in_/single/update/... all just continue the chain
+        return lambda *args, **kwargs: self
+
+    @property
+    def not_(self):
+        return self
+
+    def _response(self):
+        return SimpleNamespace(data=self._client.rows.get(self._table), count=0, error=None)
+
+    def execute(self):
+        time.sleep(self._client.latency)
+        return self._response()
+
+
+class StubSupabase:
+    """Mimics the sync supabase client's fluent table API with a fixed per-query latency."""
+
+    def __init__(self, rows: dict, latency: float = 0.05):
+        self.rows = rows
+        self.latency = latency
+
+    def table(self, name: str) -> _StubQuery:
+        return _StubQuery(self, name)
+
+
+class _AsyncStubQuery(_StubQuery):
+    async def execute(self):
+        await asyncio.sleep(self._client.latency)
+        return self._response()
+
+
+class AsyncStubSupabase(StubSupabase):
+    """Mimics the async supabase client (`await query.execute()`) with the same latency model."""
+
+    def table(self, name: str) -> _AsyncStubQuery:
+        return _AsyncStubQuery(self, name)
+
+
+# --- In-memory Supabase ---
+
+def _like(pattern: str) -> re.Pattern:
+    return re.compile("^" + ".*".join(re.escape(part) for part in pattern.split("%")) + "$", re.IGNORECASE | re.DOTALL)
+
+
+class _MemoryQuery:
+    """A PostgREST query builder over in-memory rows. Supports the filters the repositories use."""
+
+    def __init__(self, db: "InMemorySupabase", table: str):
+        self._db = db
+        self._table = table
+        self._action = "select"
+        self._columns = "*"
+        self._count = None
+        self._payload = None
+        self._filters: list[Callable[[dict], bool]] = []
+        self._negate = False
+        self._single: Optional[str] = None
+        self._limit: Optional[int] = None
+        self._order: Optional[tuple[str, bool]] = None
+
+    # --- actions ---
+    def select(self, *columns: str, count: Optional[str] = None):
+        self._columns = ",".join(columns) or "*"
+        self._count = count
+        return self
+
+    def insert(self, rows, **kwargs):
+        self._action, self._payload = "insert", rows
+        return self
+
+    def upsert(self, rows, **kwargs):
+        self._action, self._payload = "upsert", rows
+        return self
+
+    def update(self, data: dict, **kwargs):
+        self._action, self._payload = "update", data
+        return self
+
+    def delete(self, **kwargs):
+        self._action = "delete"
+        return self
+
+    # --- filters ---
+    def _filter(self, predicate: Callable[[dict], bool]):
+        negate, self._negate = self._negate, False
+        self._filters.append((lambda row: not predicate(row)) if negate else predicate)
+        return self
+
+    @property
+    def not_(self):
+        self._negate = True
+        return self
+
+    def eq(self, column: str, value):
+        return self._filter(lambda row: str(row.get(column)) == str(value))
+
+    def neq(self, column: str, value):
+        return self._filter(lambda row: str(row.get(column)) != str(value))
+
+    def in_(self, column: str, values):
+        wanted = {str(v) for v in values}
+        return self._filter(lambda row: str(row.get(column)) in wanted)
+
+    def ilike(self, column: str, pattern: str):
+        regex = _like(pattern)
+        return self._filter(lambda row: row.get(column) is not None and bool(regex.match(str(row[column]))))
+
+    def is_(self, column: str, value):
+        if str(value).lower() != "null":
+            return self._filter(lambda row: row.get(column) is value)
+        return self._filter(lambda row: row.get(column) is None)
+
+    # --- modifiers ---
+    def order(self, column: str, desc: bool = False, **kwargs):
+        self._order = (column, desc)
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self._limit = size
+        return self
+
+    def single(self):
+        self._single = "single"
+        return self
+
+    def maybe_single(self):
+        self._single = "maybe"
+        return self
+
+    # --- execution ---
+    def _project(self, row: dict) -> dict:
+        if self._columns.strip() == "*":
+            return dict(row)
+        return {c.strip(): row.get(c.strip()) for c in self._columns.split(",") if c.strip()}
+
+    def _run(self):
+        rows = self._db.tables.setdefault(self._table, [])
+        matched = [row for row in rows if all(f(row) for f in self._filters)]
+
+        if self._action in ("insert", "upsert"):
+            payload = self._payload if isinstance(self._payload, list) else [self._payload]
+            data = []
+            for item in payload:
+                row = dict(item)
+                existing = next((r for r in rows if "id" in row and r.get("id") == row["id"]), None)
+                if existing is not None and self._action == "upsert":
+                    existing.update(row)
+                    data.append(dict(existing))
+                    continue
+                row.setdefault("id", next(self._db.ids))
+                rows.append(row)
+                data.append(dict(row))
+        elif self._action == "update":
+            for row in matched:
+                row.update(self._payload)
+            data = [dict(row) for row in matched]
+        elif self._action == "delete":
+            self._db.tables[self._table] = [row for row in rows if row not in matched]
+            data = [dict(row) for row in matched]
+        else:
+            if self._order:
+                column, desc = self._order
+                matched.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+            data = [self._project(row) for row in matched[:self._limit]]
+
+        count = len(matched) if self._count else None
+        if self._single == "maybe":
+            return SimpleNamespace(data=data[0], count=count, error=None) if data else None
+        if self._single == "single":
+            if len(data) != 1:
+                raise RuntimeError(f"single() matched {len(data)} rows in {self._table}")
+            data = data[0]
+        return SimpleNamespace(data=data, count=count, error=None)
+
+    async def execute(self):
+        self._db.queries += 1
+        await asyncio.sleep(self._db.latency)
+        return self._run()
+
+
+class _MemoryBucket:
+    def __init__(self, db: "InMemorySupabase", bucket: str):
+        self._db = db
+        self._bucket = bucket
+
+    async def upload(self, path: str, content: bytes, file_options=None):
+        await asyncio.sleep(self._db.latency)
+        self._db.files[(self._bucket, path)] = content
+        return SimpleNamespace(path=path)
+
+    async def get_public_url(self, path: str) -> str:
+        return f"memory://{self._bucket}/{path}"
+
+
+class InMemorySupabase:
+    """
+    Mimics the async supabase client: `table()` builders that really filter, insert, update and
+    delete rows held in memory (`tables[name]` is a list of dicts), plus storage uploads.
+    Every query awaits `latency` seconds.
+    """
+
+    def __init__(self, tables: Optional[dict[str, list[dict]]] = None, latency: float = 0.02):
+        self.tables = {name: [dict(row) for row in rows] for name, rows in (tables or {}).items()}
+        self.latency = latency
+        self.files: dict[tuple[str, str], bytes] = {}
+        self.queries = 0
+        start = max((row.get("id", 0) for rows in self.tables.values() for row in rows
+                     if isinstance(row.get("id"), int)), default=0)
+        self.ids = itertools.count(start + 1)
+        self.storage = SimpleNamespace(from_=lambda bucket: _MemoryBucket(self, bucket))
+
+    def table(self, name: str) -> _MemoryQuery:
+        return _MemoryQuery(self, name)
+
+
+# --- Redis (fakeredis) ---
+
+def fake_arq_redis(server=None):
+    """An `ArqRedis` pool backed by an in-process fakeredis server (Lua needs `fakeredis[lua]`)."""
+    from arq.connections import ArqRedis
+    from fakeredis import FakeServer
+    from fakeredis.aioredis import FakeConnection
+    from redis.asyncio import ConnectionPool
+
+    return ArqRedis(connection_pool=ConnectionPool(connection_class=FakeConnection, server=server or FakeServer()))
+
+
+# --- CrewAI ---
+
+def make_stub_crew_llm(latency: float = 1.0, respond: Callable[[str], str] = lambda prompt: "Stubbed analysis."):
+    """
+    A CrewAI `BaseLLM` that sleeps `latency` seconds per call (crews run in a worker thread)
+    and answers with `respond(prompt)` in the agent's "Final Answer" format.
+    """
+    from crewai import BaseLLM
+
+    class StubCrewLLM(BaseLLM):
+        def call(self, messages, tools=None, callbacks=None, available_functions=None,
+                 from_task=None, from_agent=None, response_model=None):
+            time.sleep(latency)
+            prompt = messages if isinstance(messages, str) else "\n".join(str(m.get("content", "")) for m in messages)
+            return f"Thought: I now know the final answer\nFinal Answer: {respond(prompt)}"
+
+    return StubCrewLLM(model="stub/crew")
@@ -0,0 +1,643 @@
+# benchmarks/suite.py
+"""
+Offline end-to-end benchmarks: the real API routes and arq worker functions, served in-process
+against stand-ins (benchmarks.stubs) for Gemini, Supabase, Redis (fakeredis), the CrewAI LLM and
+the job boards. Nothing touches the network, and stub latencies are seeded, so runs are repeatable.
+
+Scenarios:
+  ingest            POST /resume/ingest with distinct PDFs (cold), then the same PDFs again (cached)
+  bulk-analyze      POST /jobs/bulk-analyze, then a burst-mode arq worker drains the batch jobs
+  optimized-resume  POST /ai/generate-optimized-resume (three-agent crew on a stub LLM), then the
+                    same requests again (analysis stages cached)
+  optimized-resume-async
+                    the same with async_mode: enqueue, run the crews on the worker, follow the
+                    stage events over SSE and fetch the results
+  cover-letter      POST /ai/generate-cover-letter vs. its /stream (SSE) variant: full-response
+                    latency against time to the first streamed chunk
+  render            POST /resume/render-pdf with distinct resumes (cold), repeats (PDF cache), then
+                    ETag revalidation of the GET /resume/pdf/{key} they redirect to
+  scrape-save       POST /scraper/trigger-scrape, then the worker's scrape_and_save with stub boards
+
+Results are printed (and optionally written) as JSON; `--compare` adds the change against an
+earlier run, so regressions show up between commits.
+
+Run from intelliapply-api/ (the extra dependencies are in benchmarks/requirements.txt):
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --scenario ingest --scenario render --compare bench.json
+"""
+import os
+import tempfile
+
+# Configure before importing the app: fake credentials make is_ready() true, and every client
+# they would reach is replaced below.
+os.environ.update({
+    "SUPABASE_URL": "http://supabase.invalid",
+    "SUPABASE_KEY": "bench",
+    "GEMINI_API_KEY": "bench",
+    "PDF_CACHE_DIR": tempfile.mkdtemp(prefix="bench-pdf-cache-"),
+    "WORKER_METRICS_PORT": "0",
+    "LITELLM_LOCAL_MODEL_COST_MAP": "True",
+    "CREWAI_DISABLE_TELEMETRY": "true",
+    "CREWAI_TRACING_ENABLED": "false",
+    "OTEL_SDK_DISABLED": "true",
+})
+
+import argparse
+import asyncio
+import contextlib
+import json
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import arq.worker
+import httpx
+from arq.worker import Worker
+
+import arq_worker
+import app.repositories.client as db_client
+import app.services.scraper as scraper
+from app.core import services
+from app.core.cache import llm_cache
+from app.core.config import RENDER_QUEUE_LIMIT, WORKER_MAX_JOBS
+from app.core.rate_limit import gemini_limiter
+from app.core.security import get_current_user
+from app.repositories.profiles import profiles_repo
+from app.services.render_pool import start_render_pool, shutdown_render_pool
+from benchmarks.stubs import (
+    LATENCY_DISTRIBUTIONS, InMemorySupabase, StubGeminiModel, fake_arq_redis, make_stub_crew_llm,
+)
+from main import app
+
+SCENARIOS = ("ingest", "bulk-analyze", "optimized-resume", "optimized-resume-async", "cover-letter", "render",
+             "scrape-save")
+
+USER_ID = "bench-user"
+PROFILE = {
+    "id": "bench-profile",
+    "user_id": USER_ID,
+    "full_name": "Jane Doe",
+    "email": "jane@example.com",
+    "phone": "555-0100",
+    "linkedin_url": "https://linkedin.com/in/jane",
+    "portfolio_url": "https://jane.dev",
+    "experience_level": "entry_level",
+    "resume_context": "Python, FastAPI and React developer. Built job-matching and analytics projects.",
+}
+
+# fakeredis has no INFO command, which arq only uses for a startup log line.
+async def _skip_redis_info(*args, **kwargs) -> None:
+    return None
+
+arq.worker.log_redis_info = _skip_redis_info
+
+
+# --- Stub responses ---
+
+def gemini_response(prompt: str) -> str:
+    """Shaped like the real outputs: batch ratings, a parsed resume, or a single rating."""
+    job_ids = re.findall(r"\[JOB (\d+)\]", prompt)
+    if job_ids:
+        return json.dumps({
+            job_id: {"gemini_rating": int(job_id) % 10 + 1, "ai_reason": "Stubbed batch rating."}
+            for job_id in dict.fromkeys(job_ids)
+        })
+    if "cover letter" in prompt:
+        return " ".join(["I am excited to apply for this role and bring my Python and FastAPI experience."] * 12)
+    if "resume parser" in prompt:
+        from benchmarks.bench_autofit import make_resume
+        return json.dumps(make_resume(random.Random(len(prompt))))
+    return json.dumps({"gemini_rating": 7, "ai_reason": "Stubbed analysis."})
+
+
+OPTIMIZED_RESUME = json.dumps({
+    "resume": {
+        "name": "Jane Doe", "phone": "555-0100", "email": "jane@example.com",
+        "linkedin": "https://linkedin.com/in/jane", "github": "https://github.com/jane", "portfolio": "https://jane.dev",
+        "summary": "Python developer focused on APIs.",
+        "skills": {"Backend": ["Python", "FastAPI"], "Frontend": ["React"]},
+        "experience": [{"role": "Engineer", "company": "Acme", "date": "2022 - 2024", "points": ["Built APIs."]}],
+        "projects": [{"name": "Matcher", "description": "Job matching.", "link": None}],
+    },
+    "rationale": "Stubbed rationale.",
+})
+
+
+def crew_response(prompt: str) -> str:
+    return OPTIMIZED_RESUME if "OptimizedResumeOutput" in prompt else "Python, FastAPI, React, REST APIs, SQL."
+
+
+# --- Harness ---
+
+class Harness:
+    """Fresh fakes for one scenario, wired into the app and the worker."""
+
+    def __init__(self, args, tables: Optional[dict[str, list[dict]]] = None):
+        self.model = StubGeminiModel(
+            mean_latency=args.llm_latency, sigma=args.llm_sigma, distribution=args.llm_distribution,
+            seed=args.seed, respond=gemini_response,
+        )
+        self.db = InMemorySupabase({"profiles": [PROFILE], **(tables or {})}, latency=args.db_latency)
+        self.redis = fake_arq_redis()
+
+        services.override("gemini_model", self.model)
+        db_client._client = self.db
+        app.state.redis = self.redis
+        llm_cache.bind(self.redis)
+        gemini_limiter.bind(self.redis)
+        profiles_repo._cache.clear()
+        app.dependency_overrides[get_current_user] = lambda: USER_ID
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=300)
+
+    async def drain_queue(self) -> dict:
+        """Runs a burst-mode arq worker (the real WorkerSettings functions) until the queue is empty."""
+        worker = Worker(
+            functions=arq_worker.WorkerSettings.functions,
+            redis_pool=self.redis,
+            burst=True,
+            max_jobs=WORKER_MAX_JOBS,
+            on_startup=arq_worker.startup,
+            poll_delay=0.01,
+            handle_signals=False,
+        )
+        start = time.perf_counter()
+        await worker.main()
+        # Not arq_worker.shutdown: it closes process-wide pools that later scenarios still use.
+        listener = worker.ctx["profile_invalidations"]
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        return {
+            "seconds": round(time.perf_counter() - start, 3),
+            "jobs_complete": worker.jobs_complete,
+            "jobs_failed": worker.jobs_failed,
+        }
+
+
+def latency_stats(samples_ms: list[float]) -> dict:
+    ordered = sorted(samples_ms)
+    return {
+        "p50_ms": round(statistics.median(ordered), 1),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        "max_ms": round(ordered[-1], 1),
+    }
+
+
+async def load(calls: list[Callable[[], Awaitable[httpx.Response]]], concurrency: int) -> dict:
+    """Runs the request callables with bounded concurrency; returns wall time and latency percentiles."""
+    sem = asyncio.Semaphore(concurrency)
+    samples, responses = [], []
+
+    async def one(call):
+        async with sem:
+            start = time.perf_counter()
+            response = await call()
+            samples.append((time.perf_counter() - start) * 1000)
+            if response.is_error:  # a 304 is a success here
+                response.raise_for_status()
+            responses.append(response)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(call) for call in calls))
+    seconds = time.perf_counter() - start
+    return {
+        "requests": len(calls),
+        "seconds": round(seconds, 3),
+        "requests_per_sec": round(len(calls) / seconds, 2),
+        **latency_stats(samples),
+        "_responses": responses,
+    }
+
+
+async def asgi_stream(method: str, path: str, body: Optional[dict] = None) -> AsyncIterator[bytes]:
+    """
+    Calls the app directly over ASGI and yields the response body as it is sent
+    (httpx's ASGITransport buffers the whole body, which would hide streaming).
+    """
+    payload = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json"),
+                    (b"content-length", str(len(payload)).encode())],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    messages: asyncio.Queue = asyncio.Queue()
+    disconnected = asyncio.Event()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    app_task = asyncio.create_task(app(scope, receive, messages.put))
+    try:
+        while True:
+            message = await messages.get()
+            if message["type"] == "http.response.start" and message["status"] >= 400:
+                raise RuntimeError(f"{method} {path} -> {message['status']}")
+            if message["type"] == "http.response.body":
+                if message.get("body"):
+                    yield message["body"]
+                if not message.get("more_body"):
+                    break
+    finally:
+        disconnected.set()
+        await app_task
+
+
+def public(result: dict) -> dict:
+    return {k: v for k, v in result.items() if not k.startswith("_")}
+
+
+# --- Scenarios ---
+
+# The synthetic-document helpers import PyMuPDF, which prints a notice to stdout; they are
+# imported inside the scenarios, while stdout is redirected.
+
+async def scenario_ingest(args) -> dict:
+    from benchmarks.bench_parser_links import make_pdf
+
+    h = Harness(args)
+    pdfs = [make_pdf(pages=2, links=12, seed=i) for i in range(args.ingest_files)]
+
+    def upload(i, pdf):
+        return lambda: client.post("/api/v1/resume/ingest", files={"file": (f"resume-{i}.pdf", pdf, "application/pdf")})
+
+    async with h.client() as client:
+        cold = await load([upload(i, pdf) for i, pdf in enumerate(pdfs)], args.concurrency)
+        llm_calls = h.model.calls
+        warm = await load([upload(i, pdf) for i, pdf in enumerate(pdfs)], args.concurrency)
+
+    return {
+        "files": len(pdfs),
+        "cold": public(cold),
+        "cached": public(warm),
+        "llm_calls": {"cold": llm_calls, "cached": h.model.calls - llm_calls},
+        "db_queries": h.db.queries,
+    }
+
+
+async def scenario_bulk_analyze(args) -> dict:
+    jobs = [
+        {"id": i, "user_id": USER_ID, "title": f"Python Developer {i}", "company": f"Company {i % 17}",
+         "description": f"Junior Python developer #{i}: FastAPI, SQL and React. " * 8,
+         "gemini_rating": None, "ai_reason": None}
+        for i in range(1, args.bulk_jobs + 1)
+    ]
+    h = Harness(args, tables={"jobs": jobs})
+
+    async with h.client() as client:
+        start = time.perf_counter()
+        response = await client.post("/api/v1/jobs/bulk-analyze", json={
+            "job_ids": [job["id"] for job in jobs], "profile_id": PROFILE["id"], "batch_mode": True,
+        })
+        response.raise_for_status()
+        enqueue_ms = (time.perf_counter() - start) * 1000
+
+    queued = await h.redis.zcard("arq:queue")
+    worker = await h.drain_queue()
+    rated = sum(1 for job in h.db.tables["jobs"] if job.get("gemini_rating") is not None)
+
+    return {
+        "jobs": len(jobs),
+        "enqueue_ms": round(enqueue_ms, 1),
+        "queued_arq_jobs": queued,
+        "worker": worker,
+        "rated": rated,
+        "jobs_per_sec": round(rated / worker["seconds"], 2) if worker["seconds"] else None,
+        "llm_calls": h.model.calls,
+        "db_queries": h.db.queries,
+    }
+
+
+async def scenario_optimized_resume(args) -> dict:
+    jobs = [{"id": i, "user_id": USER_ID, "description": f"Backend engineer #{i}: Python, FastAPI, SQL."}
+            for i in range(1, args.crew_requests + 1)]
+    h = Harness(args, tables={"jobs": jobs})
+    crew_calls = 0
+
+    def respond(prompt: str) -> str:
+        nonlocal crew_calls
+        crew_calls += 1
+        return crew_response(prompt)
+
+    services.override("crew_llm", make_stub_crew_llm(latency=args.crew_latency, respond=respond))
+
+    def request(job_id):
+        return lambda: client.post("/api/v1/ai/generate-optimized-resume",
+                                   json={"job_id": job_id, "profile_id": PROFILE["id"]})
+
+    async with h.client() as client:
+        result = await load([request(job["id"]) for job in jobs], args.concurrency)
+        cold_calls = crew_calls
+        # Same resume and jobs again: both analysis stages come from the cache.
+        repeat = await load([request(job["id"]) for job in jobs], args.concurrency)
+
+    valid = sum(1 for r in result["_responses"] if "resume" in json.loads(r.json()["optimized_resume"]))
+    return {
+        **public(result),
+        "valid_outputs": valid,
+        "crew_llm_calls": cold_calls,
+        "repeat": {**public(repeat), "crew_llm_calls": crew_calls - cold_calls},
+    }
+
+
+async def scenario_optimized_resume_async(args) -> dict:
+    jobs = [{"id": i, "user_id": USER_ID, "description": f"Backend engineer #{i}: Python, FastAPI, SQL."}
+            for i in range(1, args.crew_requests + 1)]
+    h = Harness(args, tables={"jobs": jobs})
+    services.override("crew_llm", make_stub_crew_llm(latency=args.crew_latency, respond=crew_response))
+
+    def request(job_id):
+        return lambda: client.post("/api/v1/ai/generate-optimized-resume",
+                                   json={"job_id": job_id, "profile_id": PROFILE["id"], "async_mode": True})
+
+    async def follow(task_id: str) -> list[str]:
+        stages = []
+        async with client.stream("GET", f"/api/v1/ai/crew-tasks/{task_id}/events") as response:
+            async for line in response.aiter_lines():
+                if line.startswith("data: "):
+                    stages.append(json.loads(line[len("data: "):])["stage"])
+        return stages
+
+    async with h.client() as client:
+        enqueue = await load([request(job["id"]) for job in jobs], args.concurrency)
+        task_ids = [r.json()["task_id"] for r in enqueue["_responses"]]
+        start = time.perf_counter()
+        stages, worker = await asyncio.gather(follow(task_ids[0]), h.drain_queue())
+        statuses = [(await client.get(f"/api/v1/ai/crew-tasks/{task_id}")).json() for task_id in task_ids]
+        total_s = time.perf_counter() - start
+
+    valid = sum(
+        1 for status in statuses
+        if status["stage"] == "complete" and "resume" in json.loads(status["result"]["optimized_resume"])
+    )
+    return {
+        "requests": len(jobs),
+        "enqueue": public(enqueue),
+        "worker": worker,
+        "total_s": round(total_s, 2),
+        "valid_outputs": valid,
+        "sse_stages": stages,
+    }
+
+
+async def scenario_cover_letter(args) -> dict:
+    h = Harness(args)
+
+    def body(i: int, bypass: bool) -> dict:
+        return {"profile_id": PROFILE["id"], "job_description": f"Backend engineer #{i}: Python, FastAPI, SQL.",
+                "company": f"Company {i}", "title": "Backend Engineer", "bypass_cache": bypass}
+
+    def request(i):
+        return lambda: client.post("/api/v1/ai/generate-cover-letter", json=body(i, True))
+
+    async def stream(i: int, bypass: bool) -> dict:
+        start = time.perf_counter()
+        first_ms, done, buffer = None, None, ""
+        async for data in asgi_stream("POST", "/api/v1/ai/generate-cover-letter/stream", body(i, bypass)):
+            buffer += data.decode()
+            while "\n\n" in buffer:
+                message, buffer = buffer.split("\n\n", 1)
+                fields = dict(line.split(": ", 1) for line in message.splitlines())
+                if fields.get("event") == "delta" and first_ms is None:
+                    first_ms = (time.perf_counter() - start) * 1000
+                elif fields.get("event") == "done":
+                    done = json.loads(fields["data"])
+        return {"first_ms": first_ms, "total_ms": (time.perf_counter() - start) * 1000, "done": done}
+
+    async with h.client() as client:
+        full = await load([request(i) for i in range(args.cover_letters)], args.concurrency)
+        streamed = await asyncio.gather(*(stream(i, True) for i in range(args.cover_letters)))
+        repeat = await asyncio.gather(*(stream(i, False) for i in range(args.cover_letters)))
+
+    same_shape = all(
+        set(s["done"]["result"]) == set(r.json()) for s, r in zip(streamed, full["_responses"])
+    )
+    return {
+        "requests": args.cover_letters,
+        "full_response": public(full),
+        "stream_first_chunk": latency_stats([s["first_ms"] for s in streamed]),
+        "stream_total": latency_stats([s["total_ms"] for s in streamed]),
+        "same_result_shape": same_shape,
+        "repeat_cached": sum(1 for r in repeat if r["done"]["cached"]),
+    }
+
+
+async def scenario_render(args) -> dict:
+    from benchmarks.bench_autofit import make_resume
+
+    h = Harness(args)
+    rng = random.Random(args.seed)
+    resumes = [make_resume(rng) for _ in range(args.renders)]
+    concurrency = min(args.concurrency, RENDER_QUEUE_LIMIT)  # above the limit the pool answers 503
+
+    def render(data):
+        # The POST redirects to GET /resume/pdf/{key}, which serves the cached PDF.
+        return lambda: client.post("/api/v1/resume/render-pdf", json=data, follow_redirects=True)
+
+    def revalidate(response):
+        # What a browser does with the cached GET: If-None-Match -> 304 without a body.
+        return lambda: client.get(response.url, headers={"If-None-Match": response.headers["ETag"]})
+
+    def cache_status(response):
+        return (response.history[0] if response.history else response).headers.get("X-PDF-Cache")
+
+    await start_render_pool()
+    try:
+        async with h.client() as client:
+            cold = await load([render(r) for r in resumes], concurrency)
+            warm = await load([render(r) for r in resumes], concurrency)
+            revalidated = await load([revalidate(r) for r in warm["_responses"]], concurrency)
+    finally:
+        shutdown_render_pool()
+
+    return {
+        "resumes": len(resumes),
+        "concurrency": concurrency,
+        "cold": public(cold),
+        "cached": public(warm),
+        "revalidated": public(revalidated),
+        "cache_hits": sum(cache_status(r) == "hit" for r in warm["_responses"]),
+        "not_modified": sum(r.status_code == 304 for r in revalidated["_responses"]),
+        "templates": {
+            template: sum(r.headers.get("X-Render-Template") == template for r in cold["_responses"])
+            for template in ("resume.html", "resume_compact.html")
+        },
+    }
+
+
+async def scenario_scrape_save(args) -> dict:
+    # A quarter of each board's results are already saved, so deduplication has work to do.
+    site_latency = {"linkedin": 1.5, "indeed": 0.8, "glassdoor": 1.0}
+    existing = [{"id": i + 1, "user_id": USER_ID, "job_url": f"https://jobs.example/linkedin/{i}"}
+                for i in range(args.scrape_results // 4)]
+    h = Harness(args, tables={"jobs": existing})
+
+    def stub_scrape(sites, search_term, location, hours_old, results_wanted, timeout):
+        time.sleep(site_latency.get(sites[0], 1.0) * args.scrape_latency)  # runs in the scraper's thread pool
+        return [
+            {"title": f"{search_term} {n}", "company": f"{sites[0].title()} Co {n % 7}",
+             "job_url": f"https://jobs.example/{sites[0]}/{n}", "description": "Python role.", "location": location}
+            for n in range(args.scrape_results)
+        ]
+
+    original, scraper._scrape_to_records = scraper._scrape_to_records, stub_scrape
+    try:
+        async with h.client() as client:
+            response = await client.post("/api/v1/scraper/trigger-scrape", json={
+                "search_term": "Python Developer", "location": "Remote", "hours_old": 24, "search_id": "bench-search",
+            })
+            response.raise_for_status()
+            job_id = response.json()["job_id"]
+
+            worker = await h.drain_queue()
+            progress = (await client.get(f"/api/v1/scraper/jobs/{job_id}")).json()
+    finally:
+        scraper._scrape_to_records = original
+
+    timings = progress.get("timings", {})
+    return {
+        "sites": len(site_latency),
+        "results_per_site": args.scrape_results,
+        "worker": worker,
+        "state": progress.get("state"),
+        "found": progress.get("found"),
+        "saved": progress.get("saved"),
+        "first_save_s": timings.get("first_save_s"),
+        "total_s": timings.get("total_s"),
+        "db_queries": h.db.queries,
+    }
+
+
+RUNNERS = {
+    "ingest": scenario_ingest,
+    "bulk-analyze": scenario_bulk_analyze,
+    "optimized-resume": scenario_optimized_resume,
+    "optimized-resume-async": scenario_optimized_resume_async,
+    "cover-letter": scenario_cover_letter,
+    "render": scenario_render,
+    "scrape-save": scenario_scrape_save,
+}
+
+
+# --- Reporting ---
+
+def _flatten(value, prefix: str = "") -> dict[str, float]:
+    if isinstance(value, dict):
+        out = {}
+        for key, item in value.items():
+            out.update(_flatten(item, f"{prefix}.{key}" if prefix else key))
+        return out
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    """Percent change of every numeric result present in both runs."""
+    out = {}
+    for name, result in current.items():
+        before = _flatten(baseline.get(name, {}))
+        changes = {
+            key: {"baseline": before[key], "current": value,
+                  "change_pct": round((value - before[key]) / before[key] * 100, 1) if before[key] else None}
+            for key, value in _flatten(result).items() if key in before
+        }
+        if changes:
+            out[name] = changes
+    return out
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.contextmanager
+def stdout_to_stderr():
+    """Keeps stdout for the report: crews print their progress to the process's stdout."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+async def run(args) -> dict:
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        start = time.perf_counter()
+        results[name] = await RUNNERS[name](args)
+        results[name]["scenario_seconds"] = round(time.perf_counter() - start, 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Repeatable; default: all")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--compare", help="A previous report to compare against")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--concurrency", type=int, default=8, help="Client-side concurrency for API scenarios")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Mean stub Gemini latency (s)")
+    parser.add_argument("--llm-sigma", type=float, default=0.25)
+    parser.add_argument("--llm-distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--db-latency", type=float, default=0.02, help="Stub Supabase latency per query (s)")
+    parser.add_argument("--crew-latency", type=float, default=0.3, help="Stub crew LLM latency per call (s)")
+    parser.add_argument("--scrape-latency", type=float, default=1.0, help="Multiplier on the stub job boards' latency")
+    parser.add_argument("--ingest-files", type=int, default=12)
+    parser.add_argument("--bulk-jobs", type=int, default=200)
+    parser.add_argument("--crew-requests", type=int, default=8)
+    parser.add_argument("--cover-letters", type=int, default=8)
+    parser.add_argument("--renders", type=int, default=12)
+    parser.add_argument("--scrape-results", type=int, default=20)
+    args = parser.parse_args()
+
+    params = {k: v for k, v in vars(args).items() if k not in ("scenario", "output", "compare")}
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "params": params,
+        },
+    }
+    with stdout_to_stderr():
+        report["scenarios"] = asyncio.run(run(args))
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        report["comparison"] = {"baseline_commit": baseline.get("meta", {}).get("commit"),
+                                **compare(report["scenarios"], baseline.get("scenarios", {}))}
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
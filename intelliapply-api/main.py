@@ -2,16 +2,29 @@
 # main.py (Unified Entrypoint)
 import logging
 import asyncio
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from arq import create_pool
 from arq.connections import RedisSettings
+from arq.constants import default_queue_name
 import os
 
 from app.core.config import is_ready
+from app.core.cache import llm_cache
+from app.core.metrics import HTTP_REQUEST_SECONDS, QUEUE_DEPTH, render_latest
+from app.core.rate_limit import gemini_limiter
+from app.repositories.client import close_db
+from app.repositories.profiles import profiles_repo
+from app.services.render_pool import start_render_pool, shutdown_render_pool
 from app.api.v1.router import api_router
 
+try:
+    from fastapi.routing import iter_route_contexts
+except ImportError:  # older FastAPI copies included routes, prefix and all, so path_format is complete
+    iter_route_contexts = None
+
 # --- Logging ---
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
@@ -26,23 +39,33 @@ async def lifespan(app: FastAPI):
     try:
         # Create pool and store in app.state for endpoints to use
         app.state.redis = await create_pool(RedisSettings.from_dsn(redis_url))
+        llm_cache.bind(app.state.redis)
+        gemini_limiter.bind(app.state.redis)
+        app.state.profile_invalidations = asyncio.create_task(profiles_repo.listen_for_invalidations(app.state.redis))
         log.info("✅ Redis connected (Job Queue Ready).")
     except Exception as e:
         log.error(f"❌ Failed to connect to Redis: {e}")
         # We don't raise here to allow the app to start even if Queue is down (it will error 503 on use)
         app.state.redis = None
 
-    # 2. Check Core Config
+    # 2. Spawn and warm the PDF render processes in the background
+    app.state.render_pool_warmup = asyncio.create_task(start_render_pool())
+
+    # 3. Check Core Config
     if not is_ready():
         log.warning("⚠️ App is starting but some AI/DB keys are missing. Check .env")
 
     yield
     
-    # 3. Cleanup
+    # 4. Cleanup
     log.info("Shutting down...")
+    if getattr(app.state, "profile_invalidations", None):
+        app.state.profile_invalidations.cancel()
     if getattr(app.state, "redis", None):
         await app.state.redis.close()
     log.info("Redis connection closed.")
+    await close_db()
+    shutdown_render_pool()
 
 # --- Create App ---
 app = FastAPI(
@@ -66,8 +89,51 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], 
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Render-Template", "X-Render-Path", "X-PDF-Cache"],
 )
 
+# --- Metrics ---
+# id(route) -> its full template. Newer FastAPI puts the router's own route in the scope, whose
+# path_format lacks the include_router prefixes.
+_route_templates: dict[int, str] = {}
+
+def _route_template(request: Request) -> str:
+    """The matched route as a template (/api/v1/jobs/{job_id}), keeping label cardinality bounded."""
+    route = request.scope.get("route")
+    if route is None:
+        return "unmatched"
+    if iter_route_contexts is not None:
+        if not _route_templates:
+            _route_templates.update(
+                {id(context.original_route): context.path_format for context in iter_route_contexts(app.routes)}
+            )
+        return _route_templates.get(id(route)) or route.path_format
+    return route.path_format
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUEST_SECONDS.labels(
+            method=request.method, route=_route_template(request), status=str(status),
+        ).observe(time.perf_counter() - start)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    redis = getattr(app.state, "redis", None)
+    if redis:
+        try:
+            QUEUE_DEPTH.set(await redis.zcard(default_queue_name))
+        except Exception as e:
+            log.warning(f"Failed to sample queue depth: {e}")
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
 # --- Routes ---
 app.include_router(api_router, prefix="/api/v1")
 
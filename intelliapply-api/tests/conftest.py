@@ -0,0 +1,36 @@
+# tests/conftest.py
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Make `app`, `arq_worker` and `main` importable however pytest is started.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+
+class FakeClock:
+    """Stands in for a module's `time` (and `asyncio.sleep`): time only moves when told to."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def as_time_module(self) -> SimpleNamespace:
+        return SimpleNamespace(monotonic=self.monotonic, time=self.time, perf_counter=self.monotonic)
+
+
+@pytest.fixture
+def fake_clock() -> FakeClock:
+    return FakeClock()
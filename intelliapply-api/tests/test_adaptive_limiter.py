@@ -0,0 +1,101 @@
+# tests/test_adaptive_limiter.py
+import asyncio
+
+import pytest
+
+from app.core import adaptive
+from app.core.adaptive import AdaptiveLimiter
+
+
+@pytest.fixture
+def clock(fake_clock, monkeypatch):
+    monkeypatch.setattr(adaptive, "time", fake_clock.as_time_module())
+    return fake_clock
+
+
+def test_success_grows_limit_by_about_one_per_round(clock):
+    limiter = AdaptiveLimiter(max_limit=16, min_limit=1)
+    limiter.limit = 4.0
+    for _ in range(4):
+        limiter.on_success(1.0, clock.now)
+    assert 4.9 < limiter.limit < 5.0
+
+    for _ in range(500):
+        limiter.on_success(1.0, clock.now)
+    assert limiter.limit == 16
+
+
+def test_overload_halves_limit_down_to_min(clock):
+    limiter = AdaptiveLimiter(max_limit=16, min_limit=3)
+    limiter.on_overload(clock.now)
+    assert limiter.limit == 8
+    for _ in range(5):
+        clock.now += 1
+        limiter.on_overload(clock.now)
+    assert limiter.limit == 3
+
+
+def test_burst_of_overloads_from_one_moment_decreases_once(clock):
+    limiter = AdaptiveLimiter(max_limit=16, min_limit=1)
+    started_at = clock.now
+    clock.now += 1
+    for _ in range(10):
+        limiter.on_overload(started_at)  # all in flight before the first decrease
+    assert limiter.limit == 8
+
+    clock.now += 1
+    limiter.on_overload(clock.now)  # started after it: a new signal
+    assert limiter.limit == 4
+
+
+def test_latency_rise_decreases_limit(clock):
+    limiter = AdaptiveLimiter(max_limit=16, min_limit=1, latency_tolerance=2.0)
+    for _ in range(adaptive._MIN_LATENCY_SAMPLES):
+        limiter.on_success(1.0, clock.now, "svc", tokens=1000)
+    assert limiter.limit == 16
+
+    for _ in range(10):
+        clock.now += 1
+        limiter.on_success(5.0, clock.now, "svc", tokens=1000)
+    assert limiter.limit < 16
+
+
+def test_large_prompts_are_not_read_as_a_slowdown(clock):
+    limiter = AdaptiveLimiter(max_limit=16, min_limit=1, latency_tolerance=2.0)
+    for _ in range(50):
+        limiter.on_success(1.0, clock.now, "single", tokens=1000)
+    # A bulk run's batch prompts take far longer, in proportion to their size and per service.
+    for _ in range(5):
+        clock.now += 1
+        limiter.on_success(20.0, clock.now, "batch", tokens=24_000)
+        limiter.on_success(1.0, clock.now, "single", tokens=1000)
+    assert limiter.limit == 16
+
+
+def test_streamed_calls_only_grow_the_limit(clock):
+    limiter = AdaptiveLimiter(max_limit=16, min_limit=1)
+    limiter.limit = 2.0
+    limiter.on_success(None, clock.now)
+    assert limiter.limit == 2.5
+    assert limiter._baselines == {}
+
+
+def test_waiters_are_served_in_order_as_slots_free_up():
+    async def run():
+        limiter = AdaptiveLimiter(max_limit=1, min_limit=1)
+        order = []
+        await limiter.acquire()
+
+        async def waiter(name):
+            await limiter.acquire()
+            order.append(name)
+            limiter.release()
+
+        tasks = [asyncio.create_task(waiter(n)) for n in ("a", "b", "c")]
+        await asyncio.sleep(0)
+        assert limiter.in_flight == 1 and not order
+        limiter.release()
+        await asyncio.gather(*tasks)
+        return order, limiter.in_flight
+
+    assert asyncio.run(run()) == (["a", "b", "c"], 0)
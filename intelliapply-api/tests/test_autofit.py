@@ -0,0 +1,44 @@
+# tests/test_autofit.py
+from app.services import renderer
+from app.services.renderer import AutoFit, COMPACT_CHECK_EVERY
+
+SHORT_RESUME = {
+    "personal_info": {"name": "Jane Doe", "email": "jane@example.com"},
+    "summary": "Python developer.",
+    "skills": {"languages": ["Python", "SQL"]},
+    "experience": [{"company": "Acme", "role": "Engineer", "dates": "2020 - 2023", "bullets": ["Built things."]}],
+    "education": [{"institution": "State University", "degree": "B.S.", "dates": "2016 - 2020"}],
+}
+
+
+def test_sampled_check_catches_an_over_prediction():
+    engine = AutoFit()
+    engine.correction = 5.0  # badly over-predicting: a one-page resume looks like several pages
+    results = [engine.render(SHORT_RESUME) for _ in range(COMPACT_CHECK_EVERY)]
+
+    assert [r.path for r in results[:-1]] == ["predicted_compact"] * (COMPACT_CHECK_EVERY - 1)
+    assert results[-1].path == "standard"
+    assert results[-1].template == "resume.html"
+    assert engine.correction < 5.0
+
+
+def test_sampled_check_falls_back_to_compact_when_standard_overflows(monkeypatch):
+    engine = AutoFit()
+    engine.correction = 5.0
+    engine._compact_predictions = COMPACT_CHECK_EVERY - 1
+    monkeypatch.setattr(engine, "learn", lambda estimated, pdf_bytes: 2)
+
+    result = engine.render(SHORT_RESUME)
+    assert result.path == "standard_overflow"
+    assert result.template == "resume_compact.html"
+
+
+def test_confident_predictions_are_not_checked(monkeypatch):
+    rendered = []
+    monkeypatch.setattr(renderer, "_generate_pdf_bytes", lambda data, template: rendered.append(template) or b"%PDF")
+    engine = AutoFit()
+    engine.correction = 5.0
+
+    for _ in range(COMPACT_CHECK_EVERY - 1):
+        engine.render(SHORT_RESUME)
+    assert rendered == ["resume_compact.html"] * (COMPACT_CHECK_EVERY - 1)
@@ -0,0 +1,71 @@
+# tests/test_circuit_breaker.py
+import pytest
+from arq import Retry
+
+import arq_worker
+from app.core import adaptive
+from app.core.adaptive import CircuitBreaker
+from app.core.rate_limit import BACKGROUND, INTERACTIVE
+
+
+@pytest.fixture
+def clock(fake_clock, monkeypatch):
+    monkeypatch.setattr(adaptive, "time", fake_clock.as_time_module())
+    return fake_clock
+
+
+def open_breaker(clock) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_rate=0.5, window=4, cooldown=30)
+    for _ in range(4):
+        breaker.record(False)
+    assert breaker.state == adaptive.OPEN
+    return breaker
+
+
+def test_open_breaker_rejects_background_only(clock):
+    breaker = open_breaker(clock)
+    assert breaker.rejects(BACKGROUND)
+    assert not breaker.allow(BACKGROUND)
+    assert not breaker.rejects(INTERACTIVE)
+    assert breaker.allow(INTERACTIVE)
+
+
+def test_half_open_rejects_after_the_probe_is_taken(clock):
+    breaker = open_breaker(clock)
+    clock.now += 31
+
+    # Cooldown over: the next background call is let through as the probe.
+    assert not breaker.rejects(BACKGROUND)
+    assert breaker.allow(BACKGROUND)
+    assert breaker.state == adaptive.HALF_OPEN
+
+    # Further background calls are refused until the probe slice passes, though not "open".
+    assert not breaker.is_open
+    assert breaker.rejects(BACKGROUND)
+    assert not breaker.allow(BACKGROUND)
+    assert 0 < breaker.retry_after() <= 5
+
+    clock.now += 5
+    assert not breaker.rejects(BACKGROUND)
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = open_breaker(clock)
+    clock.now += 31
+    assert breaker.allow(BACKGROUND)
+    breaker.record(True)
+    assert breaker.state == adaptive.CLOSED
+    assert not breaker.rejects(BACKGROUND)
+
+
+def test_worker_defers_jobs_while_half_open_probe_is_taken(clock, monkeypatch):
+    breaker = open_breaker(clock)
+    monkeypatch.setattr(arq_worker, "gemini_breaker", breaker)
+    clock.now += 31
+    assert breaker.allow(BACKGROUND)  # another job took the probe
+
+    with pytest.raises(Retry):
+        arq_worker._defer_while_circuit_open()
+
+    clock.now += 5
+    arq_worker._defer_while_circuit_open()  # probe slot free again: run (as the probe)
@@ -0,0 +1,35 @@
+# tests/test_cover_letter.py
+import asyncio
+from types import SimpleNamespace
+
+from app.services import ai_analysis
+
+ARGS = ("Python developer resume", "Backend engineer: Python, FastAPI.", "Acme", "Backend Engineer")
+LETTER = "Dear Hiring Manager,\n\nI am excited to apply."
+
+
+def test_streamed_and_full_cover_letters_share_one_prompt(monkeypatch):
+    """They share a cache entry, so they must ask Gemini for the same thing."""
+    prompts = []
+
+    async def generate_content(prompt, **kwargs):
+        prompts.append(prompt)
+        return SimpleNamespace(text=f"  {LETTER}\n")
+
+    async def stream_content(prompt, **kwargs):
+        prompts.append(prompt)
+        for chunk in (LETTER[:10], LETTER[10:]):
+            yield chunk
+
+    monkeypatch.setattr(ai_analysis, "get_gemini_model", lambda: object())
+    monkeypatch.setattr(ai_analysis, "generate_content", generate_content)
+    monkeypatch.setattr(ai_analysis, "stream_content", stream_content)
+
+    async def scenario():
+        full = await ai_analysis.get_cover_letter(*ARGS)
+        streamed = "".join([chunk async for chunk in ai_analysis.stream_cover_letter(*ARGS)])
+        return full, streamed
+
+    full, streamed = asyncio.run(scenario())
+    assert prompts[0] == prompts[1]
+    assert full == {"coverLetter": streamed.strip()} == {"coverLetter": LETTER}
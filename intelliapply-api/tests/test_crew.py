@@ -0,0 +1,90 @@
+# tests/test_crew.py
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from fakeredis import aioredis
+
+from app.core import crew_llm, services
+from app.core.cache import LLMCache
+from app.core.config import CREW_LLM_MODEL_NAME
+from app.core.crew_llm import GeminiLLM
+from app.services import ai_crew
+
+OPTIMIZED_RESUME = json.dumps({
+    "resume": {
+        "name": "Jane Doe", "phone": "555-0100", "email": "jane@example.com",
+        "linkedin": "https://linkedin.com/in/jane", "github": "https://github.com/jane", "portfolio": "https://jane.dev",
+        "summary": "Python developer.",
+        "skills": {"Backend": ["Python", "FastAPI"]},
+        "experience": [{"role": "Engineer", "company": "Acme", "date": "2022 - 2024", "points": ["Built APIs."]}],
+        "projects": [],
+    },
+    "rationale": "Matched the job's keywords.",
+})
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    """Stands in for litellm.completion; records each call's kwargs. Set `calls.fail_optimizer`."""
+    calls = SimpleNamespace(kwargs=[], fail_optimizer=False)
+
+    def completion(**kwargs):
+        calls.kwargs.append(kwargs)
+        prompt = "\n".join(str(m.get("content", "")) for m in kwargs["messages"])
+        if calls.fail_optimizer and "OptimizedResumeOutput" in prompt:
+            raise ConnectionError("Gemini unavailable")
+        answer = OPTIMIZED_RESUME if "OptimizedResumeOutput" in prompt else "Python, FastAPI, SQL."
+        message = SimpleNamespace(content=f"Thought: I now know the final answer\nFinal Answer: {answer}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=SimpleNamespace(total_tokens=100))
+
+    monkeypatch.setattr(crew_llm.litellm, "completion", completion)
+    return calls
+
+
+def make_llm() -> GeminiLLM:
+    return GeminiLLM(model=CREW_LLM_MODEL_NAME, temperature=0.7, max_tokens=4096)
+
+
+def test_gemini_llm_keeps_its_settings():
+    llm = make_llm()
+    assert (llm.model, llm.temperature, llm.max_tokens) == (CREW_LLM_MODEL_NAME, 0.7, 4096)
+
+
+def test_crew_builds_and_runs_on_gemini_llm(completions, monkeypatch):
+    llm = make_llm()
+    crew = ai_crew._build_resume_crew(llm)
+    # CrewAI must call our LLM object, not rebuild one from its model name.
+    assert all(agent.llm is llm for agent in crew.agents)
+
+    monkeypatch.setitem(services._instances, "crew_llm", llm)
+    analyses = {}
+    output = ai_crew.run_resume_crew("Backend engineer: Python.", "Jane's resume", {"full_name": "Jane Doe"},
+                                     analyses=analyses)
+
+    assert ai_crew.crew_error(output) is None
+    assert json.loads(output)["resume"]["name"] == "Jane Doe"
+    assert set(analyses) == set(ai_crew.ANALYSIS_STAGES)
+    assert len(completions.kwargs) == 3
+    assert all(c["model"] == CREW_LLM_MODEL_NAME and c["max_tokens"] == 4096 for c in completions.kwargs)
+
+
+def test_analyses_are_cached_when_the_optimizer_fails(completions, monkeypatch):
+    completions.fail_optimizer = True
+    monkeypatch.setitem(services._instances, "crew_llm", make_llm())
+    cache = LLMCache()
+    cache.bind(aioredis.FakeRedis())
+    monkeypatch.setattr(ai_crew, "llm_cache", cache)
+
+    async def scenario():
+        output = await ai_crew.run_resume_crew_cached("Backend engineer: Python.", "Jane's resume", {})
+        cached = [
+            await cache.get(ai_crew.RESUME_ANALYSIS, {"resume_text": "Jane's resume"}),
+            await cache.get(ai_crew.JOB_ANALYSIS, {"job_description": "Backend engineer: Python."}),
+        ]
+        return output, cached
+
+    output, cached = asyncio.run(scenario())
+    assert ai_crew.crew_error(output)
+    assert cached == ["Python, FastAPI, SQL.", "Python, FastAPI, SQL."]
@@ -0,0 +1,67 @@
+# tests/test_crew_tasks.py
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.endpoints import ai
+from app.services import crew_tasks
+from benchmarks.stubs import fake_arq_redis
+
+
+async def events(redis, task_id: str) -> list[str]:
+    return [json.loads(raw)["stage"] for raw in await redis.lrange(crew_tasks.EVENTS_PREFIX + task_id, 0, -1)]
+
+
+def test_stages_are_recorded_in_order():
+    async def scenario():
+        redis = fake_arq_redis()
+        for stage in (crew_tasks.QUEUED, crew_tasks.ANALYZING, crew_tasks.OPTIMIZING_RESUME):
+            assert await crew_tasks.publish_stage(redis, "t1", "u1", stage)
+        assert await crew_tasks.publish_stage(redis, "t1", "u1", crew_tasks.COMPLETE, result={"ok": True})
+        return await crew_tasks.get_status(redis, "t1", "u1"), await events(redis, "t1")
+
+    status, stages = asyncio.run(scenario())
+    assert status["stage"] == crew_tasks.COMPLETE and status["result"] == {"ok": True}
+    assert stages == ["queued", "analyzing", "optimizing_resume", "complete"]
+
+
+@pytest.mark.parametrize("terminal", crew_tasks.TERMINAL_STAGES)
+def test_a_finished_task_ignores_later_stages(terminal):
+    """E.g. the crew thread reporting progress after its job timed out and was marked failed."""
+    async def scenario():
+        redis = fake_arq_redis()
+        await crew_tasks.publish_stage(redis, "t1", "u1", crew_tasks.ANALYZING)
+        await crew_tasks.publish_stage(redis, "t1", "u1", terminal, error="Job timed out")
+        late = [
+            await crew_tasks.publish_stage(redis, "t1", "u1", stage)
+            for stage in (crew_tasks.OPTIMIZING_RESUME, crew_tasks.COMPLETE, crew_tasks.FAILED)
+        ]
+        return late, await crew_tasks.get_status(redis, "t1", "u1"), await events(redis, "t1")
+
+    late, status, stages = asyncio.run(scenario())
+    assert late == [False, False, False]
+    assert status["stage"] == terminal
+    assert stages == ["analyzing", terminal]
+
+
+def test_failed_enqueue_marks_the_task_failed(monkeypatch):
+    async def scenario():
+        redis = fake_arq_redis()
+
+        async def enqueue_job(*args, **kwargs):
+            raise ConnectionError("redis went away")
+
+        monkeypatch.setattr(redis, "enqueue_job", enqueue_job)
+        request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(redis=redis)))
+        with pytest.raises(HTTPException) as raised:
+            await ai.enqueue_resume_crew(request, "u1", "Job", "Resume", {})
+        task_id = (await redis.keys(crew_tasks.STATUS_PREFIX + "*"))[0].decode()[len(crew_tasks.STATUS_PREFIX):]
+        return raised.value, await crew_tasks.get_status(redis, task_id, "u1"), await events(redis, task_id)
+
+    error, status, stages = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert status["stage"] == crew_tasks.FAILED
+    assert stages == ["queued", "failed"]
@@ -0,0 +1,107 @@
+# tests/test_llm_cache.py
+import asyncio
+
+import pytest
+from fakeredis import aioredis
+
+from app.core.cache import LLMCache, LRU_KEY, PRUNE_CURSOR_KEY
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def cache():
+    cache = LLMCache(max_entries=3)
+    cache.bind(aioredis.FakeRedis())
+    return cache
+
+
+def test_get_counts_hits_and_misses_in_one_call(cache):
+    async def scenario():
+        assert await cache.get("get_cover_letter", {"a": 1}) is None
+        await cache.set("get_cover_letter", {"a": 1}, {"coverLetter": "Hi"})
+        assert await cache.get("get_cover_letter", {"a": 1}) == {"coverLetter": "Hi"}
+        assert await cache.get("get_cover_letter", {"a": " 1 "}) is None  # only strings are normalized
+        assert await cache.get("get_cover_letter", {"a": 1}) == {"coverLetter": "Hi"}
+        return await cache.stats()
+
+    stats = run(scenario())
+    assert stats["get_cover_letter:hits"] == 2
+    assert stats["get_cover_letter:misses"] == 2
+    assert stats["entries"] == 1
+
+
+def test_hit_refreshes_lru_position_and_eviction_drops_oldest(cache):
+    async def scenario():
+        for i in range(3):
+            await cache.set("f", {"i": i}, i)
+        await cache.get("f", {"i": 0})  # now the most recently used
+        await cache.set("f", {"i": 3}, 3)
+        return [await cache.get("f", {"i": i}) for i in range(4)], await cache.stats()
+
+    values, stats = run(scenario())
+    assert values == [0, None, 2, 3]
+    assert stats["evictions"] == 1
+
+
+def test_miss_drops_an_entry_expired_by_ttl(cache):
+    async def scenario():
+        await cache.set("f", {"i": 1}, 1)
+        await cache.redis.delete(cache.make_key("f", {"i": 1}))  # as if its TTL had run out
+        assert await cache.redis.zcard(LRU_KEY) == 1
+        assert await cache.get("f", {"i": 1}) is None
+        return await cache.redis.zcard(LRU_KEY)
+
+    assert run(scenario()) == 0
+
+
+def test_eviction_does_not_count_already_expired_keys(cache):
+    async def scenario():
+        for i in range(3):
+            await cache.set("f", {"i": i}, i)
+        await cache.redis.delete(cache.make_key("f", {"i": 0}))
+        await cache.set("f", {"i": 3}, 3)  # evicts {"i": 0}, which was already gone
+        return await cache.stats()
+
+    assert "evictions" not in run(scenario())
+
+
+def test_prune_is_incremental_and_wraps_around():
+    async def scenario():
+        cache = LLMCache(max_entries=100)
+        cache.bind(aioredis.FakeRedis())
+        for i in range(10):
+            await cache.set("f", {"i": i}, i)
+        for i in (1, 2, 7, 8):
+            await cache.redis.delete(cache.make_key("f", {"i": i}))
+
+        await cache._prune_expired(batch=4)  # members 0-3
+        after_first = await cache.redis.zcard(LRU_KEY)
+        cursor = await cache.redis.get(PRUNE_CURSOR_KEY)
+        await cache._prune_expired(batch=4)  # members 4-7
+        await cache._prune_expired(batch=4)  # members 8-9, then wraps
+        return after_first, cursor, await cache.redis.zcard(LRU_KEY), await cache.redis.get(PRUNE_CURSOR_KEY)
+
+    after_first, cursor, remaining, final_cursor = run(scenario())
+    assert after_first == 8
+    assert cursor is not None
+    assert remaining == 6
+    assert final_cursor is None
+
+
+def test_without_redis_the_cache_is_a_pass_through():
+    async def scenario():
+        cache = LLMCache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            return "value"
+
+        first = await cache.get_or_compute("f", {}, compute)
+        second = await cache.get_or_compute("f", {}, compute)
+        return first, second, len(calls), await cache.stats()
+
+    assert run(scenario()) == ("value", "value", 2, {})
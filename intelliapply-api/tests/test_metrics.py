@@ -0,0 +1,22 @@
+# tests/test_metrics.py
+from fastapi.testclient import TestClient
+
+import main
+from app.core.metrics import HTTP_REQUEST_SECONDS
+
+
+def observed(method: str, route: str, status: str) -> float:
+    return HTTP_REQUEST_SECONDS.labels(method=method, route=route, status=status)._sum.get() > 0
+
+
+def test_requests_are_labelled_with_the_route_template():
+    client = TestClient(main.app)
+    # A path parameter whose value also appears earlier in the path ("v1").
+    response = client.get("/api/v1/scraper/jobs/v1")
+    assert observed("GET", "/api/v1/scraper/jobs/{job_id}", str(response.status_code))
+
+
+def test_unmatched_paths_share_one_label():
+    client = TestClient(main.app)
+    client.get("/no/such/path/12345")
+    assert observed("GET", "unmatched", "404")
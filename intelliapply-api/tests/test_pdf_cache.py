@@ -0,0 +1,46 @@
+# tests/test_pdf_cache.py
+import os
+import stat
+
+from app.services.pdf_cache import PdfCache
+
+
+def mode(path) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_directory_is_created_private(tmp_path):
+    cache = PdfCache(directory=str(tmp_path / "cache" / "pdf"))
+    assert cache.put("k", b"%PDF-1.4", {"X-Render-Template": "resume.html"})
+    assert mode(cache.directory) == 0o700
+    assert cache.get("k") == (b"%PDF-1.4", {"X-Render-Template": "resume.html"})
+
+
+def test_existing_directory_is_made_private(tmp_path):
+    directory = tmp_path / "pdf"
+    directory.mkdir(mode=0o777)
+    os.chmod(directory, 0o777)
+    cache = PdfCache(directory=str(directory))
+    assert cache.put("k", b"%PDF-1.4")
+    assert mode(directory) == 0o700
+
+
+def test_directory_owned_by_someone_else_disables_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(tmp_path).st_uid + 1)
+    cache = PdfCache(directory=str(tmp_path))
+    assert not cache.put("k", b"%PDF-1.4")
+    assert cache.get("k") is None
+    assert not cache.touch("k")
+    assert not any(tmp_path.iterdir())
+
+
+def test_deleted_directory_is_recreated(tmp_path):
+    cache = PdfCache(directory=str(tmp_path / "pdf"))
+    assert cache.put("a", b"%PDF-1.4")
+    for entry in os.scandir(cache.directory):
+        os.remove(entry.path)
+    os.rmdir(cache.directory)
+
+    assert not cache.put("b", b"%PDF-1.4")  # fails once, then the directory is checked again
+    assert cache.put("b", b"%PDF-1.4")
+    assert mode(cache.directory) == 0o700
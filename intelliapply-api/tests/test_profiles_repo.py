@@ -0,0 +1,117 @@
+# tests/test_profiles_repo.py
+import asyncio
+
+import pytest
+
+from app.repositories.profiles import ProfilesRepo
+
+
+class SlowGet:
+    """Replaces `ProfilesRepo.get`: each call blocks until `release` is set, then returns `row`."""
+
+    def __init__(self, row):
+        self.row = row
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, profile_id, columns="*", user_id=None):
+        self.calls += 1
+        await self.release.wait()
+        return dict(self.row)
+
+
+@pytest.fixture
+def repo():
+    return ProfilesRepo(cache_ttl_seconds=60)
+
+
+def test_concurrent_misses_share_one_query(repo, monkeypatch):
+    async def scenario():
+        get = SlowGet({"full_name": "Ada"})
+        monkeypatch.setattr(repo, "get", get)
+        callers = [asyncio.create_task(repo.get_cached("p1", "full_name", "u1")) for _ in range(5)]
+        await asyncio.sleep(0)
+        get.release.set()
+        return get, await asyncio.gather(*callers)
+
+    get, results = asyncio.run(scenario())
+    assert get.calls == 1
+    assert results == [{"full_name": "Ada"}] * 5
+    assert not repo._inflight
+
+
+def test_cancelled_leader_does_not_strand_waiters(repo, monkeypatch):
+    async def scenario():
+        get = SlowGet({"full_name": "Ada"})
+        monkeypatch.setattr(repo, "get", get)
+        leader = asyncio.create_task(repo.get_cached("p1", "full_name", "u1"))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(repo.get_cached("p1", "full_name", "u1"))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        get.release.set()
+        result = await asyncio.wait_for(follower, timeout=1)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return get, result
+
+    get, result = asyncio.run(scenario())
+    assert result == {"full_name": "Ada"}
+    assert get.calls == 1
+
+
+def test_failed_query_reaches_every_waiter(repo, monkeypatch):
+    async def failing_get(profile_id, columns="*", user_id=None):
+        await asyncio.sleep(0)
+        raise ConnectionError("db down")
+
+    async def scenario():
+        monkeypatch.setattr(repo, "get", failing_get)
+        return await asyncio.gather(
+            *(repo.get_cached("p1", "full_name") for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, ConnectionError) for r in results)
+    assert not repo._inflight and not repo._cache
+
+
+def test_fetch_started_before_invalidation_is_not_cached(repo, monkeypatch):
+    async def scenario():
+        stale = SlowGet({"full_name": "Old"})
+        monkeypatch.setattr(repo, "get", stale)
+        in_flight = asyncio.create_task(repo.get_cached("p1", "full_name", "u1"))
+        while not stale.calls:
+            await asyncio.sleep(0)
+
+        repo.invalidate("p1")
+        fresh = SlowGet({"full_name": "New"})
+        fresh.release.set()
+        monkeypatch.setattr(repo, "get", fresh)
+        # A caller arriving after the invalidation must not join the stale query.
+        after = await repo.get_cached("p1", "full_name", "u1")
+
+        stale.release.set()
+        before = await in_flight
+        return before, after, await repo.get_cached("p1", "full_name", "u1"), fresh
+
+    before, after, cached, fresh = asyncio.run(scenario())
+    assert before == {"full_name": "Old"}  # its own caller still gets an answer
+    assert after == cached == {"full_name": "New"}
+    assert fresh.calls == 1
+
+
+def test_invalidate_all_discards_in_flight_results(repo, monkeypatch):
+    async def scenario():
+        get = SlowGet({"full_name": "Ada"})
+        monkeypatch.setattr(repo, "get", get)
+        in_flight = asyncio.create_task(repo.get_cached("p1", "full_name"))
+        await asyncio.sleep(0)
+        repo.invalidate_all()
+        get.release.set()
+        await in_flight
+
+    asyncio.run(scenario())
+    assert not repo._cache
@@ -0,0 +1,35 @@
+# tests/test_queue.py
+import asyncio
+
+from arq.jobs import Job, JobStatus
+
+from app.core.queue import enqueue_jobs_bulk
+from benchmarks.stubs import fake_arq_redis
+
+
+def test_bulk_enqueued_jobs_read_back_like_enqueue_job():
+    """Guards the copy of arq's storage format in enqueue_jobs_bulk against arq upgrades."""
+    async def run():
+        redis = fake_arq_redis()
+        job_ids = await enqueue_jobs_bulk(redis, "analyze_jobs_batch", [("profile-1", [1, 2]), ("profile-1", [3])])
+        reference = await redis.enqueue_job("analyze_jobs_batch", "profile-1", [4])
+
+        infos = [await Job(job_id, redis).info() for job_id in job_ids]
+        statuses = [await Job(job_id, redis).status() for job_id in job_ids]
+        queued = {job.job_id for job in await redis.queued_jobs()}
+        return job_ids, infos, statuses, queued, await reference.info()
+
+    job_ids, infos, statuses, queued, reference = asyncio.run(run())
+    assert [info.args for info in infos] == [("profile-1", [1, 2]), ("profile-1", [3])]
+    assert all(info.function == reference.function for info in infos)
+    assert all(info.kwargs == reference.kwargs and info.job_try == reference.job_try for info in infos)
+    assert statuses == [JobStatus.queued, JobStatus.queued]
+    assert set(job_ids) <= queued
+
+
+def test_bulk_enqueue_of_nothing_is_a_no_op():
+    async def run():
+        redis = fake_arq_redis()
+        return await enqueue_jobs_bulk(redis, "analyze_jobs_batch", []), await redis.queued_jobs()
+
+    assert asyncio.run(run()) == ([], [])
@@ -0,0 +1,54 @@
+# tests/test_render_pool.py
+import asyncio
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.services import render_pool
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(render_pool, "RENDER_POOL_WORKERS", 1)
+    monkeypatch.setattr(render_pool, "RENDER_TIMEOUT_SECONDS", 30.0)  # spawning a warm process takes a while
+    yield
+    render_pool.shutdown_render_pool()
+
+
+def test_a_dead_worker_is_replaced_and_the_render_retried(pool):
+    async def scenario():
+        await render_pool.run_render(abs, -1)
+        broken = render_pool._pool
+        # Kills the only worker, and again on the retry: the caller sees BrokenProcessPool.
+        with pytest.raises(BrokenProcessPool):
+            await render_pool.run_render(os._exit, 1)
+        assert render_pool._pool is not broken
+        return await render_pool.run_render(abs, -3)
+
+    assert asyncio.run(scenario()) == 3
+    assert render_pool._pending == 0
+
+
+def test_a_hung_render_times_out_and_recycles_the_pool(pool, monkeypatch):
+    async def scenario():
+        await render_pool.run_render(abs, -1)
+        hung = render_pool._pool
+        monkeypatch.setattr(render_pool, "RENDER_TIMEOUT_SECONDS", 0.5)
+        with pytest.raises(asyncio.TimeoutError):
+            await render_pool.run_render(time.sleep, 60)
+        assert render_pool._pool is None
+        monkeypatch.setattr(render_pool, "RENDER_TIMEOUT_SECONDS", 30.0)
+        result = await render_pool.run_render(abs, -2)
+        # The killed render gives back its queue slot instead of holding it for 60s.
+        for _ in range(100):
+            if render_pool._pending == 0:
+                break
+            await asyncio.sleep(0.05)
+        return hung, result
+
+    hung, result = asyncio.run(scenario())
+    assert result == 2
+    assert render_pool._pending == 0
+    assert all(not p.is_alive() for p in (hung._processes or {}).values())
@@ -0,0 +1,101 @@
+# tests/test_retry.py
+import asyncio
+from dataclasses import replace
+from types import SimpleNamespace
+
+import pytest
+from google.api_core import exceptions
+from google.protobuf import duration_pb2
+from google.rpc import error_details_pb2
+
+from app.core import retry
+from app.core.retry import RetryPolicy, retry_after_hint, retry_async
+
+
+@pytest.fixture
+def clock(fake_clock, monkeypatch):
+    monkeypatch.setattr(retry, "time", fake_clock.as_time_module())
+    monkeypatch.setattr(retry.asyncio, "sleep", fake_clock.sleep)
+    # Take the top of each jitter range so backoff is deterministic: 1s, 2s, 4s, ...
+    monkeypatch.setattr(retry.random, "uniform", lambda low, high: high)
+    return fake_clock
+
+
+class Flaky:
+    """An async call that raises each queued error in turn, then returns "ok"."""
+
+    def __init__(self, *errors: BaseException):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+POLICY = RetryPolicy(max_attempts=4, base_delay=1.0, max_delay=30.0, deadline=90.0)
+
+
+def test_hint_from_retry_after_header():
+    error = exceptions.TooManyRequests("slow down", response=SimpleNamespace(headers={"Retry-After": "7"}))
+    assert retry_after_hint(error) == 7.0
+
+
+def test_unparseable_retry_after_header_falls_through_to_the_message():
+    error = exceptions.TooManyRequests(
+        "Please retry in 2.5s.", response=SimpleNamespace(headers={"Retry-After": "Wed, 21 Oct 2026 07:28:00 GMT"})
+    )
+    assert retry_after_hint(error) == 2.5
+
+
+def test_hint_from_grpc_retry_info():
+    info = error_details_pb2.RetryInfo(retry_delay=duration_pb2.Duration(seconds=3, nanos=500_000_000))
+    assert retry_after_hint(exceptions.ResourceExhausted("quota", details=[info])) == 3.5
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("429 Quota exceeded. Please retry in 12.3s.", 12.3),
+    ("429 Quota exceeded [retry_delay {\n  seconds: 41\n}]", 41.0),
+    ("503 The model is overloaded.", None),
+])
+def test_hint_from_message(message, expected):
+    assert retry_after_hint(exceptions.ResourceExhausted(message)) == expected
+
+
+def test_retries_transient_errors_with_backoff(clock):
+    call = Flaky(exceptions.ServiceUnavailable("503"), exceptions.InternalServerError("500"))
+    assert asyncio.run(retry_async(call, POLICY)) == "ok"
+    assert call.calls == 3
+    assert clock.sleeps == [1.0, 2.0]
+
+
+def test_server_hint_wins_when_longer_than_backoff(clock):
+    call = Flaky(exceptions.ResourceExhausted("Please retry in 9s."))
+    assert asyncio.run(retry_async(call, POLICY)) == "ok"
+    assert clock.sleeps == [9.0]
+
+
+def test_non_retryable_errors_raise_immediately(clock):
+    call = Flaky(exceptions.InvalidArgument("bad prompt"))
+    with pytest.raises(exceptions.InvalidArgument):
+        asyncio.run(retry_async(call, POLICY))
+    assert call.calls == 1
+    assert clock.sleeps == []
+
+
+def test_gives_up_when_attempts_run_out(clock):
+    call = Flaky(*(exceptions.ServiceUnavailable("503") for _ in range(3)))
+    with pytest.raises(exceptions.ServiceUnavailable):
+        asyncio.run(retry_async(call, replace(POLICY, max_attempts=3)))
+    assert call.calls == 3
+    assert clock.sleeps == [1.0, 2.0]
+
+
+def test_gives_up_when_the_next_wait_would_pass_the_deadline(clock):
+    call = Flaky(exceptions.ServiceUnavailable("503"), exceptions.ResourceExhausted("Please retry in 60s."))
+    with pytest.raises(exceptions.ResourceExhausted):
+        asyncio.run(retry_async(call, POLICY, deadline=30))
+    assert call.calls == 2
+    assert clock.sleeps == [1.0]  # the 60s hint would overrun the 30s budget, so no second sleep
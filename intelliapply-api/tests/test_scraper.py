@@ -0,0 +1,71 @@
+# tests/test_scraper.py
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services import scraper
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(scraper, "_scrape_executor", executor)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def test_timeout_starts_when_the_thread_does(executor):
+    """A board queued behind another isn't timed out for time it spent waiting for a thread."""
+    async def run():
+        first = asyncio.create_task(scraper._run_in_scrape_thread(lambda: time.sleep(0.3) or "first", timeout=1))
+        await asyncio.sleep(0.05)
+        second = await scraper._run_in_scrape_thread(lambda: time.sleep(0.1) or "second", timeout=0.2)
+        return await first, second
+
+    (first, _), (second, run_seconds) = asyncio.run(run())
+    assert (first, second) == ("first", "second")
+    assert run_seconds < 0.2
+
+
+def test_a_running_scrape_still_times_out(executor):
+    release = threading.Event()
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await scraper._run_in_scrape_thread(lambda: release.wait(5), timeout=0.1)
+        release.set()
+
+    asyncio.run(run())
+
+
+def test_errors_jobspy_only_logs_fail_an_empty_board(monkeypatch):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("jobspy")
+    jobspy_log = logging.getLogger("JobSpy:LinkedIn")
+
+    def scrape_jobs(**kwargs):
+        jobspy_log.error("LinkedIn response status code 429")
+        return pd.DataFrame()
+
+    monkeypatch.setattr("jobspy.scrape_jobs", scrape_jobs)
+    with pytest.raises(RuntimeError, match="429"):
+        scraper._scrape_to_records(["linkedin"], "python", "Remote", 24, 20, 60)
+
+
+def test_failed_boards_count_as_failures(monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("blocked")
+
+    monkeypatch.setattr(scraper, "_scrape_to_records", fail)
+    monkeypatch.setattr(scraper, "_site_stats", {})
+
+    async def run():
+        return [result async for result in scraper.scrape_sites_concurrently("python", "Remote", 24, sites=["indeed"])]
+
+    [result] = asyncio.run(run())
+    assert result.error == "blocked"
+    assert scraper.get_site_stats()["indeed"]["failures"] == 1
@@ -0,0 +1,124 @@
+# tests/test_security.py
+import asyncio
+import json
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.security import TokenCache
+
+SECRET = "test-secret-that-is-long-enough-for-hs256"
+ISSUER = "https://project.supabase.co/auth/v1"
+
+
+@pytest.fixture(scope="module")
+def rsa_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture(autouse=True)
+def local_verification(monkeypatch, rsa_key):
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(rsa_key.public_key()))
+    jwk.update(kid="key-1", alg="RS256", use="sig")
+    jwks_client = jwt.PyJWKClient("https://project.supabase.co/auth/v1/.well-known/jwks.json")
+    monkeypatch.setattr(jwks_client, "fetch_data", lambda: {"keys": [jwk]})
+
+    monkeypatch.setattr(security, "_jwks_client", jwks_client)
+    monkeypatch.setattr(security, "_ISSUER", ISSUER)
+    monkeypatch.setattr(security, "SUPABASE_JWT_SECRET", SECRET)
+    monkeypatch.setattr(security, "SUPABASE_JWT_AUDIENCE", "authenticated")
+    monkeypatch.setattr(security, "AUTH_REMOTE_FALLBACK", False)
+    monkeypatch.setattr(security, "_token_cache", TokenCache(ttl_seconds=300))
+
+
+def claims(**overrides):
+    return {"sub": "user-1", "aud": "authenticated", "iss": ISSUER, "exp": int(time.time()) + 3600, **overrides}
+
+
+def authenticate(token: str) -> str:
+    return asyncio.run(security.get_current_user(token))
+
+
+def assert_unauthorized(token: str):
+    with pytest.raises(HTTPException) as excinfo:
+        authenticate(token)
+    assert excinfo.value.status_code == 401
+
+
+def test_valid_tokens_from_either_key_source(rsa_key):
+    assert authenticate(jwt.encode(claims(), SECRET, algorithm="HS256")) == "user-1"
+    assert authenticate(jwt.encode(claims(sub="user-2"), rsa_key, algorithm="RS256", headers={"kid": "key-1"})) == "user-2"
+
+
+def test_expired_token_is_rejected():
+    assert_unauthorized(jwt.encode(claims(exp=int(time.time()) - 10), SECRET, algorithm="HS256"))
+
+
+def test_wrong_audience_or_issuer_is_rejected():
+    assert_unauthorized(jwt.encode(claims(aud="anon"), SECRET, algorithm="HS256"))
+    assert_unauthorized(jwt.encode(claims(iss="https://elsewhere/auth/v1"), SECRET, algorithm="HS256"))
+
+
+@pytest.mark.parametrize("alg", ["HS512", "HS384", "none"])
+def test_unexpected_header_alg_is_rejected_before_key_lookup(alg, monkeypatch):
+    def no_lookup(token):
+        raise AssertionError("key looked up for a rejected alg")
+
+    monkeypatch.setattr(security._jwks_client, "get_signing_key_from_jwt", no_lookup)
+    key = None if alg == "none" else SECRET * 2
+    assert_unauthorized(jwt.encode(claims(), key, algorithm=alg, headers={"kid": "key-1"}))
+
+
+def test_alg_mismatch_with_the_jwks_key_is_rejected(rsa_key):
+    """An ES256 header naming the RS256 key's kid must not be verified with that key."""
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    ec_key = ec.generate_private_key(ec.SECP256R1())
+    assert_unauthorized(jwt.encode(claims(), ec_key, algorithm="ES256", headers={"kid": "key-1"}))
+
+
+def test_hs256_token_signed_with_another_secret_is_rejected():
+    assert_unauthorized(jwt.encode(claims(), "another-secret-that-is-long-enough-too", algorithm="HS256"))
+
+
+def test_unknown_kid_is_rejected(rsa_key):
+    assert_unauthorized(jwt.encode(claims(), rsa_key, algorithm="RS256", headers={"kid": "rotated-away"}))
+
+
+def test_verified_token_is_served_from_cache(monkeypatch):
+    token = jwt.encode(claims(), SECRET, algorithm="HS256")
+    assert authenticate(token) == "user-1"
+
+    async def not_called(token):
+        raise AssertionError("verified again")
+
+    monkeypatch.setattr(security, "_verify_locally", not_called)
+    assert authenticate(token) == "user-1"
+
+
+def test_token_cache_never_outlives_token_exp(fake_clock, monkeypatch):
+    monkeypatch.setattr(security, "time", fake_clock.as_time_module())
+    cache = TokenCache(ttl_seconds=300)
+    cache.set("token", "user-1", token_exp=fake_clock.now + 60)
+
+    fake_clock.now += 59
+    assert cache.get("token") == "user-1"
+    fake_clock.now += 2
+    assert cache.get("token") is None
+
+
+def test_token_cache_ttl_and_lru_bound(fake_clock, monkeypatch):
+    monkeypatch.setattr(security, "time", fake_clock.as_time_module())
+    cache = TokenCache(ttl_seconds=300, max_entries=2)
+    cache.set("a", "user-a")
+    cache.set("b", "user-b")
+    cache.get("a")
+    cache.set("c", "user-c")  # evicts "b", the least recently used
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("user-a", None, "user-c")
+
+    fake_clock.now += 301
+    assert cache.get("a") is None
@@ -10,6 +10,18 @@ export const createProfileSlice = (set, get) => ({
 
     setActiveProfileId: (profileId) => set({ activeProfileId: profileId }),
 
+    // Tells the API to drop its cached copy of the profile. Best-effort: the cache also expires on its own.
+    invalidateProfileCache: async (profileId) => {
+        try {
+            await fetch(`${API_BASE_URL}/profiles/${profileId}/invalidate-cache`, {
+                method: 'POST',
+                headers: await getAuthHeaders(),
+            });
+        } catch (error) {
+            console.warn(`Failed to invalidate profile cache: ${error.message}`);
+        }
+    },
+
     fetchProfiles: async () => {
         const { data, error } = await supabase
             .from('profiles')
@@ -50,6 +62,7 @@ export const createProfileSlice = (set, get) => ({
                 savedData = data;
             }
             if (error) throw error;
+            if (id) get().invalidateProfileCache(id);
 
             if (file) {
                 console.warn("File upload is being deprecated, but a file was passed. Ignoring file.");
@@ -80,6 +93,7 @@ export const createProfileSlice = (set, get) => ({
 
     handleDeleteProfile: async (id) => {
         await supabase.from('profiles').delete().eq('id', id);
+        get().invalidateProfileCache(id);
         get().addNotification('Profile deleted.');
         const remainingProfiles = get().profiles.filter((p) => p.id !== id);
         set({ profiles: remainingProfiles });